@@ -0,0 +1,70 @@
+"""
+Content Size Limit
+Rejects request bodies above a fixed size before any JSON parsing happens, so a
+single oversized payload cannot tie up the worker or balloon memory.
+"""
+
+from starlette.responses import JSONResponse
+
+# Largest request body accepted by the API, in bytes
+MAX_CONTENT_SIZE = 1_000_000
+
+
+class ContentSizeLimitMiddleware:
+    """ASGI middleware answering 413 for bodies larger than max_content_size"""
+
+    def __init__(self, app, max_content_size: int = MAX_CONTENT_SIZE):
+        self.app = app
+        self.max_content_size = max_content_size
+
+    def _too_large(self) -> JSONResponse:
+        return JSONResponse(
+            {"detail": f"Request body exceeds {self.max_content_size} bytes"},
+            status_code=413
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Fail fast on the declared size
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if not value.isdigit():
+                    await JSONResponse({"detail": "Invalid Content-Length"}, status_code=400)(scope, receive, send)
+                    return
+                if int(value) > self.max_content_size:
+                    await self._too_large()(scope, receive, send)
+                    return
+                break
+
+        # Chunked bodies carry no Content-Length, so count what is actually received.
+        # Once over the limit we answer 413 ourselves, tell the app the client went
+        # away and drop whatever it tries to send afterwards.
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_content_size:
+                    rejected = True
+                    await self._too_large()(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
@@ -1,11 +1,13 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import socketio
 import uvicorn
 import os
 import sys
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Add the backend directory to Python path
@@ -14,13 +16,26 @@ sys.path.insert(0, str(backend_dir))
 
 from api.routes import workflow, execution, nodes, gpu, errors, presets, face_editor
 from api.websocket import websocket_manager
+from api.content_size import ContentSizeLimitMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Persist workflow and preset edits still waiting on the flush debounce
+    await workflow.workflows_db.flush()
+    await presets.preset_manager.flush()
 
 app = FastAPI(
     title="DeepFaceLab Workflow Editor API",
     description="Backend API for the DeepFaceLab Workflow Editor",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Reject oversized request bodies before they are parsed
+app.add_middleware(ContentSizeLimitMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
 # Include API routes
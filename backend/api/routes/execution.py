@@ -5,14 +5,13 @@ from datetime import datetime
 import uuid
 
 from schemas.schemas import WorkflowExecution, ExecutionStatus, ProgressUpdate
-from core.workflow_engine import WorkflowEngine
+from core.workflow_engine import workflow_engine
 from api.websocket import websocket_manager
 
 router = APIRouter()
 
 # In-memory storage for executions (replace with database in production)
 executions_db: Dict[str, WorkflowExecution] = {}
-workflow_engine = WorkflowEngine()
 
 @router.post("/start/{workflow_id}", response_model=WorkflowExecution)
 async def start_execution(workflow_id: str, background_tasks: BackgroundTasks):
@@ -96,8 +95,8 @@ async def resume_execution(execution_id: str, background_tasks: BackgroundTasks)
         "message": execution.message
     })
     
-    # Resume execution in background
-    background_tasks.add_task(run_workflow, execution_id, execution.workflow_id)
+    # Resume execution in background, skipping nodes that already completed
+    background_tasks.add_task(run_workflow, execution_id, execution.workflow_id, True)
     
     return {"message": "Execution resumed"}
 
@@ -133,8 +132,8 @@ async def start_node_execution(node_id: str, background_tasks: BackgroundTasks,
 
     return execution
 
-async def run_workflow(execution_id: str, workflow_id: str):
-    """Background task to run a workflow"""
+async def run_workflow(execution_id: str, workflow_id: str, resume: bool = False):
+    """Background task to run a workflow, or continue a paused one when resume is set"""
     try:
         execution = executions_db[execution_id]
         
@@ -146,7 +145,10 @@ async def run_workflow(execution_id: str, workflow_id: str):
         })
         
         # Run the workflow using the workflow engine
-        result = await workflow_engine.execute_workflow(workflow_id, execution_id)
+        if resume:
+            result = await workflow_engine.resume_execution(execution_id)
+        else:
+            result = await workflow_engine.execute_workflow(workflow_id, execution_id)
         
         if result["success"]:
             execution.status = ExecutionStatus.COMPLETED
@@ -375,8 +375,9 @@ async def embed_masks(request: EmbedMasksRequest):
             "info"
         )
 
-        # Embed masks
-        success_count, failure_count = embed_mask_polygons(
+        # Embed masks off the event loop
+        success_count, failure_count = await asyncio.to_thread(
+            embed_mask_polygons,
             face_files_to_process,
             request.eyebrow_expand_mod
         )
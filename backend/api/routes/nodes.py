@@ -1,530 +1,115 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Any, Tuple
+import asyncio
+import hashlib
 import json
+import uuid
+from collections import OrderedDict
+import orjson
 
-from schemas.schemas import NodeDefinition, NodeType, PortType, NodePort
+from schemas.schemas import NodeDefinition, NodeType, NodePort, DetectionProfileCreate
+from core.node_definitions import NODE_DEFINITIONS, LEGACY_NODE_TYPES
 
 router = APIRouter()
 
-# Constants for file filters
-VIDEO_FILES_FILTER = {"name": "Video Files", "extensions": ["mp4", "avi", "mov", "mkv", "webm"]}
-ALL_FILES_FILTER = {"name": "All Files", "extensions": ["*"]}
-IMAGE_FILES_FILTER = {"name": "Image Files", "extensions": ["jpg", "jpeg", "png", "bmp", "tiff"]}
+# Static CORS headers for served face images
+_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Allow-Credentials": "true",
+}
 
-# Node definitions for different node types
-NODE_DEFINITIONS: Dict[str, NodeDefinition] = {
-    "video_input": NodeDefinition(
-        id="video_input",
-        type=NodeType.VIDEO_INPUT,
-        name="Video Input",
-        description="Extract frames from video file using DeepFaceLab's VideoEd.py",
-        inputs=[],
-        outputs=[
-            NodePort(id="video_frames", type=PortType.IMAGES, label="Video Frames", required=True)
-        ],
-        parameters={
-            "input_file": {
-                "type": "file-path", 
-                "description": "Path to input video file", 
-                "format": "file-path",
-                "filters": [VIDEO_FILES_FILTER, ALL_FILES_FILTER],
-                "required": True
-            },
-            "output_dir": {
-                "type": "directory-path", 
-                "description": "Directory to save extracted frames", 
-                "format": "directory-path",
-                "required": True
-            },
-            "fps": {
-                "type": "number", 
-                "description": "Frames per second to extract (0 = full fps)", 
-                "default": 0, 
-                "minimum": 0,
-                "maximum": 120
-            },
-            "output_ext": {
-                "type": "select", 
-                "description": "Image format for extracted frames", 
-                "options": ["png", "jpg"], 
-                "default": "png"
-            }
-        },
-        category="Input"
-    ),
-    
-    "extract_faces": NodeDefinition(
-        id="extract_faces",
-        type=NodeType.EXTRACT_FACES,
-        name="Extract Faces",
-        description="Extract faces from video or images using S3FD or manual detection",
-        inputs=[
-            NodePort(id="video", type=PortType.VIDEO, label="Video", required=True),
-            NodePort(id="images", type=PortType.IMAGES, label="Images", required=False)
-        ],
-        outputs=[
-            NodePort(id="faces", type=PortType.FACES, label="Extracted Faces", required=True)
-        ],
-        parameters={
-            "detector": {
-                "type": "select", 
-                "options": ["s3fd", "manual"], 
-                "default": "s3fd",
-                "description": "Face detection method"
-            },
-            "face_type": {
-                "type": "select", 
-                "options": ["half_face", "full_face", "whole_face", "head"], 
-                "default": "full_face",
-                "description": "Type of face region to extract"
-            },
-            "image_size": {
-                "type": "number", 
-                "default": 512, 
-                "min": 64, 
-                "max": 1024,
-                "description": "Size of extracted face images"
-            },
-            "jpeg_quality": {
-                "type": "number", 
-                "default": 90, 
-                "min": 1, 
-                "max": 100,
-                "description": "JPEG compression quality"
-            },
-            "max_faces_from_image": {
-                "type": "number", 
-                "default": 1, 
-                "min": 1, 
-                "max": 10,
-                "description": "Maximum faces to extract per image"
-            },
-            "output_debug": {
-                "type": "boolean", 
-                "default": False,
-                "description": "Save debug images with face detection overlays"
-            },
-            "gpu_idx": {
-                "type": "gpu", 
-                "description": "GPU device to use for face extraction", 
-                "default": 0
-            }
-        },
-        category="Processing"
-    ),
-    
-    "train_model": NodeDefinition(
-        id="train_model",
-        type=NodeType.TRAIN_MODEL,
-        name="Train Model",
-        description="Train a face swap model using SAEHD, Quick96, or AMP",
-        inputs=[
-            NodePort(id="src_faces", type=PortType.FACES, label="Source Faces", required=True),
-            NodePort(id="dst_faces", type=PortType.FACES, label="Destination Faces", required=True)
-        ],
-        outputs=[
-            NodePort(id="model", type=PortType.MODEL, label="Trained Model", required=True)
-        ],
-        parameters={
-            "model_type": {
-                "type": "select", 
-                "options": ["SAEHD", "Quick96", "AMP"], 
-                "default": "SAEHD",
-                "description": "Model architecture to use for training"
-            },
-            "batch_size": {
-                "type": "number", 
-                "default": 4, 
-                "min": 1, 
-                "max": 32,
-                "description": "Training batch size"
-            },
-            "resolution": {
-                "type": "number", 
-                "default": 256, 
-                "min": 64, 
-                "max": 1024,
-                "description": "Model resolution"
-            },
-            "target_iter": {
-                "type": "number", 
-                "default": 100000, 
-                "min": 1000,
-                "description": "Target number of training iterations"
-            },
-            "save_interval": {
-                "type": "number", 
-                "default": 25, 
-                "min": 1,
-                "description": "Save model every N iterations"
-            },
-            "preview": {
-                "type": "boolean", 
-                "default": True,
-                "description": "Show training preview"
-            },
-            "gpu_idx": {
-                "type": "gpu", 
-                "description": "GPU device to use for training", 
-                "default": 0
-            },
-            "pretrained_model": {
-                "type": "file-path", 
-                "description": "Path to pretrained model (optional)",
-                "format": "file-path",
-                "filters": [{"name": "Model Files", "extensions": ["pth", "pt", "h5"]}, {"name": "All Files", "extensions": ["*"]}],
-                "required": False
-            }
-        },
-        category="Processing"
-    ),
-    
-    "merge_faces": NodeDefinition(
-        id="merge_faces",
-        type=NodeType.MERGE_FACES,
-        name="Merge Faces",
-        description="Merge trained model with destination video/images",
-        inputs=[
-            NodePort(id="model", type=PortType.MODEL, label="Trained Model", required=True),
-            NodePort(id="dst_video", type=PortType.VIDEO, label="Destination Video", required=True),
-            NodePort(id="dst_faces", type=PortType.FACES, label="Destination Faces", required=True),
-            NodePort(id="mask", type=PortType.MASK, label="XSeg Mask", required=False)
-        ],
-        outputs=[
-            NodePort(id="merged_video", type=PortType.VIDEO, label="Merged Video", required=True),
-            NodePort(id="merged_images", type=PortType.IMAGES, label="Merged Images", required=False)
-        ],
-        parameters={
-            "face_enhancer": {
-                "type": "select", 
-                "options": ["none", "GFPGAN", "CodeFormer"], 
-                "default": "none",
-                "description": "Face enhancement method"
-            },
-            "color_transfer": {
-                "type": "select", 
-                "options": ["none", "rct", "lct", "mkl", "idt"], 
-                "default": "none",
-                "description": "Color transfer method"
-            },
-            "erode_mask": {
-                "type": "number", 
-                "default": 0, 
-                "min": 0, 
-                "max": 50,
-                "description": "Erode mask by N pixels"
-            },
-            "blur_mask": {
-                "type": "number", 
-                "default": 0, 
-                "min": 0, 
-                "max": 50,
-                "description": "Blur mask by N pixels"
-            },
-            "output_format": {
-                "type": "select", 
-                "options": ["png", "jpg"], 
-                "default": "png",
-                "description": "Output image format"
-            },
-            "gpu_idx": {
-                "type": "gpu", 
-                "description": "GPU device to use for merging", 
-                "default": 0
-            }
-        },
-        category="Processing"
-    ),
-    
-    "video_output": NodeDefinition(
-        id="video_output",
-        type=NodeType.VIDEO_OUTPUT,
-        name="Video Output",
-        description="Create video from image sequence using DeepFaceLab's VideoEd.py",
-        inputs=[
-            NodePort(id="image_sequence", type=PortType.IMAGES, label="Image Sequence", required=True)
-        ],
-        outputs=[
-            NodePort(id="output_video", type=PortType.VIDEO, label="Output Video", required=True)
-        ],
-        parameters={
-            "input_dir": {
-                "type": "directory-path", 
-                "description": "Directory containing image sequence", 
-                "format": "directory-path",
-                "required": True
-            },
-            "output_file": {
-                "type": "file-path", 
-                "description": "Path for the output video file", 
-                "format": "file-path",
-                "filters": [VIDEO_FILES_FILTER, ALL_FILES_FILTER],
-                "required": True
-            },
-            "reference_file": {
-                "type": "file-path", 
-                "description": "Reference video file for FPS and audio (optional)", 
-                "format": "file-path",
-                "filters": [VIDEO_FILES_FILTER, ALL_FILES_FILTER],
-                "required": False
-            },
-            "ext": {
-                "type": "select", 
-                "description": "Format of input images", 
-                "options": ["png", "jpg"], 
-                "default": "png"
-            },
-            "fps": {
-                "type": "number", 
-                "description": "Output video FPS (overridden by reference file)", 
-                "minimum": 1,
-                "default": 30
-            },
-            "bitrate": {
-                "type": "number", 
-                "description": "Output video bitrate in Megabits", 
-                "minimum": 1,
-                "default": 10
-            },
-            "include_audio": {
-                "type": "boolean", 
-                "description": "Include audio from reference file", 
-                "default": False
-            },
-            "lossless": {
-                "type": "boolean", 
-                "description": "Use lossless codec (PNG)", 
-                "default": False
-            }
-        },
-        category="Output"
-    ),
-    
-    "advanced_face_editor": NodeDefinition(
-        id="advanced_face_editor",
-        type=NodeType.XSEG_EDITOR,  # Reusing the same type for now
-        name="Advanced Face Editor",
-        description="Advanced face editor with auto-detection, model loading, and segment selection",
-        inputs=[
-            NodePort(id="faces", type=PortType.FACES, label="Faces", required=True)
-        ],
-        outputs=[
-            NodePort(id="edited_faces", type=PortType.FACES, label="Edited Faces", required=True)
-        ],
-        parameters={
-            "input_dir": {
-                "type": "directory-path", 
-                "description": "Directory containing face images to edit", 
-                "format": "directory-path",
-                "required": True
-            },
-            "face_type": {
-                "type": "select",
-                "options": ["mouth", "half_face", "midfull_face", "full_face", "whole_face", "head"],
-                "default": "full_face",
-                "description": "Type of face detection to use"
-            },
-            "detection_model": {
-                "type": "select",
-                "options": ["VGGFace2", "OpenCV", "MTCNN"],
-                "default": "VGGFace2",
-                "description": "Face detection model to use"
-            },
-            "similarity_threshold": {
-                "type": "number",
-                "default": 0.6,
-                "min": 0.0,
-                "max": 1.0,
-                "description": "Threshold for grouping similar faces"
-            }
-        },
-        category="Editing"
-    ),
-    
-    "image_resize": NodeDefinition(
-        id="image_resize",
-        type=NodeType.UTILITY,
-        name="Image Resize",
-        description="Resize images to specified dimensions",
-        inputs=[
-            NodePort(id="images", type=PortType.IMAGES, label="Images", required=True)
-        ],
-        outputs=[
-            NodePort(id="resized_images", type=PortType.IMAGES, label="Resized Images", required=True)
-        ],
-        parameters={
-            "input_dir": {
-                "type": "directory-path", 
-                "description": "Directory containing images to resize", 
-                "format": "directory-path",
-                "required": True
-            },
-            "output_dir": {
-                "type": "directory-path", 
-                "description": "Directory to save resized images", 
-                "format": "directory-path",
-                "required": True
-            },
-            "width": {
-                "type": "number", 
-                "description": "Target width in pixels", 
-                "default": 512, 
-                "minimum": 64,
-                "maximum": 4096
-            },
-            "height": {
-                "type": "number", 
-                "description": "Target height in pixels", 
-                "default": 512, 
-                "minimum": 64,
-                "maximum": 4096
-            },
-            "maintain_aspect": {
-                "type": "boolean", 
-                "description": "Maintain aspect ratio", 
-                "default": True
-            }
-        },
-        category="Processing"
-    ),
-    
-    "face_filter": NodeDefinition(
-        id="face_filter",
-        type=NodeType.UTILITY,
-        name="Face Filter",
-        description="Filter faces based on quality, blur, or other criteria",
-        inputs=[
-            NodePort(id="faces", type=PortType.FACES, label="Faces", required=True)
-        ],
-        outputs=[
-            NodePort(id="filtered_faces", type=PortType.FACES, label="Filtered Faces", required=True)
-        ],
-        parameters={
-            "input_dir": {
-                "type": "directory-path", 
-                "description": "Directory containing face images", 
-                "format": "directory-path",
-                "required": True
-            },
-            "output_dir": {
-                "type": "directory-path", 
-                "description": "Directory to save filtered faces", 
-                "format": "directory-path",
-                "required": True
-            },
-            "min_quality": {
-                "type": "number", 
-                "description": "Minimum face quality score", 
-                "default": 0.5, 
-                "minimum": 0.0,
-                "maximum": 1.0
-            },
-            "max_blur": {
-                "type": "number", 
-                "description": "Maximum blur threshold", 
-                "default": 0.3, 
-                "minimum": 0.0,
-                "maximum": 1.0
-            },
-            "min_resolution": {
-                "type": "number", 
-                "description": "Minimum resolution (pixels)", 
-                "default": 64, 
-                "minimum": 32,
-                "maximum": 1024
-            }
-        },
-        category="Processing"
-    ),
-    
-    "batch_rename": NodeDefinition(
-        id="batch_rename",
-        type=NodeType.UTILITY,
-        name="Batch Rename",
-        description="Rename files in a directory with a consistent naming pattern",
-        inputs=[
-            NodePort(id="files", type=PortType.FILES, label="Files", required=True)
-        ],
-        outputs=[
-            NodePort(id="renamed_files", type=PortType.FILES, label="Renamed Files", required=True)
-        ],
-        parameters={
-            "input_dir": {
-                "type": "directory-path", 
-                "description": "Directory containing files to rename", 
-                "format": "directory-path",
-                "required": True
-            },
-            "pattern": {
-                "type": "string", 
-                "description": "Naming pattern (e.g., 'face_{index:04d}.jpg')", 
-                "default": "face_{index:04d}.jpg",
-                "required": True
-            },
-            "start_index": {
-                "type": "number", 
-                "description": "Starting index number", 
-                "default": 1, 
-                "minimum": 0
-            },
-            "file_extensions": {
-                "type": "string", 
-                "description": "File extensions to process (comma-separated)", 
-                "default": "jpg,jpeg,png,bmp"
-            }
-        },
-        category="Processing"
-    )
+# Definitions are static, so dump them once instead of walking the models per request
+_NODE_DEF_DICTS: Dict[str, Dict[str, Any]] = {
+    node_type: definition.dict() for node_type, definition in NODE_DEFINITIONS.items()
+}
+_NODE_DEF_BLOBS: Dict[str, bytes] = {
+    node_type: orjson.dumps(definition) for node_type, definition in _NODE_DEF_DICTS.items()
+}
+
+def _join_blobs(blobs: List[bytes]) -> bytes:
+    """Splice already-encoded JSON objects into a JSON array"""
+    return b"[" + b",".join(blobs) + b"]"
+
+_NODE_DEFS_BLOB: bytes = _join_blobs(list(_NODE_DEF_BLOBS.values()))
+_CATEGORY_BLOBS: Dict[str, bytes] = {
+    category: _join_blobs([
+        _NODE_DEF_BLOBS[node_type] for node_type, definition in _NODE_DEF_DICTS.items()
+        if definition["category"] == category
+    ])
+    for category in {definition["category"] for definition in _NODE_DEF_DICTS.values()}
+}
+_CATEGORIES_BLOB: bytes = orjson.dumps(sorted(_CATEGORY_BLOBS))
+
+def _etag(blob: bytes) -> str:
+    """Strong ETag for a precomputed response body"""
+    return f'"{hashlib.blake2b(blob, digest_size=8).hexdigest()}"'
+
+# Content only changes on restart, so ETags are computed alongside the blobs
+_NODE_DEFS_ETAG = _etag(_NODE_DEFS_BLOB)
+_NODE_DEF_ETAGS: Dict[str, str] = {node_type: _etag(blob) for node_type, blob in _NODE_DEF_BLOBS.items()}
+_CATEGORY_ETAGS: Dict[str, str] = {category: _etag(blob) for category, blob in _CATEGORY_BLOBS.items()}
+_CATEGORIES_ETAG = _etag(_CATEGORIES_BLOB)
+_EMPTY_LIST_ETAG = _etag(b"[]")
+
+def _cached_json_response(request: Request, blob: bytes, etag: str) -> Response:
+    """Return a precomputed JSON body, or 304 when the client already has it"""
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=blob, media_type="application/json", headers=headers)
+
+# Port lookups keyed by (node_type, port_id) for connection validation
+_INPUT_IDX: Dict[Tuple[str, str], NodePort] = {
+    (node_type, port.id): port for node_type, definition in NODE_DEFINITIONS.items() for port in definition.inputs
+}
+_OUTPUT_IDX: Dict[Tuple[str, str], NodePort] = {
+    (node_type, port.id): port for node_type, definition in NODE_DEFINITIONS.items() for port in definition.outputs
 }
 
 @router.get("/definitions", response_model=List[NodeDefinition])
-async def get_node_definitions():
+async def get_node_definitions(request: Request):
     """Get all available node definitions"""
-    return list(NODE_DEFINITIONS.values())
+    return _cached_json_response(request, _NODE_DEFS_BLOB, _NODE_DEFS_ETAG)
 
 @router.get("/definitions/{node_type}", response_model=NodeDefinition)
-async def get_node_definition(node_type: str):
+async def get_node_definition(node_type: str, request: Request):
     """Get definition for a specific node type"""
-    # Handle legacy xseg_editor type - redirect to advanced_face_editor
-    if node_type == "xseg_editor":
-        node_type = "advanced_face_editor"
+    # Handle legacy types, e.g. xseg_editor - redirect to advanced_face_editor
+    node_type = LEGACY_NODE_TYPES.get(node_type, node_type)
     
     if node_type not in NODE_DEFINITIONS:
         raise HTTPException(status_code=404, detail="Node type not found")
     
-    return NODE_DEFINITIONS[node_type]
+    return _cached_json_response(request, _NODE_DEF_BLOBS[node_type], _NODE_DEF_ETAGS[node_type])
 
 @router.get("/categories")
-async def get_node_categories():
+async def get_node_categories(request: Request):
     """Get all node categories"""
-    categories = set()
-    for definition in NODE_DEFINITIONS.values():
-        categories.add(definition.category)
-    
-    return sorted(categories)
+    return _cached_json_response(request, _CATEGORIES_BLOB, _CATEGORIES_ETAG)
 
 @router.get("/by-category/{category}", response_model=List[NodeDefinition])
-async def get_nodes_by_category(category: str):
+async def get_nodes_by_category(category: str, request: Request):
     """Get all nodes in a specific category"""
-    nodes = [defn for defn in NODE_DEFINITIONS.values() if defn.category == category]
-    return nodes
+    if category not in _CATEGORY_BLOBS:
+        return _cached_json_response(request, b"[]", _EMPTY_LIST_ETAG)
+    return _cached_json_response(request, _CATEGORY_BLOBS[category], _CATEGORY_ETAGS[category])
 
 @router.post("/validate-connection")
 async def validate_connection(source_node_type: str, target_node_type: str, source_port: str, target_port: str):
     """Validate if two nodes can be connected"""
-    source_def = NODE_DEFINITIONS.get(source_node_type)
-    target_def = NODE_DEFINITIONS.get(target_node_type)
-    
-    if not source_def or not target_def:
+    if source_node_type not in NODE_DEFINITIONS or target_node_type not in NODE_DEFINITIONS:
         return {"valid": False, "reason": "Node type not found"}
     
     # Find source output port
-    source_output = next((port for port in source_def.outputs if port.id == source_port), None)
+    source_output = _OUTPUT_IDX.get((source_node_type, source_port))
     if not source_output:
         return {"valid": False, "reason": "Source port not found"}
     
     # Find target input port
-    target_input = next((port for port in target_def.inputs if port.id == target_port), None)
+    target_input = _INPUT_IDX.get((target_node_type, target_port))
     if not target_input:
         return {"valid": False, "reason": "Target port not found"}
     
@@ -536,35 +121,52 @@ async def validate_connection(source_node_type: str, target_node_type: str, sour
 
 # Face Editor API Endpoints
 
+# Face editor instances are reused across requests so per-node state (progress,
+# detection profiles) survives between calls. Request parameters are passed to
+# each editor method and never stored on the shared instance.
+FACE_EDITOR_CACHE_SIZE = 256
+_face_editors: "OrderedDict[str, Any]" = OrderedDict()
+
+def _get_face_editor(node_id: str):
+    """Get the cached face editor for a node, creating it on first use"""
+    from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
+    from schemas.schemas import WorkflowNode, NodeStatus
+    
+    face_editor = _face_editors.get(node_id)
+    if face_editor is None:
+        # Built from trusted server-side values, so skip pydantic validation
+        workflow_node = WorkflowNode.model_construct(
+            id=node_id,
+            type=NodeType.XSEG_EDITOR,
+            position={"x": 0.0, "y": 0.0},
+            parameters={},
+            status=NodeStatus.IDLE,
+            progress=0.0,
+            message=""
+        )
+        face_editor = AdvancedFaceEditorNode(workflow_node)
+        _face_editors[node_id] = face_editor
+        if len(_face_editors) > FACE_EDITOR_CACHE_SIZE:
+            _face_editors.popitem(last=False)
+    else:
+        _face_editors.move_to_end(node_id)
+    
+    return face_editor
+
 @router.post("/{node_id}/detect-faces")
 async def detect_faces(node_id: str, request: Dict[str, Any]):
     """Trigger face detection for advanced face editor node"""
     try:
-        from core.workflow_engine import WorkflowEngine
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
+        from nodes.advanced_face_editor_node import find_face_images
         from pathlib import Path
         
-        # Create a mock workflow node for the face editor
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters=request,
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor node instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Detect faces
         face_data = await face_editor.detect_faces(
             Path(request["input_dir"]),
-            face_editor._find_face_images(Path(request["input_dir"])),
+            find_face_images(Path(request["input_dir"])),
             request.get("detection_model", "VGGFace2"),
             request.get("face_type", "full_face"),
             request.get("similarity_threshold", 0.6)
@@ -583,25 +185,8 @@ async def detect_faces(node_id: str, request: Dict[str, Any]):
 async def load_segmentation_model(node_id: str):
     """Load BiSeNet segmentation model"""
     try:
-        from core.workflow_engine import WorkflowEngine
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
-        # Create a mock workflow node for the face editor
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor node instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Load BiSeNet model
         result = await face_editor.load_bisenet_model()
@@ -615,25 +200,8 @@ async def load_segmentation_model(node_id: str):
 async def generate_masks(node_id: str, request: Dict[str, Any]):
     """Generate segmentation masks for face images"""
     try:
-        from core.workflow_engine import WorkflowEngine
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
-        # Create a mock workflow node for the face editor
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters=request,
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor node instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Get face images from request
         face_images = request.get("face_images", [])
@@ -651,25 +219,8 @@ async def generate_masks(node_id: str, request: Dict[str, Any]):
 async def embed_polygons(node_id: str, request: Dict[str, Any]):
     """Embed mask polygons into face images"""
     try:
-        from core.workflow_engine import WorkflowEngine
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
-        # Create a mock workflow node for the face editor
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters=request,
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor node instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Get face images from request
         face_images = request.get("face_images", [])
@@ -683,44 +234,34 @@ async def embed_polygons(node_id: str, request: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Faces per SSE frame in the face image stream
+FACE_STREAM_BATCH_SIZE = 32
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+def _sse_frame(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as a single server-sent event frame"""
+    return b"".join((_SSE_PREFIX, orjson.dumps(payload), _SSE_SUFFIX))
+
 @router.get("/{node_id}/face-images-stream")
 async def get_face_images_stream(node_id: str, input_dir: str):
-    """Stream face images one by one as they're processed"""
+    """Stream face images in batches as they're processed"""
     from fastapi.responses import StreamingResponse
-    import json
-    import asyncio
-    from core.workflow_engine import WorkflowEngine
-    from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-    from schemas.schemas import WorkflowNode, NodeStatus
+    from nodes.advanced_face_editor_node import find_face_images
     from pathlib import Path
     
     async def generate_face_images():
         try:
-            # Create a mock workflow node for the face editor
-            workflow_node = WorkflowNode(
-                id=node_id,
-                type="xseg_editor",
-                position={"x": 0, "y": 0},
-                parameters={"input_dir": input_dir},
-                status=NodeStatus.IDLE,
-                progress=0.0,
-                message="",
-                inputs={},
-                outputs={}
-            )
-            
-            # Create face editor node instance
-            face_editor = AdvancedFaceEditorNode(workflow_node)
-            
             # Find face images
-            face_files = face_editor._find_face_images(Path(input_dir))
+            face_files = find_face_images(Path(input_dir))
             
             # Send total count first
-            yield f"data: {json.dumps({'type': 'count', 'total': len(face_files)})}\n\n"
+            yield _sse_frame({"type": "count", "total": len(face_files)})
             
-            # Process and send each image individually
+            # Send faces in batches to amortize per-frame overhead
+            buf = []
             for i, face_file in enumerate(face_files):
-                face_data = {
+                buf.append({
                     "id": f"face_{i}",
                     "filename": face_file.name,
                     "filePath": str(face_file),
@@ -729,19 +270,20 @@ async def get_face_images_stream(node_id: str, input_dir: str):
                     "landmarks": None,
                     "selected": False,
                     "active": False
-                }
-                
-                # Send individual face data
-                yield f"data: {json.dumps({'type': 'face', 'data': face_data})}\n\n"
+                })
                 
-                # Delay to allow frontend to process and render each image individually
-                await asyncio.sleep(0.1)  # Increased from 0.01s to 0.1s for better UX
+                if len(buf) == FACE_STREAM_BATCH_SIZE:
+                    yield _sse_frame({"type": "face_batch", "data": buf})
+                    buf = []
+            
+            if buf:
+                yield _sse_frame({"type": "face_batch", "data": buf})
             
             # Send completion signal
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield _sse_frame({"type": "complete"})
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield _sse_frame({"type": "error", "message": str(e)})
     
     return StreamingResponse(
         generate_face_images(),
@@ -753,29 +295,11 @@ async def get_face_images_stream(node_id: str, input_dir: str):
 async def get_face_images(node_id: str, input_dir: str):
     """Get list of detected face images"""
     try:
-        from core.workflow_engine import WorkflowEngine
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
+        from nodes.advanced_face_editor_node import find_face_images
         from pathlib import Path
         
-        # Create a mock workflow node for the face editor
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor node instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
-        
         # Find face images
-        face_files = face_editor._find_face_images(Path(input_dir))
+        face_files = find_face_images(Path(input_dir))
         
         # Convert to face data format
         face_data = []
@@ -828,10 +352,7 @@ async def get_face_image(node_id: str, filename: str, input_dir: str):
         )
         
         # Add CORS headers explicitly
-        response.headers["Access-Control-Allow-Origin"] = "*"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS"
-        response.headers["Access-Control-Allow-Headers"] = "*"
-        response.headers["Access-Control-Allow-Credentials"] = "true"
+        response.headers.update(_CORS_HEADERS)
         
         return response
         
@@ -840,33 +361,64 @@ async def get_face_image(node_id: str, filename: str, input_dir: str):
 
 # Detection Profile Management Endpoints
 
+DEFAULT_DETECTION_PROFILE = "default"
+DEFAULT_DETECTION_PROFILE_SETTINGS = {
+    "face_type": "full_face",
+    "detection_model": "VGGFace2",
+    "similarity_threshold": 0.6,
+    "eyebrow_expand_mod": 1
+}
+
+# Detection profiles for all nodes in one flat store keyed by (node_id, profile_name).
+# Every node implicitly has the default profile.
+_detection_profiles: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
 @router.post("/{node_id}/detection-profiles")
-async def create_detection_profile(node_id: str, request: Dict[str, Any]):
+async def create_detection_profile(node_id: str, request: DetectionProfileCreate):
     """Create a new detection profile"""
     try:
-        profile_name = request.get("name", "default")
-        profile_settings = request.get("settings", {})
+        profile_name = request.name
+        profile_settings = request.settings
+        
+        key = (node_id, profile_name)
+        if profile_name == DEFAULT_DETECTION_PROFILE or key in _detection_profiles:
+            raise HTTPException(status_code=409, detail=f"Detection profile '{profile_name}' already exists")
+        
+        _detection_profiles[key] = {
+            "settings": {**DEFAULT_DETECTION_PROFILE_SETTINGS, **profile_settings},
+            "selected_faces": []
+        }
         
-        # Store profile (in a real implementation, this would save to a database or file)
-        # For now, just return success
         return {
             "success": True,
             "profile_name": profile_name,
             "message": f"Detection profile '{profile_name}' created"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{node_id}/detection-profiles")
-async def list_detection_profiles(node_id: str):
+async def list_detection_profiles(node_id: str, request: Request, response: Response):
     """List all detection profiles"""
     try:
-        # Return list of profiles (would fetch from database in real implementation)
+        profiles = [DEFAULT_DETECTION_PROFILE]
+        profiles.extend(
+            name for (profile_node_id, name) in _detection_profiles
+            if profile_node_id == node_id and name != DEFAULT_DETECTION_PROFILE
+        )
+        
+        etag = _etag(orjson.dumps(profiles))
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
         return {
             "success": True,
-            "profiles": ["default"],
-            "count": 1
+            "profiles": profiles,
+            "count": len(profiles)
         }
         
     except Exception as e:
@@ -876,13 +428,20 @@ async def list_detection_profiles(node_id: str):
 async def delete_detection_profile(node_id: str, profile_name: str):
     """Delete a detection profile"""
     try:
-        # Delete profile (would remove from database in real implementation)
+        if profile_name == DEFAULT_DETECTION_PROFILE:
+            raise HTTPException(status_code=400, detail="Cannot delete the default detection profile")
+        
+        if _detection_profiles.pop((node_id, profile_name), None) is None:
+            raise HTTPException(status_code=404, detail=f"Detection profile '{profile_name}' not found")
+        
         return {
             "success": True,
             "profile_name": profile_name,
             "message": f"Detection profile '{profile_name}' deleted"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -890,13 +449,23 @@ async def delete_detection_profile(node_id: str, profile_name: str):
 async def reset_detection_profile(node_id: str, profile_name: str):
     """Reset a detection profile to defaults"""
     try:
-        # Reset profile to defaults (would update in database in real implementation)
+        key = (node_id, profile_name)
+        if profile_name != DEFAULT_DETECTION_PROFILE and key not in _detection_profiles:
+            raise HTTPException(status_code=404, detail=f"Detection profile '{profile_name}' not found")
+        
+        _detection_profiles[key] = {
+            "settings": dict(DEFAULT_DETECTION_PROFILE_SETTINGS),
+            "selected_faces": []
+        }
+        
         return {
             "success": True,
             "profile_name": profile_name,
             "message": f"Detection profile '{profile_name}' reset to defaults"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -906,8 +475,6 @@ async def reset_detection_profile(node_id: str, profile_name: str):
 async def update_parent_frames(node_id: str, request: Dict[str, Any]):
     """Update faces to reference parent frames"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
         from pathlib import Path
         
         input_dir = request.get("input_dir")
@@ -916,21 +483,8 @@ async def update_parent_frames(node_id: str, request: Dict[str, Any]):
         if not input_dir or not parent_frame_folder:
             raise HTTPException(status_code=400, detail="Missing required parameters: input_dir and parent_frame_folder")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir, "parent_frame_folder": parent_frame_folder},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Update parent frames
         result = await face_editor.update_parent_to_self(input_dir, parent_frame_folder)
@@ -944,29 +498,13 @@ async def update_parent_frames(node_id: str, request: Dict[str, Any]):
 async def import_face_data(node_id: str, request: Dict[str, Any]):
     """Import face metadata from existing images"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         input_dir = request.get("input_dir")
         
         if not input_dir:
             raise HTTPException(status_code=400, detail="Missing required parameter: input_dir")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Import face data
         result = await face_editor.import_face_data(input_dir)
@@ -976,45 +514,56 @@ async def import_face_data(node_id: str, request: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class NumpyORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that serializes numpy arrays natively instead of via tolist()"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
 @router.get("/{node_id}/face-data/{face_id}")
 async def get_face_data(node_id: str, face_id: str, input_dir: str = None):
     """Get face data (landmarks, segmentation) for a specific face image"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         if not input_dir:
             raise HTTPException(status_code=400, detail="Missing required parameter: input_dir")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message=""
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Get face data for the specific image
         face_data = await face_editor.get_face_data_for_image(face_id, input_dir)
         
-        return face_data
+        return NumpyORJSONResponse(face_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Maximum face data loads in flight per batch request
+FACE_DATA_BATCH_CONCURRENCY = 32
+
+async def _load_face_data(face_editor, face_id: str, input_dir: str, semaphore: asyncio.Semaphore) -> Tuple[str, Dict[str, Any]]:
+    """Load face data for one image, turning failures into an error entry"""
+    async with semaphore:
+        try:
+            return face_id, await face_editor.get_face_data_for_image(face_id, input_dir)
+        except Exception as e:
+            return face_id, {
+                "success": False,
+                "message": f"Error loading face data for {face_id}: {str(e)}",
+                "landmarks": None,
+                "segmentation": None,
+                "face_type": None,
+                "source_filename": None
+            }
+
 @router.post("/{node_id}/face-data-batch")
-async def get_face_data_batch(node_id: str, request: Dict[str, Any]):
-    """Get face data (landmarks, segmentation) for multiple face images in batch"""
+async def get_face_data_batch(node_id: str, request: Dict[str, Any], stream: bool = False):
+    """Get face data (landmarks, segmentation) for multiple face images in batch
+    
+    With stream=true the results are sent as NDJSON, one {face_id: data} line per
+    face as soon as it finishes loading.
+    """
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         face_ids = request.get('face_ids', [])
         input_dir = request.get('input_dir')
         
@@ -1024,110 +573,140 @@ async def get_face_data_batch(node_id: str, request: Dict[str, Any]):
         if not face_ids:
             raise HTTPException(status_code=400, detail="Missing required parameter: face_ids")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message=""
-        )
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Get face data for all images concurrently, bounded to avoid fd exhaustion
+        semaphore = asyncio.Semaphore(FACE_DATA_BATCH_CONCURRENCY)
         
-        # Get face data for all images in batch
-        batch_results = {}
-        for face_id in face_ids:
-            try:
-                face_data = await face_editor.get_face_data_for_image(face_id, input_dir)
-                batch_results[face_id] = face_data
-            except Exception as e:
-                batch_results[face_id] = {
-                    "success": False,
-                    "message": f"Error loading face data for {face_id}: {str(e)}",
-                    "landmarks": None,
-                    "segmentation": None,
-                    "face_type": None,
-                    "source_filename": None
-                }
+        if stream:
+            from fastapi.responses import StreamingResponse
+            
+            async def generate_face_data():
+                tasks = [
+                    asyncio.ensure_future(_load_face_data(face_editor, face_id, input_dir, semaphore))
+                    for face_id in face_ids
+                ]
+                try:
+                    for next_done in asyncio.as_completed(tasks):
+                        face_id, face_data = await next_done
+                        yield orjson.dumps({face_id: face_data}, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+                finally:
+                    # Client went away before the batch finished
+                    for task in tasks:
+                        task.cancel()
+            
+            return StreamingResponse(generate_face_data(), media_type="application/x-ndjson")
         
-        return {
+        pairs = await asyncio.gather(
+            *(_load_face_data(face_editor, face_id, input_dir, semaphore) for face_id in face_ids)
+        )
+        batch_results = dict(pairs)
+        
+        # Returned as a response directly so the nested landmark lists skip jsonable_encoder
+        return NumpyORJSONResponse({
             "success": True,
             "message": f"Batch loaded face data for {len(face_ids)} images",
             "results": batch_results
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Background import-all-face-data jobs, keyed by job id and stored with the id
+# of the node that started them. Finished jobs are kept until their result is
+# polled, up to IMPORT_JOB_LIMIT jobs; new imports are refused while the limit
+# is taken up by running jobs.
+IMPORT_JOB_LIMIT = 64
+_import_jobs: "OrderedDict[str, Tuple[str, asyncio.Task]]" = OrderedDict()
+
+def _start_import_job(node_id: str, face_editor, input_dir: str) -> str:
+    """Run import_all_face_data as a background task and return its job id"""
+    finished = [job_id for job_id, (_, task) in _import_jobs.items() if task.done()]
+    for job_id in finished[:max(0, len(_import_jobs) - IMPORT_JOB_LIMIT + 1)]:
+        del _import_jobs[job_id]
+    
+    if len(_import_jobs) >= IMPORT_JOB_LIMIT:
+        raise HTTPException(status_code=429, detail="Too many face data imports running, try again later")
+    
+    job_id = uuid.uuid4().hex
+    _import_jobs[job_id] = (node_id, asyncio.create_task(face_editor.import_all_face_data(input_dir)))
+    return job_id
+
 @router.post("/{node_id}/import-all-face-data")
-async def import_all_face_data(node_id: str, request: Dict[str, Any]):
-    """Import face data for all images in the input directory upfront"""
+async def import_all_face_data(node_id: str, request: Dict[str, Any], background: bool = False):
+    """Import face data for all images in the input directory upfront
+    
+    With background=true the import runs as a background job and a job_id is
+    returned immediately; poll /{node_id}/progress?job_id=... for the result.
+    """
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         input_dir = request.get('input_dir')
         
         if not input_dir:
             raise HTTPException(status_code=400, detail="Missing required parameter: input_dir")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message=""
-        )
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        if background:
+            job_id = _start_import_job(node_id, face_editor, input_dir)
+            return {
+                "success": True,
+                "job_id": job_id,
+                "message": "Face data import started"
+            }
         
         # Import all face data upfront
         result = await face_editor.import_all_face_data(input_dir)
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{node_id}/progress")
-async def get_node_progress(node_id: str):
-    """Get current progress of a node operation"""
+async def get_node_progress(node_id: str, job_id: str = None):
+    """Get current progress of a node operation, and of a background job if job_id is given"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message=""
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Get current progress
         progress = face_editor.get_progress()
         message = face_editor.get_message()
         
-        return {
+        response = {
             "success": True,
             "progress": progress,
             "message": message
         }
         
+        if job_id is not None:
+            job_node_id, task = _import_jobs.get(job_id, (None, None))
+            if task is None or job_node_id != node_id:
+                raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+            
+            if not task.done():
+                response["job_status"] = "running"
+            else:
+                # The result is handed out once
+                del _import_jobs[job_id]
+                if task.cancelled():
+                    response["job_status"] = "cancelled"
+                elif task.exception() is not None:
+                    response["job_status"] = "failed"
+                    response["error"] = str(task.exception())
+                else:
+                    response["job_status"] = "completed"
+                    response["result"] = task.result()
+        
+        return response
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1135,9 +714,6 @@ async def get_node_progress(node_id: str):
 async def copy_embedded_data(node_id: str, request: Dict[str, Any]):
     """Copy face metadata between folders"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         input_dir = request.get("input_dir")
         faces_folder = request.get("faces_folder")
         only_parent_data = request.get("only_parent_data", False)
@@ -1146,26 +722,8 @@ async def copy_embedded_data(node_id: str, request: Dict[str, Any]):
         if not input_dir or not faces_folder:
             raise HTTPException(status_code=400, detail="Missing required parameters: input_dir and faces_folder")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={
-                "input_dir": input_dir,
-                "faces_folder": faces_folder,
-                "only_parent_data": only_parent_data,
-                "recalculate": recalculate
-            },
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Copy embedded data
         result = await face_editor.copy_embedded_data(input_dir, faces_folder, only_parent_data, recalculate)
@@ -1181,30 +739,14 @@ async def copy_embedded_data(node_id: str, request: Dict[str, Any]):
 async def train_xseg_model(node_id: str, request: Dict[str, Any]):
     """Train XSeg segmentation model"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         input_dir = request.get("input_dir")
         xseg_model_path = request.get("xseg_model_path")
         
         if not input_dir or not xseg_model_path:
             raise HTTPException(status_code=400, detail="Missing required parameters: input_dir and xseg_model_path")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir, "xseg_model_path": xseg_model_path},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Train XSeg model
         result = await face_editor.train_xseg(input_dir, xseg_model_path)
@@ -1218,30 +760,14 @@ async def train_xseg_model(node_id: str, request: Dict[str, Any]):
 async def apply_xseg_model(node_id: str, request: Dict[str, Any]):
     """Apply XSeg model to generate masks"""
     try:
-        from nodes.advanced_face_editor_node import AdvancedFaceEditorNode
-        from schemas.schemas import WorkflowNode, NodeStatus
-        
         input_dir = request.get("input_dir")
         xseg_model_path = request.get("xseg_model_path")
         
         if not input_dir or not xseg_model_path:
             raise HTTPException(status_code=400, detail="Missing required parameters: input_dir and xseg_model_path")
         
-        # Create workflow node
-        workflow_node = WorkflowNode(
-            id=node_id,
-            type="xseg_editor",
-            position={"x": 0, "y": 0},
-            parameters={"input_dir": input_dir, "xseg_model_path": xseg_model_path},
-            status=NodeStatus.IDLE,
-            progress=0.0,
-            message="",
-            inputs={},
-            outputs={}
-        )
-        
-        # Create face editor instance
-        face_editor = AdvancedFaceEditorNode(workflow_node)
+        # Reuse the cached face editor for this node
+        face_editor = _get_face_editor(node_id)
         
         # Apply XSeg model
         result = await face_editor.apply_xseg(input_dir, xseg_model_path)
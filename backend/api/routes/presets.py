@@ -1,49 +1,69 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from typing import List, Dict, Any
-import uuid
-from datetime import datetime
+import os
 
 from schemas.schemas import NodePreset, WorkflowNode, NodeType, NodeStatus
 from core.preset_manager import PresetManager
+from core.timestamps import now_iso
 
 router = APIRouter()
 preset_manager = PresetManager()
 
+_VALID_NODE_TYPES = frozenset(t.value for t in NodeType)
+
+def _short_id(prefix: str) -> str:
+    """Generate a short random id such as 'preset-1a2b3c4d'"""
+    return f"{prefix}-{os.urandom(4).hex()}"
+
 @router.post("/", response_model=NodePreset)
 async def save_preset(preset: NodePreset):
     """Save a node preset"""
     try:
         # Generate ID if not provided
         if not preset.id:
-            preset.id = f"preset-{uuid.uuid4().hex[:8]}"
+            preset.id = _short_id("preset")
         
         # Set timestamps
-        now = datetime.now().isoformat()
+        now = now_iso()
         if not preset.created_at:
             preset.created_at = now
         preset.updated_at = now
         
-        saved_preset = await preset_manager.save_preset(preset)
+        saved_preset = preset_manager.save_preset(preset)
         return saved_preset
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save preset: {str(e)}")
 
 @router.get("/", response_model=List[NodePreset])
-async def list_presets():
+async def list_presets(request: Request, response: Response):
     """List all presets"""
     try:
-        presets = await preset_manager.list_presets()
+        presets = preset_manager.list_presets()
+        
+        # Count catches deletions, newest updated_at catches saves and edits
+        latest = max((preset.updated_at for preset in presets), default="")
+        etag = f'W/"{len(presets)}-{latest}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
         return presets
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list presets: {str(e)}")
 
 @router.get("/{preset_id}", response_model=NodePreset)
-async def get_preset(preset_id: str):
+async def get_preset(preset_id: str, request: Request, response: Response):
     """Get a specific preset"""
     try:
-        preset = await preset_manager.get_preset(preset_id)
+        preset = preset_manager.get_preset(preset_id)
         if not preset:
             raise HTTPException(status_code=404, detail="Preset not found")
+        
+        etag = f'W/"{preset.updated_at}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
         return preset
     except HTTPException:
         raise
@@ -54,13 +74,15 @@ async def get_preset(preset_id: str):
 async def update_preset(preset_id: str, preset_update: Dict[str, Any]):
     """Update a preset"""
     try:
-        preset_update["updated_at"] = datetime.now().isoformat()
-        updated_preset = await preset_manager.update_preset(preset_id, preset_update)
+        preset_update["updated_at"] = now_iso()
+        updated_preset = preset_manager.update_preset(preset_id, preset_update)
         if not updated_preset:
             raise HTTPException(status_code=404, detail="Preset not found")
         return updated_preset
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update preset: {str(e)}")
 
@@ -68,7 +90,7 @@ async def update_preset(preset_id: str, preset_update: Dict[str, Any]):
 async def delete_preset(preset_id: str):
     """Delete a preset"""
     try:
-        success = await preset_manager.delete_preset(preset_id)
+        success = preset_manager.delete_preset(preset_id)
         if not success:
             raise HTTPException(status_code=404, detail="Preset not found")
         return {"message": "Preset deleted successfully"}
@@ -82,12 +104,10 @@ async def get_presets_by_type(node_type: str):
     """Get presets by node type"""
     try:
         # Validate node type
-        try:
-            NodeType(node_type)
-        except ValueError:
+        if node_type not in _VALID_NODE_TYPES:
             raise HTTPException(status_code=400, detail=f"Invalid node type: {node_type}")
         
-        presets = await preset_manager.get_presets_by_type(node_type)
+        presets = preset_manager.get_presets_by_type(node_type)
         return presets
     except HTTPException:
         raise
@@ -98,12 +118,12 @@ async def get_presets_by_type(node_type: str):
 async def load_preset_into_workflow(preset_id: str, position: Dict[str, float]):
     """Load a preset as a workflow node"""
     try:
-        preset = await preset_manager.get_preset(preset_id)
+        preset = preset_manager.get_preset(preset_id)
         if not preset:
             raise HTTPException(status_code=404, detail="Preset not found")
         
         # Create a workflow node from the preset
-        node_id = f"node-{uuid.uuid4().hex[:8]}"
+        node_id = _short_id("node")
         workflow_node = WorkflowNode(
             id=node_id,
             type=preset.nodeType,
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse
+from typing import List, Dict, Any, Optional, Tuple
+import gzip
+import hashlib
 import uuid
-from datetime import datetime
 import json
 import os
+import orjson
 
-from schemas.schemas import Workflow, WorkflowNode, WorkflowEdge, NodeStatus
+from schemas.schemas import Workflow, WorkflowUpdate, WorkflowNode, WorkflowEdge, WorkflowBulkAdd, NodeStatus
+from core.workflow_store import WorkflowStore
+from core.timestamps import now_iso
 
 router = APIRouter()
 
-# In-memory storage for demo (replace with database in production)
-workflows_db: Dict[str, Workflow] = {}
+# In-memory workflows, persisted to the workspace in coalesced writes
+workflows_db = WorkflowStore()
+
+# Serialized exports per workflow: (revision, body, gzipped body, etag)
+_export_cache: Dict[str, Tuple[str, bytes, bytes, str]] = {}
 
 @router.get("/", response_model=List[Workflow])
 async def list_workflows():
@@ -18,32 +26,53 @@ async def list_workflows():
     return list(workflows_db.values())
 
 @router.get("/{workflow_id}", response_model=Workflow)
-async def get_workflow(workflow_id: str):
+async def get_workflow(workflow_id: str, request: Request, response: Response):
     """Get a specific workflow by ID"""
     if workflow_id not in workflows_db:
         raise HTTPException(status_code=404, detail="Workflow not found")
-    return workflows_db[workflow_id]
+    
+    workflow = workflows_db[workflow_id]
+    etag = f'W/"{workflows_db.revision(workflow_id)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
+    return workflow
 
 @router.post("/", response_model=Workflow)
 async def create_workflow(workflow: Workflow):
     """Create a new workflow"""
     workflow_id = str(uuid.uuid4())
     workflow.id = workflow_id
-    workflow.created_at = datetime.now().isoformat()
+    workflow.created_at = now_iso()
     workflow.updated_at = workflow.created_at
     
     workflows_db[workflow_id] = workflow
     return workflow
 
 @router.put("/{workflow_id}", response_model=Workflow)
-async def update_workflow(workflow_id: str, workflow: Workflow):
-    """Update an existing workflow"""
+async def update_workflow(workflow_id: str, workflow_update: WorkflowUpdate):
+    """Update an existing workflow
+    
+    Accepts a full workflow or just the changed fields; id and created_at are kept.
+    """
     if workflow_id not in workflows_db:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
-    workflow.id = workflow_id
-    workflow.updated_at = datetime.now().isoformat()
-    workflows_db[workflow_id] = workflow
+    workflow = workflows_db[workflow_id]
+    
+    # Apply the already-validated fields in place instead of rebuilding the workflow
+    for field in workflow_update.model_fields_set:
+        value = getattr(workflow_update, field)
+        if value is not None:
+            setattr(workflow, field, value)
+    workflow.updated_at = now_iso()
+    
+    if workflow_update.nodes is not None or workflow_update.edges is not None:
+        # Node and edge lists were replaced; reassigning rebuilds the id indexes
+        workflows_db[workflow_id] = workflow
+    else:
+        workflows_db.mark_dirty(workflow_id)
     return workflow
 
 @router.delete("/{workflow_id}")
@@ -53,6 +82,7 @@ async def delete_workflow(workflow_id: str):
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     del workflows_db[workflow_id]
+    _export_cache.pop(workflow_id, None)
     return {"message": "Workflow deleted successfully"}
 
 @router.post("/{workflow_id}/nodes", response_model=WorkflowNode)
@@ -63,11 +93,38 @@ async def add_node(workflow_id: str, node: WorkflowNode):
     
     workflow = workflows_db[workflow_id]
     node.id = str(uuid.uuid4())
-    workflow.nodes.append(node)
-    workflow.updated_at = datetime.now().isoformat()
+    workflows_db.add_node(workflow_id, node)
+    workflow.updated_at = now_iso()
+    workflows_db.mark_dirty(workflow_id)
     
     return node
 
+@router.post("/{workflow_id}/nodes:bulk", response_model=WorkflowBulkAdd)
+async def add_nodes_bulk(workflow_id: str, batch: WorkflowBulkAdd):
+    """Add several nodes and edges to a workflow in one request (e.g. paste or import)"""
+    if workflow_id not in workflows_db:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    
+    workflow = workflows_db[workflow_id]
+    
+    # New ids are assigned server-side; edges between nodes of the batch follow them
+    id_map = {}
+    for node in batch.nodes:
+        new_id = str(uuid.uuid4())
+        id_map[node.id] = new_id
+        node.id = new_id
+    for edge in batch.edges:
+        edge.id = str(uuid.uuid4())
+        edge.source = id_map.get(edge.source, edge.source)
+        edge.target = id_map.get(edge.target, edge.target)
+    
+    workflows_db.add_nodes(workflow_id, batch.nodes)
+    workflows_db.add_edges(workflow_id, batch.edges)
+    workflow.updated_at = now_iso()
+    workflows_db.mark_dirty(workflow_id)
+    
+    return batch
+
 @router.put("/{workflow_id}/nodes/{node_id}", response_model=WorkflowNode)
 async def update_node(workflow_id: str, node_id: str, node: WorkflowNode):
     """Update a node in a workflow"""
@@ -75,14 +132,15 @@ async def update_node(workflow_id: str, node_id: str, node: WorkflowNode):
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     workflow = workflows_db[workflow_id]
-    node_index = next((i for i, n in enumerate(workflow.nodes) if n.id == node_id), None)
+    node_index = workflows_db.find_node(workflow_id, node_id)
     
     if node_index is None:
         raise HTTPException(status_code=404, detail="Node not found")
     
     node.id = node_id
     workflow.nodes[node_index] = node
-    workflow.updated_at = datetime.now().isoformat()
+    workflow.updated_at = now_iso()
+    workflows_db.mark_dirty(workflow_id)
     
     return node
 
@@ -93,9 +151,9 @@ async def delete_node(workflow_id: str, node_id: str):
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     workflow = workflows_db[workflow_id]
-    workflow.nodes = [n for n in workflow.nodes if n.id != node_id]
-    workflow.edges = [e for e in workflow.edges if e.source != node_id and e.target != node_id]
-    workflow.updated_at = datetime.now().isoformat()
+    workflows_db.remove_node(workflow_id, node_id)
+    workflow.updated_at = now_iso()
+    workflows_db.mark_dirty(workflow_id)
     
     return {"message": "Node deleted successfully"}
 
@@ -107,8 +165,9 @@ async def add_edge(workflow_id: str, edge: WorkflowEdge):
     
     workflow = workflows_db[workflow_id]
     edge.id = str(uuid.uuid4())
-    workflow.edges.append(edge)
-    workflow.updated_at = datetime.now().isoformat()
+    workflows_db.add_edge(workflow_id, edge)
+    workflow.updated_at = now_iso()
+    workflows_db.mark_dirty(workflow_id)
     
     return edge
 
@@ -119,25 +178,49 @@ async def delete_edge(workflow_id: str, edge_id: str):
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     workflow = workflows_db[workflow_id]
-    workflow.edges = [e for e in workflow.edges if e.id != edge_id]
-    workflow.updated_at = datetime.now().isoformat()
+    workflows_db.remove_edge(workflow_id, edge_id)
+    workflow.updated_at = now_iso()
+    workflows_db.mark_dirty(workflow_id)
     
     return {"message": "Edge deleted successfully"}
 
 @router.post("/{workflow_id}/export")
-async def export_workflow(workflow_id: str):
-    """Export workflow as JSON file"""
+async def export_workflow(workflow_id: str, request: Request):
+    """Export workflow as JSON file
+    
+    The export is serialized and gzipped once per workflow revision and reused
+    until the workflow changes.
+    """
     if workflow_id not in workflows_db:
         raise HTTPException(status_code=404, detail="Workflow not found")
     
     workflow = workflows_db[workflow_id]
-    export_data = {
-        "workflow": workflow.dict(),
-        "exported_at": datetime.now().isoformat(),
-        "version": "1.0"
+    revision = workflows_db.revision(workflow_id)
+    cached = _export_cache.get(workflow_id)
+    if cached is None or cached[0] != revision:
+        body = orjson.dumps({
+            # Serialized by pydantic-core directly, spliced in without an intermediate dict
+            "workflow": orjson.Fragment(workflow.model_dump_json()),
+            "exported_at": now_iso(),
+            "version": "1.0"
+        })
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        cached = (revision, body, gzip.compress(body), etag)
+        _export_cache[workflow_id] = cached
+    
+    _, body, gzipped_body, etag = cached
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=60",
+        "Vary": "Accept-Encoding"
     }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     
-    return export_data
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gzipped_body, media_type="application/json", headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("/import")
 async def import_workflow(workflow_data: Dict[str, Any]):
@@ -148,7 +231,7 @@ async def import_workflow(workflow_data: Dict[str, Any]):
         
         workflow_id = str(uuid.uuid4())
         workflow.id = workflow_id
-        workflow.created_at = datetime.now().isoformat()
+        workflow.created_at = now_iso()
         workflow.updated_at = workflow.created_at
         
         workflows_db[workflow_id] = workflow
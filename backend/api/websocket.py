@@ -1,152 +1,241 @@
 from fastapi import WebSocket
-from typing import List, Dict, Any
-import json
+from typing import Dict, Any, Hashable, List, Optional, Set, Tuple, Union
 import asyncio
-from datetime import datetime
+
+import orjson
+
+from core.timestamps import now_iso
+
+# Seconds a single client may take to accept a message before it is dropped
+SEND_TIMEOUT = 5.0
+
+# Messages waiting per client. When a client's queue is full, queued messages
+# superseded by a newer one with the same key (e.g. progress of one node) are
+# dropped; a client still this far behind is disconnected.
+OUTBOUND_QUEUE_SIZE = 1024
+
+# Close code sent to a dropped client ("try again later"); the frontend reconnects
+DROPPED_CLIENT_CLOSE_CODE = 1013
+
+# Most messages packed into a single {"type": "batch"} frame
+MAX_BATCH_MESSAGES = 256
+
+# Send frames as binary (UTF-8 JSON bytes) instead of text. Clients must set
+# binaryType = "arraybuffer" and decode the bytes before parsing.
+BINARY_FRAMES = False
+
+# Accept the int-keyed dicts and numpy values that json.dumps callers used to pass
+_ENCODE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _encode(data: Dict[str, Any]) -> bytes:
+    """Encode a message with orjson; datetime values in the data are formatted natively"""
+    return orjson.dumps(data, option=_ENCODE_OPTIONS)
+
+def _pack(message_type: str, **fields: Any) -> bytes:
+    """Build and encode a timestamped message of the given type"""
+    # Messages in the same burst share one formatted timestamp
+    return _encode({"type": message_type, **fields, "timestamp": now_iso()})
+
+def _to_frame_payload(message: Union[str, bytes]) -> Union[str, bytes]:
+    """Convert an encoded message to the frame type in use; done once per fan-out"""
+    if BINARY_FRAMES:
+        return message.encode() if isinstance(message, str) else message
+    return message.decode() if isinstance(message, bytes) else message
+
+async def _safe_send(websocket: WebSocket, message: Union[str, bytes]) -> bool:
+    """Send a message to one client, reporting failure instead of raising"""
+    try:
+        if isinstance(message, bytes):
+            send = websocket.send_bytes(message)
+        else:
+            send = websocket.send_text(message)
+        await asyncio.wait_for(send, timeout=SEND_TIMEOUT)
+        return True
+    except Exception as e:
+        print(f"Error sending WebSocket message: {e}")
+        return False
 
 class WebSocketManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.node_subscriptions: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Set[WebSocket] = set()
+        self.node_subscriptions: Dict[str, Set[WebSocket]] = {}
+        # Reverse index so disconnect only visits the nodes this socket subscribed to
+        self.ws_to_nodes: Dict[WebSocket, Set[str]] = {}
+        # Per-client outbound queue, drained by one writer task per client
+        self.outbound_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.writer_tasks: Dict[WebSocket, asyncio.Task] = {}
+        # Pending closes of dropped clients, kept referenced until they finish
+        self.close_tasks: Set[asyncio.Task] = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
+        self.ws_to_nodes[websocket] = set()
+        queue = asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE)
+        self.outbound_queues[websocket] = queue
+        self.writer_tasks[websocket] = asyncio.create_task(self._write_loop(websocket, queue))
         print(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
+        self.outbound_queues.pop(websocket, None)
+        writer = self.writer_tasks.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
         
-        # Remove from all node subscriptions
-        for node_id, subscribers in self.node_subscriptions.items():
-            if websocket in subscribers:
-                subscribers.remove(websocket)
+        # Remove from the node subscriptions of this socket
+        for node_id in self.ws_to_nodes.pop(websocket, ()):
+            subscribers = self.node_subscriptions.get(node_id)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.node_subscriptions[node_id]
         
         print(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
+    def _drop(self, websocket: WebSocket):
+        """Disconnect a client that cannot keep up and close its socket so it reconnects"""
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close(websocket))
+        self.close_tasks.add(task)
+        task.add_done_callback(self.close_tasks.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=DROPPED_CLIENT_CLOSE_CODE), timeout=SEND_TIMEOUT)
+        except Exception:
+            # Already closed or unreachable
+            pass
+
+    @staticmethod
+    def _compact(queue: asyncio.Queue, item: Tuple[Optional[Hashable], Union[str, bytes]]) -> bool:
+        """Drop queued messages superseded by a later one with the same key, then queue item.
+
+        Returns False if the queue is still full.
+        """
+        items = []
+        while not queue.empty():
+            items.append(queue.get_nowait())
+        items.append(item)
+        latest = {key: i for i, (key, _) in enumerate(items) if key is not None}
+        items = [entry for i, entry in enumerate(items) if entry[0] is None or latest[entry[0]] == i]
+        
+        fits = len(items) <= queue.maxsize
+        for entry in items[:queue.maxsize]:
+            queue.put_nowait(entry)
+        return fits
+
+    def _enqueue(self, websocket: WebSocket, message: Union[str, bytes], key: Optional[Hashable] = None):
+        """Queue an encoded message for a client without waiting on the network"""
+        queue = self.outbound_queues.get(websocket)
+        if queue is None:
+            return
         try:
-            await websocket.send_text(message)
-        except Exception as e:
-            print(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+            queue.put_nowait((key, message))
+        except asyncio.QueueFull:
+            if not self._compact(queue, (key, message)):
+                print(f"WebSocket client fell {OUTBOUND_QUEUE_SIZE} messages behind, disconnecting")
+                self._drop(websocket)
 
-    async def broadcast(self, message: str):
+    async def _write_loop(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Send queued messages, packing everything queued since the last send into one frame"""
+        while True:
+            # Block on the first message, then take whatever else is already waiting
+            batch = [(await queue.get())[1]]
+            while len(batch) < MAX_BATCH_MESSAGES:
+                try:
+                    batch.append(queue.get_nowait()[1])
+                except asyncio.QueueEmpty:
+                    break
+            
+            if len(batch) == 1:
+                frame = batch[0]
+            elif isinstance(batch[0], bytes):
+                # Messages are already JSON, so splice them instead of re-encoding
+                frame = b'{"type":"batch","messages":[' + b",".join(batch) + b"]}"
+            else:
+                frame = '{"type":"batch","messages":[' + ",".join(batch) + "]}"
+            
+            if not await _safe_send(websocket, frame):
+                self.disconnect(websocket)
+                await self._close(websocket)
+                return
+
+    def _broadcast_bytes(self, payload: Union[str, bytes], subscribers, key: Optional[Hashable] = None):
+        """Queue one encoded payload for many clients, sharing the same object between them"""
+        payload = _to_frame_payload(payload)
+        # Each client's writer sends independently, so one slow client doesn't delay the rest
+        for websocket in list(subscribers):
+            self._enqueue(websocket, payload, key)
+
+    def _send_to_node(self, node_id: str, payload: bytes, key: Optional[Hashable] = None):
+        """Queue an encoded payload for all subscribers of a specific node"""
+        self._broadcast_bytes(payload, self.node_subscriptions.get(node_id, ()), key)
+
+    async def send_personal_message(self, message: Union[str, bytes], websocket: WebSocket):
+        self._broadcast_bytes(message, (websocket,))
+
+    async def broadcast(self, message: Union[str, bytes], key: Optional[Hashable] = None):
+        """Send an already encoded JSON message to every client.
+        
+        A message with a key replaces any queued, unsent message with the same key.
+        """
         print(f"🔌 Broadcasting message to {len(self.active_connections)} connections: {message[:100]}...")
         if not self.active_connections:
             print("🔌 No active connections to broadcast to")
             return
         
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                print(f"Error broadcasting message: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn)
+        self._broadcast_bytes(message, self.active_connections, key)
 
     async def send_node_update(self, node_id: str, update_data: Dict[str, Any]):
         """Send update to all subscribers of a specific node"""
-        message = json.dumps({
-            "type": "node_update",
-            "node_id": node_id,
-            "data": update_data,
-            "timestamp": datetime.now().isoformat()
-        })
+        self._send_to_node(node_id, _pack("node_update", node_id=node_id, data=update_data),
+                           ("node_update", node_id))
+
+    async def send_node_updates(self, updates: List[Tuple[str, Dict[str, Any]]]):
+        """Send several (node_id, update_data) updates at once, e.g. a finished layer.
         
-        # Send to all subscribers of this node
-        if node_id in self.node_subscriptions:
-            disconnected = []
-            for websocket in self.node_subscriptions[node_id]:
-                try:
-                    await websocket.send_text(message)
-                except Exception as e:
-                    print(f"Error sending node update: {e}")
-                    disconnected.append(websocket)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.disconnect(conn)
+        Everything is queued before any client writer runs, so each client
+        receives its share as a single batch frame.
+        """
+        timestamp = now_iso()
+        for node_id, update_data in updates:
+            self._send_to_node(node_id, _encode({
+                "type": "node_update",
+                "node_id": node_id,
+                "data": update_data,
+                "timestamp": timestamp
+            }), ("node_update", node_id))
 
     async def send_execution_update(self, execution_data: Dict[str, Any]):
         """Send workflow execution update to all connected clients"""
-        message = json.dumps({
-            "type": "execution_update",
-            "data": execution_data,
-            "timestamp": datetime.now().isoformat()
-        })
-        await self.broadcast(message)
+        await self.broadcast(_pack("execution_update", data=execution_data))
 
     async def send_log_message(self, node_id: str, level: str, message: str):
         """Send log message to all subscribers of a specific node"""
-        log_data = {
-            "type": "log_message",
-            "node_id": node_id,
-            "level": level,
-            "message": message,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        message_json = json.dumps(log_data)
-        
-        # Send to all subscribers of this node
-        if node_id in self.node_subscriptions:
-            disconnected = []
-            for websocket in self.node_subscriptions[node_id]:
-                try:
-                    await websocket.send_text(message_json)
-                except Exception as e:
-                    print(f"Error sending log message: {e}")
-                    disconnected.append(websocket)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.disconnect(conn)
+        self._send_to_node(node_id, _pack("log_message", node_id=node_id, level=level, message=message))
 
     def subscribe_to_node(self, websocket: WebSocket, node_id: str):
         """Subscribe a websocket to updates from a specific node"""
-        if node_id not in self.node_subscriptions:
-            self.node_subscriptions[node_id] = []
-        
-        if websocket not in self.node_subscriptions[node_id]:
-            self.node_subscriptions[node_id].append(websocket)
+        self.node_subscriptions.setdefault(node_id, set()).add(websocket)
+        self.ws_to_nodes.setdefault(websocket, set()).add(node_id)
 
     def unsubscribe_from_node(self, websocket: WebSocket, node_id: str):
         """Unsubscribe a websocket from updates from a specific node"""
-        if node_id in self.node_subscriptions:
-            if websocket in self.node_subscriptions[node_id]:
-                self.node_subscriptions[node_id].remove(websocket)
+        subscribers = self.node_subscriptions.get(node_id)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.node_subscriptions[node_id]
+        
+        nodes = self.ws_to_nodes.get(websocket)
+        if nodes is not None:
+            nodes.discard(node_id)
 
     async def send_console_log(self, node_id: str, message: str, level: str = "info"):
         """Send console log message for face editor operations"""
-        log_data = {
-            "type": "console_log",
-            "node_id": node_id,
-            "level": level,
-            "message": message,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        message_json = json.dumps(log_data)
-        
-        # Send to all subscribers of this node
-        if node_id in self.node_subscriptions:
-            disconnected = []
-            for websocket in self.node_subscriptions[node_id]:
-                try:
-                    await websocket.send_text(message_json)
-                except Exception as e:
-                    print(f"Error sending console log: {e}")
-                    disconnected.append(websocket)
-            
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.disconnect(conn)
+        self._send_to_node(node_id, _pack("console_log", node_id=node_id, level=level, message=message))
 
 # Global WebSocket manager instance
 websocket_manager = WebSocketManager()
@@ -1,17 +1,36 @@
 import traceback
 import logging
-from typing import Dict, Any, Optional, List
+import uuid
+from collections import Counter, deque
+from typing import Dict, Any, Optional, List, Deque
 from enum import Enum
 from datetime import datetime
 from dataclasses import dataclass, asdict
 import asyncio
 
+from api.websocket import websocket_manager
+
+# Maximum number of errors kept in memory; the oldest are evicted first
+MAX_STORED_ERRORS = 10000
+
+# Window for the "recent_errors" count in the error summary, in seconds
+RECENT_ERROR_WINDOW = 3600
+
 class ErrorSeverity(Enum):
     LOW = "low"
     MEDIUM = "medium"
     HIGH = "high"
     CRITICAL = "critical"
 
+_TRACED_SEVERITIES = frozenset({ErrorSeverity.HIGH, ErrorSeverity.CRITICAL})
+
+_LOG_LEVELS = {
+    ErrorSeverity.CRITICAL: logging.CRITICAL,
+    ErrorSeverity.HIGH: logging.ERROR,
+    ErrorSeverity.MEDIUM: logging.WARNING,
+    ErrorSeverity.LOW: logging.INFO,
+}
+
 class ErrorCategory(Enum):
     VALIDATION = "validation"
     EXECUTION = "execution"
@@ -38,11 +57,29 @@ class ErrorInfo:
     retry_count: int = 0
     max_retries: int = 3
 
+_workflow_engine = None
+
+def _get_workflow_engine():
+    """Resolve the shared workflow engine on first use"""
+    global _workflow_engine
+    if _workflow_engine is None:
+        # Imported lazily: core.workflow_engine imports this module
+        from core.workflow_engine import workflow_engine
+        _workflow_engine = workflow_engine
+    return _workflow_engine
+
 class ErrorHandler:
     """Centralized error handling and management"""
     
     def __init__(self):
-        self.errors: List[ErrorInfo] = []
+        self.errors: Deque[ErrorInfo] = deque(maxlen=MAX_STORED_ERRORS)
+        # Running totals so the summary does not rescan the error log
+        self._count_by_severity: Counter = Counter()
+        self._count_by_category: Counter = Counter()
+        self._recent_times: Deque[float] = deque(maxlen=MAX_STORED_ERRORS)
+        # Errors per node / workflow id, oldest first, for scoped lookups
+        self._by_node: Dict[str, Deque[ErrorInfo]] = {}
+        self._by_workflow: Dict[str, Deque[ErrorInfo]] = {}
         self.error_callbacks: List[callable] = []
         self.logger = logging.getLogger(__name__)
         
@@ -69,7 +106,7 @@ class ErrorHandler:
     ) -> ErrorInfo:
         """Handle an error and create ErrorInfo"""
         
-        error_id = f"err_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(self.errors)}"
+        error_id = f"err_{uuid.uuid4().hex}"
         
         error_info = ErrorInfo(
             id=error_id,
@@ -81,12 +118,23 @@ class ErrorHandler:
             node_id=node_id,
             workflow_id=workflow_id,
             execution_id=execution_id,
-            stack_trace=traceback.format_exc(),
+            # Formatting the trace walks every frame; only severe errors keep it,
+            # matching the levels that _log_error logs with exc_info
+            stack_trace=traceback.format_exc() if severity in _TRACED_SEVERITIES else None,
             recoverable=recoverable
         )
         
-        # Add to error log
+        # Add to error log, evicting the oldest entry when full
+        if len(self.errors) == self.errors.maxlen:
+            self._forget(self.errors[0])
         self.errors.append(error_info)
+        if node_id is not None:
+            self._by_node.setdefault(node_id, deque()).append(error_info)
+        if workflow_id is not None:
+            self._by_workflow.setdefault(workflow_id, deque()).append(error_info)
+        self._count_by_severity[severity.value] += 1
+        self._count_by_category[category.value] += 1
+        self._recent_times.append(error_info.timestamp.timestamp())
         
         # Log the error
         self._log_error(error_info)
@@ -102,21 +150,21 @@ class ErrorHandler:
     
     def _log_error(self, error_info: ErrorInfo):
         """Log error to appropriate level"""
-        log_message = f"[{error_info.severity.value.upper()}] {error_info.message}"
+        level = _LOG_LEVELS[error_info.severity]
+        if not self.logger.isEnabledFor(level):
+            return
         
+        # %-style arguments are only formatted if a handler emits the record
+        log_format = "[%s] %s"
+        args = [error_info.severity.value.upper(), error_info.message]
         if error_info.node_id:
-            log_message += f" (Node: {error_info.node_id})"
+            log_format += " (Node: %s)"
+            args.append(error_info.node_id)
         if error_info.workflow_id:
-            log_message += f" (Workflow: {error_info.workflow_id})"
+            log_format += " (Workflow: %s)"
+            args.append(error_info.workflow_id)
         
-        if error_info.severity == ErrorSeverity.CRITICAL:
-            self.logger.critical(log_message, exc_info=True)
-        elif error_info.severity == ErrorSeverity.HIGH:
-            self.logger.error(log_message, exc_info=True)
-        elif error_info.severity == ErrorSeverity.MEDIUM:
-            self.logger.warning(log_message)
-        else:
-            self.logger.info(log_message)
+        self.logger.log(level, log_format, *args, exc_info=level >= logging.ERROR)
     
     async def _notify_callbacks(self, error_info: ErrorInfo):
         """Notify all registered callbacks"""
@@ -132,12 +180,8 @@ class ErrorHandler:
     async def _halt_workflow(self, error_info: ErrorInfo):
         """Halt workflow execution due to critical error"""
         if error_info.workflow_id and error_info.execution_id:
-            # Import here to avoid circular imports
-            from core.workflow_engine import WorkflowEngine
-            from api.websocket import websocket_manager
-            
-            workflow_engine = WorkflowEngine()
-            await workflow_engine.stop_execution(error_info.execution_id)
+            # Stop the execution on the engine that is running it
+            await _get_workflow_engine().stop_execution(error_info.execution_id)
             
             # Notify via WebSocket
             await websocket_manager.send_execution_update({
@@ -156,45 +200,83 @@ class ErrorHandler:
         limit: int = 100
     ) -> List[ErrorInfo]:
         """Get filtered list of errors"""
-        filtered_errors = self.errors
+        filtered_errors = []
+        if limit <= 0:
+            return filtered_errors
         
-        if severity:
-            filtered_errors = [e for e in filtered_errors if e.severity == severity]
-        if category:
-            filtered_errors = [e for e in filtered_errors if e.category == category]
-        if node_id:
-            filtered_errors = [e for e in filtered_errors if e.node_id == node_id]
-        if workflow_id:
-            filtered_errors = [e for e in filtered_errors if e.workflow_id == workflow_id]
-        
-        return filtered_errors[-limit:]  # Return most recent errors
+        # Accept equivalent enums or plain values (e.g. the API schema enums)
+        if severity is not None:
+            severity = ErrorSeverity(severity)
+        if category is not None:
+            category = ErrorCategory(category)
+
+        # Scan the smallest pool that can contain matches
+        if node_id is not None:
+            candidates = self._by_node.get(node_id, ())
+        elif workflow_id is not None:
+            candidates = self._by_workflow.get(workflow_id, ())
+        else:
+            candidates = self.errors
+
+        # Walk newest first so old entries are only scanned when needed
+        for e in reversed(candidates):
+            # Enum members are singletons, so identity checks are enough
+            if severity is not None and e.severity is not severity:
+                continue
+            if category is not None and e.category is not category:
+                continue
+            if node_id is not None and e.node_id != node_id:
+                continue
+            if workflow_id is not None and e.workflow_id != workflow_id:
+                continue
+            filtered_errors.append(e)
+            if len(filtered_errors) >= limit:
+                break
+
+        filtered_errors.reverse()
+        return filtered_errors  # Return most recent errors
     
     def clear_errors(self, older_than_hours: int = 24):
         """Clear old errors"""
         cutoff_time = datetime.now().timestamp() - (older_than_hours * 3600)
-        self.errors = [
-            e for e in self.errors 
-            if e.timestamp.timestamp() > cutoff_time
-        ]
+        # Errors are stored in arrival order, so expired ones are at the front
+        while self.errors and self.errors[0].timestamp.timestamp() <= cutoff_time:
+            self._forget(self.errors.popleft())
+        while self._recent_times and self._recent_times[0] <= cutoff_time:
+            self._recent_times.popleft()
+
+    def _forget(self, error_info: ErrorInfo):
+        """Remove an evicted error from the summary counters and the id indexes"""
+        for counter, key in (
+            (self._count_by_severity, error_info.severity.value),
+            (self._count_by_category, error_info.category.value),
+        ):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        
+        # Evictions happen oldest first, so the error is at the front of its index
+        for index, key in (
+            (self._by_node, error_info.node_id),
+            (self._by_workflow, error_info.workflow_id),
+        ):
+            scoped = index.get(key)
+            if scoped and scoped[0] is error_info:
+                scoped.popleft()
+                if not scoped:
+                    del index[key]
     
     def get_error_summary(self) -> Dict[str, Any]:
         """Get error summary statistics"""
-        total_errors = len(self.errors)
-        errors_by_severity = {}
-        errors_by_category = {}
-        
-        for error in self.errors:
-            severity = error.severity.value
-            category = error.category.value
-            
-            errors_by_severity[severity] = errors_by_severity.get(severity, 0) + 1
-            errors_by_category[category] = errors_by_category.get(category, 0) + 1
+        cutoff_time = datetime.now().timestamp() - RECENT_ERROR_WINDOW
+        while self._recent_times and self._recent_times[0] <= cutoff_time:
+            self._recent_times.popleft()
         
         return {
-            "total_errors": total_errors,
-            "errors_by_severity": errors_by_severity,
-            "errors_by_category": errors_by_category,
-            "recent_errors": len([e for e in self.errors if (datetime.now() - e.timestamp).seconds < 3600])
+            "total_errors": len(self.errors),
+            "errors_by_severity": dict(self._count_by_severity),
+            "errors_by_category": dict(self._count_by_category),
+            "recent_errors": len(self._recent_times)
         }
 
 # Global error handler instance
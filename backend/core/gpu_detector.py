@@ -1,10 +1,23 @@
-import subprocess
+import asyncio
+import csv
+import io
 import json
+import os
 import platform
+import re
+import time
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+# Optional NVML bindings (nvidia-ml-py) - query NVIDIA GPUs in-process instead of
+# forking nvidia-smi
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
 class GPUType(Enum):
     NVIDIA = "nvidia"
     AMD = "amd"
@@ -27,89 +40,210 @@ class GPUInfo:
     cuda_version: Optional[str] = None
     is_available: bool = True
 
+# Seconds a detection / status result is reused before the vendor tools run again
+DETECT_TTL = 5.0
+STATUS_TTL = 1.0
+
+# Sentinel for "CUDA version not queried yet" (None means queried and unavailable)
+_NOT_QUERIED = object()
+
+async def _run_command(cmd: List[str], timeout: float = 10) -> Optional[str]:
+    """Run a command without blocking the event loop; stdout on success, None otherwise"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+        )
+    except (FileNotFoundError, PermissionError):
+        return None
+    
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+    
+    if process.returncode != 0:
+        return None
+    return stdout.decode(errors="replace")
+
+def _parse_int(value: str, default: Optional[int] = None) -> Optional[int]:
+    """Parse an nvidia-smi number such as "24576" or "85.23"; default for "[N/A]" etc."""
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except ValueError:
+            return default
+
+def _csv_rows(output: str) -> List[List[str]]:
+    """Split nvidia-smi --format=csv,noheader output into stripped, non-empty rows"""
+    return [
+        [field.strip() for field in row]
+        for row in csv.reader(io.StringIO(output), skipinitialspace=True)
+        if row
+    ]
+
 class GPUDetector:
     """Detects and monitors GPU devices"""
     
     def __init__(self):
         self.system = platform.system().lower()
         self.gpus: List[GPUInfo] = []
+        self._detected_at: Optional[float] = None
+        self._status_updated_at: Optional[float] = None
+        # Fixed for the lifetime of the process, so queried at most once
+        self._cuda_version = _NOT_QUERIED
+        self._system_memory: Optional[int] = None
+        # NVML device handles by GPU index, when NVML could be initialized
+        self._nvml_handles: Dict[int, Any] = {}
+        self._nvml_ready = self._init_nvml()
     
-    async def detect_gpus(self) -> List[GPUInfo]:
-        """Detect all available GPUs"""
-        self.gpus = []
+    def _init_nvml(self) -> bool:
+        """Initialize NVML; False falls back to parsing nvidia-smi output"""
+        if not PYNVML_AVAILABLE:
+            return False
+        try:
+            pynvml.nvmlInit()
+            return True
+        except pynvml.NVMLError:
+            return False
+    
+    @staticmethod
+    def _nvml_str(value) -> str:
+        # Older pynvml releases return bytes
+        return value.decode() if isinstance(value, bytes) else value
+    
+    def _read_nvml_status(self, gpu: GPUInfo, handle):
+        """Fill in the volatile fields of a GPU from NVML"""
+        memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+        gpu.memory_used = memory.used // (1024 * 1024)
+        gpu.memory_free = gpu.memory_total - gpu.memory_used
+        try:
+            gpu.utilization = pynvml.nvmlDeviceGetUtilizationRates(handle).gpu
+        except pynvml.NVMLError:
+            pass
+        try:
+            gpu.temperature = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
+        except pynvml.NVMLError:
+            pass
+        try:
+            gpu.power_usage = pynvml.nvmlDeviceGetPowerUsage(handle) // 1000  # mW -> W
+        except pynvml.NVMLError:
+            pass
+    
+    def _detect_nvml_gpus(self) -> List[GPUInfo]:
+        """Detect NVIDIA GPUs through NVML"""
+        gpus = []
+        driver_version = self._nvml_str(pynvml.nvmlSystemGetDriverVersion())
+        cuda_driver_version = pynvml.nvmlSystemGetCudaDriverVersion()  # e.g. 12020
+        self._cuda_version = f"{cuda_driver_version // 1000}.{cuda_driver_version % 1000 // 10}"
+        
+        self._nvml_handles = {}
+        for index in range(pynvml.nvmlDeviceGetCount()):
+            handle = pynvml.nvmlDeviceGetHandleByIndex(index)
+            memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            gpu_info = GPUInfo(
+                id=index,
+                name=self._nvml_str(pynvml.nvmlDeviceGetName(handle)),
+                type=GPUType.NVIDIA,
+                memory_total=memory.total // (1024 * 1024),
+                memory_used=0,
+                memory_free=0,
+                utilization=0,
+                driver_version=driver_version,
+                cuda_version=self._cuda_version,
+                is_available=True
+            )
+            self._read_nvml_status(gpu_info, handle)
+            self._nvml_handles[index] = handle
+            gpus.append(gpu_info)
         
-        # Detect NVIDIA GPUs
-        nvidia_gpus = await self._detect_nvidia_gpus()
-        self.gpus.extend(nvidia_gpus)
+        return gpus
+    
+    async def detect_gpus(self) -> List[GPUInfo]:
+        """Detect all available GPUs, reusing a detection younger than DETECT_TTL"""
+        now = time.monotonic()
+        if self._detected_at is not None and now - self._detected_at < DETECT_TTL:
+            return self.gpus
         
-        # Detect AMD GPUs
-        amd_gpus = await self._detect_amd_gpus()
-        self.gpus.extend(amd_gpus)
+        self.gpus = []
         
-        # Detect Intel GPUs
-        intel_gpus = await self._detect_intel_gpus()
-        self.gpus.extend(intel_gpus)
+        # Probe NVIDIA, AMD and Intel GPUs (and system memory) concurrently, so
+        # a missing or slow vendor tool doesn't delay the others
+        *vendor_results, system_memory = await asyncio.gather(
+            self._detect_nvidia_gpus(),
+            self._detect_amd_gpus(),
+            self._detect_intel_gpus(),
+            self._get_system_memory(),
+            return_exceptions=True
+        )
+        for vendor_gpus in vendor_results:
+            if isinstance(vendor_gpus, list):
+                self.gpus.extend(vendor_gpus)
+        if isinstance(system_memory, BaseException):
+            system_memory = 8192  # Default fallback
         
         # Add CPU as fallback
         cpu_info = GPUInfo(
             id=len(self.gpus),
             name="CPU",
             type=GPUType.CPU,
-            memory_total=self._get_system_memory(),
+            memory_total=system_memory,
             memory_used=0,
-            memory_free=self._get_system_memory(),
+            memory_free=system_memory,
             utilization=0,
             is_available=True
         )
         self.gpus.append(cpu_info)
         
+        self._detected_at = self._status_updated_at = time.monotonic()
         return self.gpus
     
     async def _detect_nvidia_gpus(self) -> List[GPUInfo]:
-        """Detect NVIDIA GPUs using nvidia-smi"""
+        """Detect NVIDIA GPUs using NVML, or nvidia-smi when NVML is unavailable"""
+        if self._nvml_ready:
+            try:
+                return self._detect_nvml_gpus()
+            except pynvml.NVMLError:
+                pass
+        
         gpus = []
         
         try:
             # Check if nvidia-smi is available
-            result = subprocess.run(['nvidia-smi', '--query-gpu=index,name,memory.total,memory.used,utilization.gpu,temperature.gpu,power.draw,driver_version', '--format=csv,noheader,nounits'], 
-                                  capture_output=True, text=True, timeout=10)
+            stdout = await _run_command(['nvidia-smi', '--query-gpu=index,name,memory.total,memory.used,utilization.gpu,temperature.gpu,power.draw,driver_version', '--format=csv,noheader,nounits'])
             
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                for line in lines:
-                    if line.strip():
-                        parts = [p.strip() for p in line.split(',')]
-                        if len(parts) >= 7:
-                            gpu_id = int(parts[0])
-                            name = parts[1]
-                            memory_total = int(parts[2]) if parts[2].isdigit() else 0
-                            memory_used = int(parts[3]) if parts[3].isdigit() else 0
-                            utilization = int(parts[4]) if parts[4].isdigit() else 0
-                            temperature = int(parts[5]) if parts[5].isdigit() else None
-                            power_usage = int(float(parts[6])) if parts[6].replace('.', '').isdigit() else None
-                            driver_version = parts[7] if len(parts) > 7 else None
-                            
-                            # Get CUDA version
-                            cuda_version = await self._get_cuda_version()
-                            
-                            gpu_info = GPUInfo(
-                                id=gpu_id,
-                                name=name,
-                                type=GPUType.NVIDIA,
-                                memory_total=memory_total,
-                                memory_used=memory_used,
-                                memory_free=memory_total - memory_used,
-                                utilization=utilization,
-                                temperature=temperature,
-                                power_usage=power_usage,
-                                driver_version=driver_version,
-                                cuda_version=cuda_version,
-                                is_available=True
-                            )
-                            gpus.append(gpu_info)
+            if stdout is not None:
+                # Same for every GPU in the machine
+                cuda_version = await self._get_cuda_version()
+                
+                for parts in _csv_rows(stdout):
+                    gpu_id = _parse_int(parts[0])
+                    if len(parts) < 7 or gpu_id is None:
+                        continue
+                    memory_total = _parse_int(parts[2], 0)
+                    memory_used = _parse_int(parts[3], 0)
+                    
+                    gpu_info = GPUInfo(
+                        id=gpu_id,
+                        name=parts[1],
+                        type=GPUType.NVIDIA,
+                        memory_total=memory_total,
+                        memory_used=memory_used,
+                        memory_free=memory_total - memory_used,
+                        utilization=_parse_int(parts[4], 0),
+                        temperature=_parse_int(parts[5]),
+                        power_usage=_parse_int(parts[6]),
+                        driver_version=parts[7] if len(parts) > 7 else None,
+                        cuda_version=cuda_version,
+                        is_available=True
+                    )
+                    gpus.append(gpu_info)
                             
-        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-            # nvidia-smi not available or failed
+        except csv.Error:
+            # Unexpected nvidia-smi output
             pass
         
         return gpus
@@ -120,12 +254,11 @@ class GPUDetector:
         
         try:
             # Try rocm-smi first (ROCm)
-            result = subprocess.run(['rocm-smi', '--showid', '--showmemuse', '--showtemp', '--showpower'], 
-                                  capture_output=True, text=True, timeout=10)
+            stdout = await _run_command(['rocm-smi', '--showid', '--showmemuse', '--showtemp', '--showpower'])
             
-            if result.returncode == 0:
+            if stdout is not None:
                 # Parse rocm-smi output (simplified)
-                lines = result.stdout.strip().split('\n')
+                lines = stdout.strip().split('\n')
                 gpu_id = 0
                 for line in lines:
                     if 'GPU' in line and 'Memory' in line:
@@ -143,8 +276,8 @@ class GPUDetector:
                         gpus.append(gpu_info)
                         gpu_id += 1
                         
-        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-            # rocm-smi not available or failed
+        except ValueError:
+            # Unexpected rocm-smi output
             pass
         
         return gpus
@@ -157,9 +290,8 @@ class GPUDetector:
             # Check for Intel GPU info (simplified)
             if self.system == "linux":
                 # Check /sys/class/drm for Intel GPUs
-                result = subprocess.run(['ls', '/sys/class/drm'], capture_output=True, text=True)
-                if result.returncode == 0:
-                    drm_devices = result.stdout.strip().split('\n')
+                drm_devices = await asyncio.to_thread(os.listdir, '/sys/class/drm')
+                if drm_devices:
                     intel_gpus_found = [d for d in drm_devices if 'card' in d and 'render' not in d]
                     
                     for i, device in enumerate(intel_gpus_found):
@@ -175,65 +307,99 @@ class GPUDetector:
                         )
                         gpus.append(gpu_info)
                         
-        except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
+        except OSError:
             pass
         
         return gpus
     
     async def _get_cuda_version(self) -> Optional[str]:
-        """Get CUDA version"""
-        try:
-            result = subprocess.run(['nvidia-smi', '--query-gpu=driver_version', '--format=csv,noheader'], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                return result.stdout.strip()
-        except:
-            pass
-        return None
+        """Get the CUDA version supported by the driver (queried once)"""
+        if self._cuda_version is _NOT_QUERIED:
+            # The nvidia-smi banner reports e.g. "CUDA Version: 12.2"
+            stdout = await _run_command(['nvidia-smi'], timeout=5)
+            match = re.search(r"CUDA Version:\s*([\d.]+)", stdout) if stdout else None
+            self._cuda_version = match.group(1) if match else None
+        return self._cuda_version
+    
+    async def _get_system_memory(self) -> int:
+        """Get system memory in MB (read once)"""
+        if self._system_memory is None:
+            self._system_memory = await self._read_system_memory()
+        return self._system_memory
     
-    def _get_system_memory(self) -> int:
-        """Get system memory in MB"""
+    async def _read_system_memory(self) -> int:
+        """Read total system memory in MB from the OS"""
         try:
             if self.system == "linux":
-                with open('/proc/meminfo', 'r') as f:
-                    for line in f:
-                        if line.startswith('MemTotal:'):
-                            return int(line.split()[1]) // 1024  # Convert KB to MB
+                return await asyncio.to_thread(self._read_meminfo)
             elif self.system == "darwin":  # macOS
-                result = subprocess.run(['sysctl', 'hw.memsize'], capture_output=True, text=True)
-                if result.returncode == 0:
-                    mem_bytes = int(result.stdout.split()[1])
+                stdout = await _run_command(['sysctl', 'hw.memsize'])
+                if stdout is not None:
+                    mem_bytes = int(stdout.split()[1])
                     return mem_bytes // (1024 * 1024)  # Convert bytes to MB
         except:
             pass
         return 8192  # Default fallback
     
+    @staticmethod
+    def _read_meminfo() -> int:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024  # Convert KB to MB
+        return 8192  # Default fallback
+    
     async def update_gpu_status(self) -> List[GPUInfo]:
-        """Update GPU status (memory usage, utilization, etc.)"""
+        """Update GPU status (memory usage, utilization, etc.), at most once per STATUS_TTL"""
+        now = time.monotonic()
+        if self._status_updated_at is not None and now - self._status_updated_at < STATUS_TTL:
+            return self.gpus
+        
+        nvidia_gpus = [gpu for gpu in self.gpus if gpu.type == GPUType.NVIDIA]
+        if nvidia_gpus:
+            await self._update_nvidia_status(nvidia_gpus)
+        
         for gpu in self.gpus:
-            if gpu.type == GPUType.NVIDIA:
-                await self._update_nvidia_status(gpu)
-            elif gpu.type == GPUType.AMD:
+            if gpu.type == GPUType.AMD:
                 await self._update_amd_status(gpu)
             elif gpu.type == GPUType.INTEL:
                 await self._update_intel_status(gpu)
         
+        self._status_updated_at = time.monotonic()
         return self.gpus
     
-    async def _update_nvidia_status(self, gpu: GPUInfo):
-        """Update NVIDIA GPU status"""
+    async def _update_nvidia_status(self, gpus: List[GPUInfo]):
+        """Update the status of all NVIDIA GPUs through NVML, or with a single nvidia-smi call"""
+        if self._nvml_handles:
+            try:
+                for gpu in gpus:
+                    handle = self._nvml_handles.get(gpu.id)
+                    if handle is not None:
+                        self._read_nvml_status(gpu, handle)
+                return
+            except pynvml.NVMLError:
+                pass
+        
         try:
-            result = subprocess.run(['nvidia-smi', '--query-gpu=memory.used,utilization.gpu,temperature.gpu,power.draw', '--format=csv,noheader,nounits', f'--id={gpu.id}'], 
-                                  capture_output=True, text=True, timeout=5)
+            stdout = await _run_command(['nvidia-smi', '--query-gpu=index,memory.used,utilization.gpu,temperature.gpu,power.draw', '--format=csv,noheader,nounits'], timeout=5)
+            if stdout is None:
+                return
+            
+            rows = {
+                _parse_int(parts[0]): parts
+                for parts in _csv_rows(stdout)
+                if len(parts) >= 5
+            }
             
-            if result.returncode == 0:
-                parts = [p.strip() for p in result.stdout.strip().split(',')]
-                if len(parts) >= 4:
-                    gpu.memory_used = int(parts[0]) if parts[0].isdigit() else gpu.memory_used
-                    gpu.utilization = int(parts[1]) if parts[1].isdigit() else gpu.utilization
-                    gpu.temperature = int(parts[2]) if parts[2].isdigit() else gpu.temperature
-                    gpu.power_usage = int(float(parts[3])) if parts[3].replace('.', '').isdigit() else gpu.power_usage
-                    gpu.memory_free = gpu.memory_total - gpu.memory_used
+            for gpu in gpus:
+                parts = rows.get(gpu.id)
+                if parts is None:
+                    continue
+                gpu.memory_used = _parse_int(parts[1], gpu.memory_used)
+                gpu.utilization = _parse_int(parts[2], gpu.utilization)
+                gpu.temperature = _parse_int(parts[3], gpu.temperature)
+                gpu.power_usage = _parse_int(parts[4], gpu.power_usage)
+                gpu.memory_free = gpu.memory_total - gpu.memory_used
                     
         except:
             pass
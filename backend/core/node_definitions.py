@@ -0,0 +1,492 @@
+"""
+Node Definitions
+Ports, parameters and categories of every node type. Shared by the node API
+routes and the workflow engine.
+"""
+from typing import Dict, List, Optional
+
+from schemas.schemas import NodeDefinition, NodeType, NodePort, PortType
+
+# Constants for file filters
+VIDEO_FILES_FILTER = {"name": "Video Files", "extensions": ["mp4", "avi", "mov", "mkv", "webm"]}
+ALL_FILES_FILTER = {"name": "All Files", "extensions": ["*"]}
+IMAGE_FILES_FILTER = {"name": "Image Files", "extensions": ["jpg", "jpeg", "png", "bmp", "tiff"]}
+
+# Node definitions for different node types
+NODE_DEFINITIONS: Dict[str, NodeDefinition] = {
+    "video_input": NodeDefinition(
+        id="video_input",
+        type=NodeType.VIDEO_INPUT,
+        name="Video Input",
+        description="Extract frames from video file using DeepFaceLab's VideoEd.py",
+        inputs=[],
+        outputs=[
+            NodePort(id="video_frames", type=PortType.IMAGES, label="Video Frames", required=True)
+        ],
+        parameters={
+            "input_file": {
+                "type": "file-path", 
+                "description": "Path to input video file", 
+                "format": "file-path",
+                "filters": [VIDEO_FILES_FILTER, ALL_FILES_FILTER],
+                "required": True
+            },
+            "output_dir": {
+                "type": "directory-path", 
+                "description": "Directory to save extracted frames", 
+                "format": "directory-path",
+                "required": True
+            },
+            "fps": {
+                "type": "number", 
+                "description": "Frames per second to extract (0 = full fps)", 
+                "default": 0, 
+                "minimum": 0,
+                "maximum": 120
+            },
+            "output_ext": {
+                "type": "select", 
+                "description": "Image format for extracted frames", 
+                "options": ["png", "jpg"], 
+                "default": "png"
+            }
+        },
+        category="Input"
+    ),
+    
+    "extract_faces": NodeDefinition(
+        id="extract_faces",
+        type=NodeType.EXTRACT_FACES,
+        name="Extract Faces",
+        description="Extract faces from video or images using S3FD or manual detection",
+        inputs=[
+            NodePort(id="video", type=PortType.VIDEO, label="Video", required=True),
+            NodePort(id="images", type=PortType.IMAGES, label="Images", required=False)
+        ],
+        outputs=[
+            NodePort(id="faces", type=PortType.FACES, label="Extracted Faces", required=True)
+        ],
+        parameters={
+            "detector": {
+                "type": "select", 
+                "options": ["s3fd", "manual"], 
+                "default": "s3fd",
+                "description": "Face detection method"
+            },
+            "face_type": {
+                "type": "select", 
+                "options": ["half_face", "full_face", "whole_face", "head"], 
+                "default": "full_face",
+                "description": "Type of face region to extract"
+            },
+            "image_size": {
+                "type": "number", 
+                "default": 512, 
+                "min": 64, 
+                "max": 1024,
+                "description": "Size of extracted face images"
+            },
+            "jpeg_quality": {
+                "type": "number", 
+                "default": 90, 
+                "min": 1, 
+                "max": 100,
+                "description": "JPEG compression quality"
+            },
+            "max_faces_from_image": {
+                "type": "number", 
+                "default": 1, 
+                "min": 1, 
+                "max": 10,
+                "description": "Maximum faces to extract per image"
+            },
+            "output_debug": {
+                "type": "boolean", 
+                "default": False,
+                "description": "Save debug images with face detection overlays"
+            },
+            "gpu_idx": {
+                "type": "gpu", 
+                "description": "GPU device to use for face extraction", 
+                "default": 0
+            }
+        },
+        category="Processing"
+    ),
+    
+    "train_model": NodeDefinition(
+        id="train_model",
+        type=NodeType.TRAIN_MODEL,
+        name="Train Model",
+        description="Train a face swap model using SAEHD, Quick96, or AMP",
+        inputs=[
+            NodePort(id="src_faces", type=PortType.FACES, label="Source Faces", required=True),
+            NodePort(id="dst_faces", type=PortType.FACES, label="Destination Faces", required=True)
+        ],
+        outputs=[
+            NodePort(id="model", type=PortType.MODEL, label="Trained Model", required=True)
+        ],
+        parameters={
+            "model_type": {
+                "type": "select", 
+                "options": ["SAEHD", "Quick96", "AMP"], 
+                "default": "SAEHD",
+                "description": "Model architecture to use for training"
+            },
+            "batch_size": {
+                "type": "number", 
+                "default": 4, 
+                "min": 1, 
+                "max": 32,
+                "description": "Training batch size"
+            },
+            "resolution": {
+                "type": "number", 
+                "default": 256, 
+                "min": 64, 
+                "max": 1024,
+                "description": "Model resolution"
+            },
+            "target_iter": {
+                "type": "number", 
+                "default": 100000, 
+                "min": 1000,
+                "description": "Target number of training iterations"
+            },
+            "save_interval": {
+                "type": "number", 
+                "default": 25, 
+                "min": 1,
+                "description": "Save model every N iterations"
+            },
+            "preview": {
+                "type": "boolean", 
+                "default": True,
+                "description": "Show training preview"
+            },
+            "gpu_idx": {
+                "type": "gpu", 
+                "description": "GPU device to use for training", 
+                "default": 0
+            },
+            "pretrained_model": {
+                "type": "file-path", 
+                "description": "Path to pretrained model (optional)",
+                "format": "file-path",
+                "filters": [{"name": "Model Files", "extensions": ["pth", "pt", "h5"]}, {"name": "All Files", "extensions": ["*"]}],
+                "required": False
+            }
+        },
+        category="Processing"
+    ),
+    
+    "merge_faces": NodeDefinition(
+        id="merge_faces",
+        type=NodeType.MERGE_FACES,
+        name="Merge Faces",
+        description="Merge trained model with destination video/images",
+        inputs=[
+            NodePort(id="model", type=PortType.MODEL, label="Trained Model", required=True),
+            NodePort(id="dst_video", type=PortType.VIDEO, label="Destination Video", required=True),
+            NodePort(id="dst_faces", type=PortType.FACES, label="Destination Faces", required=True),
+            NodePort(id="mask", type=PortType.MASK, label="XSeg Mask", required=False)
+        ],
+        outputs=[
+            NodePort(id="merged_video", type=PortType.VIDEO, label="Merged Video", required=True),
+            NodePort(id="merged_images", type=PortType.IMAGES, label="Merged Images", required=False)
+        ],
+        parameters={
+            "face_enhancer": {
+                "type": "select", 
+                "options": ["none", "GFPGAN", "CodeFormer"], 
+                "default": "none",
+                "description": "Face enhancement method"
+            },
+            "color_transfer": {
+                "type": "select", 
+                "options": ["none", "rct", "lct", "mkl", "idt"], 
+                "default": "none",
+                "description": "Color transfer method"
+            },
+            "erode_mask": {
+                "type": "number", 
+                "default": 0, 
+                "min": 0, 
+                "max": 50,
+                "description": "Erode mask by N pixels"
+            },
+            "blur_mask": {
+                "type": "number", 
+                "default": 0, 
+                "min": 0, 
+                "max": 50,
+                "description": "Blur mask by N pixels"
+            },
+            "output_format": {
+                "type": "select", 
+                "options": ["png", "jpg"], 
+                "default": "png",
+                "description": "Output image format"
+            },
+            "gpu_idx": {
+                "type": "gpu", 
+                "description": "GPU device to use for merging", 
+                "default": 0
+            }
+        },
+        category="Processing"
+    ),
+    
+    "video_output": NodeDefinition(
+        id="video_output",
+        type=NodeType.VIDEO_OUTPUT,
+        name="Video Output",
+        description="Create video from image sequence using DeepFaceLab's VideoEd.py",
+        inputs=[
+            NodePort(id="image_sequence", type=PortType.IMAGES, label="Image Sequence", required=True)
+        ],
+        outputs=[
+            NodePort(id="output_video", type=PortType.VIDEO, label="Output Video", required=True)
+        ],
+        parameters={
+            "input_dir": {
+                "type": "directory-path", 
+                "description": "Directory containing image sequence", 
+                "format": "directory-path",
+                "required": True
+            },
+            "output_file": {
+                "type": "file-path", 
+                "description": "Path for the output video file", 
+                "format": "file-path",
+                "filters": [VIDEO_FILES_FILTER, ALL_FILES_FILTER],
+                "required": True
+            },
+            "reference_file": {
+                "type": "file-path", 
+                "description": "Reference video file for FPS and audio (optional)", 
+                "format": "file-path",
+                "filters": [VIDEO_FILES_FILTER, ALL_FILES_FILTER],
+                "required": False
+            },
+            "ext": {
+                "type": "select", 
+                "description": "Format of input images", 
+                "options": ["png", "jpg"], 
+                "default": "png"
+            },
+            "fps": {
+                "type": "number", 
+                "description": "Output video FPS (overridden by reference file)", 
+                "minimum": 1,
+                "default": 30
+            },
+            "bitrate": {
+                "type": "number", 
+                "description": "Output video bitrate in Megabits", 
+                "minimum": 1,
+                "default": 10
+            },
+            "include_audio": {
+                "type": "boolean", 
+                "description": "Include audio from reference file", 
+                "default": False
+            },
+            "lossless": {
+                "type": "boolean", 
+                "description": "Use lossless codec (PNG)", 
+                "default": False
+            }
+        },
+        category="Output"
+    ),
+    
+    "advanced_face_editor": NodeDefinition(
+        id="advanced_face_editor",
+        type=NodeType.XSEG_EDITOR,  # Reusing the same type for now
+        name="Advanced Face Editor",
+        description="Advanced face editor with auto-detection, model loading, and segment selection",
+        inputs=[
+            NodePort(id="faces", type=PortType.FACES, label="Faces", required=True)
+        ],
+        outputs=[
+            NodePort(id="edited_faces", type=PortType.FACES, label="Edited Faces", required=True)
+        ],
+        parameters={
+            "input_dir": {
+                "type": "directory-path", 
+                "description": "Directory containing face images to edit", 
+                "format": "directory-path",
+                "required": True
+            },
+            "face_type": {
+                "type": "select",
+                "options": ["mouth", "half_face", "midfull_face", "full_face", "whole_face", "head"],
+                "default": "full_face",
+                "description": "Type of face detection to use"
+            },
+            "detection_model": {
+                "type": "select",
+                "options": ["VGGFace2", "OpenCV", "MTCNN"],
+                "default": "VGGFace2",
+                "description": "Face detection model to use"
+            },
+            "similarity_threshold": {
+                "type": "number",
+                "default": 0.6,
+                "min": 0.0,
+                "max": 1.0,
+                "description": "Threshold for grouping similar faces"
+            }
+        },
+        category="Editing"
+    ),
+    
+    "image_resize": NodeDefinition(
+        id="image_resize",
+        type=NodeType.UTILITY,
+        name="Image Resize",
+        description="Resize images to specified dimensions",
+        inputs=[
+            NodePort(id="images", type=PortType.IMAGES, label="Images", required=True)
+        ],
+        outputs=[
+            NodePort(id="resized_images", type=PortType.IMAGES, label="Resized Images", required=True)
+        ],
+        parameters={
+            "input_dir": {
+                "type": "directory-path", 
+                "description": "Directory containing images to resize", 
+                "format": "directory-path",
+                "required": True
+            },
+            "output_dir": {
+                "type": "directory-path", 
+                "description": "Directory to save resized images", 
+                "format": "directory-path",
+                "required": True
+            },
+            "width": {
+                "type": "number", 
+                "description": "Target width in pixels", 
+                "default": 512, 
+                "minimum": 64,
+                "maximum": 4096
+            },
+            "height": {
+                "type": "number", 
+                "description": "Target height in pixels", 
+                "default": 512, 
+                "minimum": 64,
+                "maximum": 4096
+            },
+            "maintain_aspect": {
+                "type": "boolean", 
+                "description": "Maintain aspect ratio", 
+                "default": True
+            }
+        },
+        category="Processing"
+    ),
+    
+    "face_filter": NodeDefinition(
+        id="face_filter",
+        type=NodeType.UTILITY,
+        name="Face Filter",
+        description="Filter faces based on quality, blur, or other criteria",
+        inputs=[
+            NodePort(id="faces", type=PortType.FACES, label="Faces", required=True)
+        ],
+        outputs=[
+            NodePort(id="filtered_faces", type=PortType.FACES, label="Filtered Faces", required=True)
+        ],
+        parameters={
+            "input_dir": {
+                "type": "directory-path", 
+                "description": "Directory containing face images", 
+                "format": "directory-path",
+                "required": True
+            },
+            "output_dir": {
+                "type": "directory-path", 
+                "description": "Directory to save filtered faces", 
+                "format": "directory-path",
+                "required": True
+            },
+            "min_quality": {
+                "type": "number", 
+                "description": "Minimum face quality score", 
+                "default": 0.5, 
+                "minimum": 0.0,
+                "maximum": 1.0
+            },
+            "max_blur": {
+                "type": "number", 
+                "description": "Maximum blur threshold", 
+                "default": 0.3, 
+                "minimum": 0.0,
+                "maximum": 1.0
+            },
+            "min_resolution": {
+                "type": "number", 
+                "description": "Minimum resolution (pixels)", 
+                "default": 64, 
+                "minimum": 32,
+                "maximum": 1024
+            }
+        },
+        category="Processing"
+    ),
+    
+    "batch_rename": NodeDefinition(
+        id="batch_rename",
+        type=NodeType.UTILITY,
+        name="Batch Rename",
+        description="Rename files in a directory with a consistent naming pattern",
+        inputs=[
+            NodePort(id="files", type=PortType.FILES, label="Files", required=True)
+        ],
+        outputs=[
+            NodePort(id="renamed_files", type=PortType.FILES, label="Renamed Files", required=True)
+        ],
+        parameters={
+            "input_dir": {
+                "type": "directory-path", 
+                "description": "Directory containing files to rename", 
+                "format": "directory-path",
+                "required": True
+            },
+            "pattern": {
+                "type": "string", 
+                "description": "Naming pattern (e.g., 'face_{index:04d}.jpg')", 
+                "default": "face_{index:04d}.jpg",
+                "required": True
+            },
+            "start_index": {
+                "type": "number", 
+                "description": "Starting index number", 
+                "default": 1, 
+                "minimum": 0
+            },
+            "file_extensions": {
+                "type": "string", 
+                "description": "File extensions to process (comma-separated)", 
+                "default": "jpg,jpeg,png,bmp"
+            }
+        },
+        category="Processing"
+    )
+}
+
+# Node types renamed since workflows were first saved
+LEGACY_NODE_TYPES: Dict[str, str] = {"xseg_editor": "advanced_face_editor"}
+
+
+def list_node_definitions() -> List[NodeDefinition]:
+    """Get all available node definitions"""
+    return list(NODE_DEFINITIONS.values())
+
+
+def find_node_definition(node_type: str) -> Optional[NodeDefinition]:
+    """Get the definition of a node type, following legacy type names; None if unknown"""
+    return NODE_DEFINITIONS.get(LEGACY_NODE_TYPES.get(node_type, node_type))
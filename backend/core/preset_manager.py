@@ -1,13 +1,36 @@
+import asyncio
 import json
 import os
-from typing import List, Dict, Any, Optional
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 
+import orjson
+from pydantic import TypeAdapter, ValidationError
+
 from schemas.schemas import NodePreset, NodeType
 
+# Optional streaming JSON parser (ijson) - import large preset dumps one item at
+# a time instead of parsing the whole file into memory
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Validates a whole presets file in one pass inside pydantic-core
+_PRESETS_ADAPTER = TypeAdapter(List[NodePreset])
+
+# Words indexed for prefix search
+_WORD_RE = re.compile(r"\w+")
+
 class PresetManager:
-    def __init__(self, workspace_path: str = None):
+    def __init__(self, workspace_path: str = None, flush_delay: float = 0.5):
         if workspace_path is None:
             # Default to current working directory + workspace
             workspace_path = Path.cwd() / "workspace"
@@ -15,6 +38,31 @@ class PresetManager:
         self.workspace_path = Path(workspace_path)
         self.presets_dir = self.workspace_path / "presets"
         self.presets_file = self.presets_dir / "presets.json"
+        self.flush_delay = flush_delay
+        
+        # Serializes writers sharing the temp file used for atomic replaces
+        self._write_lock = threading.Lock()
+        
+        # Validated presets, reused until the file changes on disk
+        self._presets: Dict[str, NodePreset] = {}
+        # Lowercased "name\0description" per preset id, for search_presets
+        self._search_text: Dict[str, str] = {}
+        # Sorted words, word -> preset ids, and preset id -> list position;
+        # built on the first prefix search after the cached presets change
+        self._prefix_index: Optional[Tuple[List[str], Dict[str, List[str]], Dict[str, int]]] = None
+        self._cache_valid = False
+        self._cache_key: Optional[Tuple[int, int]] = None
+        self._file_bytes = b"[]"
+        # Raw dicts (including invalid entries) so writes round-trip the whole
+        # file; only parsed when a preset is modified
+        self._raw_presets: Optional[List[Dict[str, Any]]] = None
+        # Position of each preset id in _raw_presets
+        self._id_index: Dict[str, int] = {}
+        
+        # Mutations are written back once per flush window, like workflows
+        self._dirty = False
+        self._flushing = False
+        self._flush_task: Optional[asyncio.Task] = None
         
         # Ensure presets directory exists
         self.presets_dir.mkdir(parents=True, exist_ok=True)
@@ -26,32 +74,188 @@ class PresetManager:
     def _load_presets_from_file(self) -> List[Dict[str, Any]]:
         """Load presets from JSON file"""
         try:
-            with open(self.presets_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.presets_file, 'rb') as f:
+                return orjson.loads(f.read())
         except (FileNotFoundError, json.JSONDecodeError):
             return []
     
-    def _save_presets_to_file(self, presets: List[Dict[str, Any]]) -> None:
-        """Save presets to JSON file"""
+    def _save_presets_to_file(self, presets: List[Dict[str, Any]]) -> bytes:
+        """Save presets to JSON file, returning the bytes written.
+        
+        The store is written compact since it is read far more often than it
+        is edited by hand; export_presets writes the indented form.
+        """
         try:
-            with open(self.presets_file, 'w', encoding='utf-8') as f:
-                json.dump(presets, f, indent=2, ensure_ascii=False)
+            data = orjson.dumps(presets)
+            self._write_presets_file(data)
+            return data
         except Exception as e:
             raise Exception(f"Failed to save presets to file: {str(e)}")
     
-    async def save_preset(self, preset: NodePreset) -> NodePreset:
+    def _write_presets_file(self, data: bytes) -> None:
+        """Atomically replace the presets file, so readers never see a partial write"""
+        tmp_file = self.presets_file.with_suffix(".json.tmp")
+        with self._write_lock:
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.presets_file)
+    
+    def _file_key(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size of the presets file, None if it is missing"""
+        try:
+            stat = os.stat(self.presets_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _refresh_cache(self) -> None:
+        """Reload and validate presets if the file changed since they were cached"""
+        if self._cache_valid and (self._dirty or self._flushing):
+            # Unflushed changes in memory are newer than the file
+            return
+        key = self._file_key()
+        if self._cache_valid and key == self._cache_key:
+            return
+        
+        try:
+            with open(self.presets_file, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b"[]"
+        
+        try:
+            presets = {preset.id: preset for preset in _PRESETS_ADAPTER.validate_json(data)}
+        except ValidationError:
+            # Slow path: validate one by one so a bad entry only skips itself
+            presets = {}
+            for preset_data in self._parse_raw(data):
+                try:
+                    preset = NodePreset(**preset_data)
+                except Exception as e:
+                    print(f"Warning: Skipping invalid preset {preset_data.get('id', 'unknown')}: {e}")
+                    continue
+                presets[preset.id] = preset
+        
+        self._presets = {}
+        self._search_text = {}
+        for preset in presets.values():
+            self._cache_preset(preset)
+        self._file_bytes = data
+        self._raw_presets = None
+        self._cache_key = key
+        self._cache_valid = True
+    
+    def _cache_preset(self, preset: NodePreset) -> None:
+        """Add or replace a validated preset in the cache"""
+        self._presets[preset.id] = preset
+        self._search_text[preset.id] = f"{preset.name}\0{preset.description or ''}".lower()
+        self._prefix_index = None
+    
+    def _uncache_preset(self, preset_id: str) -> None:
+        self._presets.pop(preset_id, None)
+        self._search_text.pop(preset_id, None)
+        self._prefix_index = None
+    
+    def _get_prefix_index(self) -> Tuple[List[str], Dict[str, List[str]], Dict[str, int]]:
+        if self._prefix_index is None:
+            postings: Dict[str, List[str]] = {}
+            positions: Dict[str, int] = {}
+            for position, (preset_id, text) in enumerate(self._search_text.items()):
+                positions[preset_id] = position
+                for word in set(_WORD_RE.findall(text)):
+                    postings.setdefault(word, []).append(preset_id)
+            self._prefix_index = (sorted(postings), postings, positions)
+        return self._prefix_index
+    
+    @staticmethod
+    def _parse_raw(data: bytes) -> List[Dict[str, Any]]:
+        try:
+            raw_presets = orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return []
+        if not isinstance(raw_presets, list):
+            return []
+        return [preset_data for preset_data in raw_presets if isinstance(preset_data, dict)]
+    
+    def _editable_presets(self) -> List[Dict[str, Any]]:
+        """Raw preset dicts of the current file, for modification"""
+        self._refresh_cache()
+        if self._raw_presets is None:
+            self._raw_presets = self._parse_raw(self._file_bytes)
+            self._reindex()
+        return self._raw_presets
+    
+    def _reindex(self) -> None:
+        """Rebuild the id -> position map; the first entry wins for duplicate ids"""
+        self._id_index = {}
+        for i, preset_data in enumerate(self._raw_presets):
+            self._id_index.setdefault(preset_data.get('id'), i)
+    
+    def _write_cache(self) -> None:
+        """Record that the raw presets changed and schedule a coalesced write"""
+        self._dirty = True
+        if self._flush_task is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. scripts and tests): write through
+            self._write_now()
+            return
+        self._flush_task = loop.create_task(self._flush_later())
+    
+    def _write_now(self) -> None:
+        try:
+            data = self._save_presets_to_file(self._raw_presets)
+        except Exception:
+            # The file may not match the cache any more; reload on next access
+            self._cache_valid = False
+            raise
+        finally:
+            self._dirty = False
+        self._file_bytes = data
+        self._cache_key = self._file_key()
+    
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        await self.flush()
+    
+    async def flush(self) -> None:
+        """Persist pending preset changes now"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if not self._dirty:
+            return
+        
+        data = orjson.dumps(self._raw_presets)
+        self._dirty = False
+        self._flushing = True
+        try:
+            await asyncio.to_thread(self._write_presets_file, data)
+        except Exception:
+            self._dirty = True
+            raise
+        finally:
+            self._flushing = False
+        
+        if not self._dirty:
+            self._file_bytes = data
+            self._cache_key = self._file_key()
+    
+    def save_preset(self, preset: NodePreset) -> NodePreset:
         """Save a preset"""
-        presets = self._load_presets_from_file()
+        presets = self._editable_presets()
         
         # Convert preset to dict
         preset_dict = preset.dict()
         
         # Check if preset already exists
-        existing_index = None
-        for i, existing_preset in enumerate(presets):
-            if existing_preset.get('id') == preset.id:
-                existing_index = i
-                break
+        existing_index = self._id_index.get(preset.id)
         
         if existing_index is not None:
             # Update existing preset
@@ -59,76 +263,69 @@ class PresetManager:
         else:
             # Add new preset
             presets.append(preset_dict)
+            self._id_index[preset.id] = len(presets) - 1
         
         # Save to file
-        self._save_presets_to_file(presets)
+        self._write_cache()
+        self._cache_preset(preset)
         
         return preset
     
-    async def list_presets(self) -> List[NodePreset]:
+    def list_presets(self) -> List[NodePreset]:
         """List all presets"""
-        presets_data = self._load_presets_from_file()
-        presets = []
-        
-        for preset_data in presets_data:
-            try:
-                preset = NodePreset(**preset_data)
-                presets.append(preset)
-            except Exception as e:
-                print(f"Warning: Skipping invalid preset {preset_data.get('id', 'unknown')}: {e}")
-                continue
-        
-        return presets
+        self._refresh_cache()
+        return list(self._presets.values())
     
-    async def get_preset(self, preset_id: str) -> Optional[NodePreset]:
+    def get_preset(self, preset_id: str) -> Optional[NodePreset]:
         """Get a specific preset by ID"""
-        presets = await self.list_presets()
-        
-        for preset in presets:
-            if preset.id == preset_id:
-                return preset
-        
-        return None
+        self._refresh_cache()
+        return self._presets.get(preset_id)
     
-    async def update_preset(self, preset_id: str, updates: Dict[str, Any]) -> Optional[NodePreset]:
+    def update_preset(self, preset_id: str, updates: Dict[str, Any]) -> Optional[NodePreset]:
         """Update a preset"""
-        presets_data = self._load_presets_from_file()
+        self._editable_presets()
+        index = self._id_index.get(preset_id)
+        if index is None:
+            return None
         
-        for i, preset_data in enumerate(presets_data):
-            if preset_data.get('id') == preset_id:
-                # Update the preset data
-                preset_data.update(updates)
-                
-                # Save back to file
-                self._save_presets_to_file(presets_data)
-                
-                # Return updated preset
-                try:
-                    return NodePreset(**preset_data)
-                except Exception as e:
-                    raise Exception(f"Invalid preset data after update: {e}")
+        preset_data = self._raw_presets[index]
+        
+        # Validate before anything is written back
+        try:
+            updated_preset = NodePreset(**{**preset_data, **updates})
+        except Exception as e:
+            raise ValueError(f"Invalid preset data after update: {e}")
+        
+        # Update the preset data
+        preset_data.update(updates)
         
-        return None
+        # Save back to file
+        self._write_cache()
+        self._cache_preset(updated_preset)
+        
+        return updated_preset
     
-    async def delete_preset(self, preset_id: str) -> bool:
+    def delete_preset(self, preset_id: str) -> bool:
         """Delete a preset"""
-        presets_data = self._load_presets_from_file()
+        self._editable_presets()
+        index = self._id_index.get(preset_id)
+        if index is None:
+            return False
         
-        for i, preset_data in enumerate(presets_data):
-            if preset_data.get('id') == preset_id:
-                # Remove the preset
-                presets_data.pop(i)
-                
-                # Save back to file
-                self._save_presets_to_file(presets_data)
-                
-                return True
+        # Remove the preset; presets keep their file order, so the positions
+        # after it shift down by one
+        self._raw_presets.pop(index)
+        self._reindex()
+        
+        # Save back to file
+        self._write_cache()
+        self._uncache_preset(preset_id)
         
-        return False
+        return True
     
-    async def get_presets_by_type(self, node_type: str) -> List[NodePreset]:
+    def get_presets_by_type(self, node_type: str) -> List[NodePreset]:
         """Get presets filtered by node type"""
-        all_presets = await self.list_presets()
+        all_presets = self.list_presets()
         
         # Validate node type
         try:
@@ -141,22 +338,36 @@ class PresetManager:
         
         return filtered_presets
     
-    async def search_presets(self, query: str) -> List[NodePreset]:
+    def search_presets(self, query: str) -> List[NodePreset]:
         """Search presets by name or description"""
-        all_presets = await self.list_presets()
+        self._refresh_cache()
         query_lower = query.lower()
         
-        matching_presets = []
-        for preset in all_presets:
-            if (query_lower in preset.name.lower() or 
-                (preset.description and query_lower in preset.description.lower())):
-                matching_presets.append(preset)
+        # Match against the text lowercased once when the preset was cached
+        return [
+            self._presets[preset_id]
+            for preset_id, text in self._search_text.items()
+            if query_lower in text
+        ]
+    
+    def search_presets_by_prefix(self, prefix: str) -> List[NodePreset]:
+        """Find presets with a word in their name or description starting with prefix"""
+        self._refresh_cache()
+        prefix = prefix.lower()
+        words, postings, positions = self._get_prefix_index()
+        
+        # Words sharing the prefix are adjacent in sorted order
+        matches = set()
+        for i in range(bisect_left(words, prefix), len(words)):
+            if not words[i].startswith(prefix):
+                break
+            matches.update(postings[words[i]])
         
-        return matching_presets
+        return [self._presets[preset_id] for preset_id in sorted(matches, key=positions.__getitem__)]
     
-    async def get_preset_stats(self) -> Dict[str, Any]:
+    def get_preset_stats(self) -> Dict[str, Any]:
         """Get statistics about presets"""
-        presets = await self.list_presets()
+        presets = self.list_presets()
         
         stats = {
             "total_presets": len(presets),
@@ -170,59 +381,90 @@ class PresetManager:
             return stats
         
         # Count by type
-        for preset in presets:
-            node_type = preset.nodeType
-            stats["presets_by_type"][node_type] = stats["presets_by_type"].get(node_type, 0) + 1
+        stats["presets_by_type"] = dict(Counter(preset.nodeType for preset in presets))
         
-        # Sort by creation date
-        sorted_presets = sorted(presets, key=lambda p: p.created_at)
+        # Select by creation date without sorting every preset
+        by_created = lambda p: p.created_at
+        newest = nlargest(5, presets, key=by_created)
         
-        # Recent presets (last 5)
-        stats["recent_presets"] = sorted_presets[-5:]
+        # Recent presets (last 5, oldest first)
+        stats["recent_presets"] = newest[::-1]
         
         # Oldest and newest
-        stats["oldest_preset"] = sorted_presets[0]
-        stats["newest_preset"] = sorted_presets[-1]
+        stats["oldest_preset"] = min(presets, key=by_created)
+        stats["newest_preset"] = newest[0]
         
         return stats
     
     def export_presets(self, file_path: str) -> None:
         """Export all presets to a file"""
-        presets = self._load_presets_from_file()
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(presets, f, indent=2, ensure_ascii=False)
+        presets = self._editable_presets()
+        
+        # Write one preset at a time rather than building the whole document
+        with open(file_path, 'wb') as f:
+            f.write(b"[")
+            for i, preset_data in enumerate(presets):
+                f.write(b",\n" if i else b"\n")
+                f.write(orjson.dumps(preset_data, option=orjson.OPT_INDENT_2))
+            f.write(b"\n]" if presets else b"]")
+    
+    @staticmethod
+    def _iter_import_file(file_path: str) -> Iterator[Any]:
+        """Yield the items of a JSON list file, streaming them when ijson is installed"""
+        with open(file_path, 'rb') as f:
+            if IJSON_AVAILABLE:
+                yield from ijson.items(f, 'item', use_float=True)
+            else:
+                yield from orjson.loads(f.read())
     
     def import_presets(self, file_path: str) -> int:
         """Import presets from a file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                imported_presets = json.load(f)
+            with open(file_path, 'rb') as f:
+                is_list = f.read(4096).lstrip().startswith(b"[")
         except Exception as e:
             raise Exception(f"Failed to read import file: {e}")
         
-        if not isinstance(imported_presets, list):
+        if not is_list:
             raise Exception("Import file must contain a list of presets")
         
         # Load existing presets
-        existing_presets = self._load_presets_from_file()
+        existing_presets = self._editable_presets()
         existing_ids = {p.get('id') for p in existing_presets}
         
-        # Add imported presets (skip duplicates)
-        added_count = 0
-        for preset_data in imported_presets:
-            if preset_data.get('id') not in existing_ids:
+        # Parse the whole file into a staging list first so a parse error
+        # leaves the stored presets untouched
+        staged: List[Tuple[Dict[str, Any], Optional[NodePreset]]] = []
+        try:
+            for preset_data in self._iter_import_file(file_path):
+                if not isinstance(preset_data, dict) or preset_data.get('id') in existing_ids:
+                    continue
+                
                 # Generate new ID to avoid conflicts
-                preset_data['id'] = f"imported-{datetime.now().strftime('%Y%m%d%H%M%S')}-{added_count}"
+                preset_data['id'] = f"imported-{datetime.now().strftime('%Y%m%d%H%M%S')}-{len(staged)}"
                 preset_data['created_at'] = datetime.now().isoformat()
                 preset_data['updated_at'] = datetime.now().isoformat()
                 
-                existing_presets.append(preset_data)
-                added_count += 1
+                try:
+                    preset = NodePreset(**preset_data)
+                except Exception as e:
+                    print(f"Warning: Skipping invalid preset {preset_data['id']}: {e}")
+                    preset = None
+                staged.append((preset_data, preset))
+        except Exception as e:
+            raise Exception(f"Failed to read import file: {e}")
+        
+        if not staged:
+            return 0
         
-        # Save updated presets
-        self._save_presets_to_file(existing_presets)
+        # Commit the staged presets and save them in one write
+        for preset_data, preset in staged:
+            existing_presets.append(preset_data)
+            self._id_index.setdefault(preset_data['id'], len(existing_presets) - 1)
+            if preset is not None:
+                self._cache_preset(preset)
+        self._write_cache()
         
-        return added_count
+        return len(staged)
 
 
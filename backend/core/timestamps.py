@@ -0,0 +1,19 @@
+import time
+from datetime import datetime
+
+# How long a formatted timestamp is reused. Mutations arriving in the same
+# burst share one value instead of each formatting their own.
+TIMESTAMP_RESOLUTION = 0.001
+
+_last_monotonic = float("-inf")
+_last_iso = ""
+
+
+def now_iso() -> str:
+    """Current local time as an ISO 8601 string, cached for TIMESTAMP_RESOLUTION seconds"""
+    global _last_monotonic, _last_iso
+    t = time.monotonic()
+    if t - _last_monotonic > TIMESTAMP_RESOLUTION:
+        _last_iso = datetime.now().isoformat()
+        _last_monotonic = t
+    return _last_iso
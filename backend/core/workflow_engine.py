@@ -1,10 +1,14 @@
 import asyncio
 import json
-from typing import Dict, List, Any, Optional, Set
+import os
+from typing import Dict, List, Any, Optional, Set, Tuple
 from datetime import datetime
 import uuid
+from collections import defaultdict
 from pathlib import Path
 
+import orjson
+
 from schemas.schemas import Workflow, WorkflowNode, WorkflowEdge, NodeStatus, ExecutionStatus, ProgressUpdate
 from nodes.base_node import BaseNode
 from nodes.extract_node import ExtractNode
@@ -17,24 +21,70 @@ from nodes.image_resize_node import ImageResizeNode
 from nodes.face_filter_node import FaceFilterNode
 from nodes.batch_rename_node import BatchRenameNode
 from api.websocket import websocket_manager
+from core.node_definitions import NODE_DEFINITIONS
 from core.error_handler import error_handler, handle_execution_error, handle_resource_error, handle_critical_error
 
+# Node implementation for each node type. Node types not listed run as BaseNode.
+NODE_REGISTRY: Dict[str, type] = {
+    "video_input": VideoInputNode,
+    "extract_faces": ExtractNode,
+    "train_model": TrainNode,
+    "merge_faces": MergeNode,
+    "video_output": VideoOutputNode,
+    "xseg_editor": AdvancedFaceEditorNode,
+    "image_resize": ImageResizeNode,
+    "face_filter": FaceFilterNode,
+    "batch_rename": BatchRenameNode,
+}
+
+# Input ports each node type needs connected before it can run
+REQUIRED_INPUTS: Dict[str, List[str]] = {
+    node_type: [port.id for port in definition.inputs if port.required]
+    for node_type, definition in NODE_DEFINITIONS.items()
+}
+
+# Workflows larger than this are scheduled in a worker thread
+SCHEDULE_IN_THREAD_NODES = 500
+
 class WorkflowEngine:
-    def __init__(self):
+    def __init__(self, workspace_path: str = None):
+        if workspace_path is None:
+            # Default to current working directory + workspace
+            workspace_path = Path.cwd() / "workspace"
+        
+        self.executions_dir = Path(workspace_path) / "executions"
         self.running_executions: Dict[str, Dict[str, Any]] = {}
         self.node_instances: Dict[str, BaseNode] = {}
         self.execution_queue: asyncio.Queue = asyncio.Queue()
         
-    async def execute_workflow(self, workflow_id: str, execution_id: str) -> Dict[str, Any]:
-        """Execute a workflow"""
+    async def execute_workflow(
+        self,
+        workflow_id: str,
+        execution_id: str,
+        resume_state: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Execute a workflow.
+        
+        When resume_state is given, the nodes it lists as completed are not run
+        again and their recorded outputs are carried over.
+        """
         try:
             # Load workflow (in real implementation, this would come from database)
             workflow = await self._load_workflow(workflow_id)
             if not workflow:
                 return {"success": False, "error": "Workflow not found"}
             
+            # Build the graph and its schedule once for validation and execution
+            node_by_id = {node.id: node for node in workflow.nodes}
+            out_adj = self._build_adjacency(workflow)
+            if len(workflow.nodes) > SCHEDULE_IN_THREAD_NODES:
+                # Keep the event loop serving other clients while a large graph is sorted
+                schedule = await asyncio.to_thread(self._build_schedule, workflow, out_adj)
+            else:
+                schedule = self._build_schedule(workflow, out_adj)
+            
             # Validate workflow
-            validation_result = await self._validate_workflow(workflow)
+            validation_result = self._validate_workflow(workflow, schedule)
             if not validation_result["valid"]:
                 return {"success": False, "error": f"Workflow validation failed: {validation_result['error']}"}
             
@@ -48,21 +98,32 @@ class WorkflowEngine:
                 "started_at": datetime.now().isoformat(),
                 "nodes_completed": set(),
                 "nodes_failed": set(),
+                "node_outputs": {},
                 "workflow": workflow
             }
+            if resume_state:
+                # Only carry over nodes that still exist in the workflow
+                execution_context["nodes_completed"] = set(resume_state.get("nodes_completed", [])) & node_by_id.keys()
+                execution_context["node_outputs"] = {
+                    node_id: output for node_id, output in resume_state.get("node_outputs", {}).items()
+                    if node_id in execution_context["nodes_completed"]
+                }
             
             self.running_executions[execution_id] = execution_context
             
             # Execute workflow nodes in parallel where possible
-            await self._execute_workflow_parallel(workflow, execution_context)
+            await self._execute_workflow_parallel(workflow, execution_context, node_by_id, out_adj)
             
             # Finalize execution
             if execution_context["nodes_failed"]:
                 execution_context["status"] = ExecutionStatus.ERROR
+                await self._save_execution_state(execution_context)
                 return {"success": False, "error": f"Execution failed at node: {list(execution_context['nodes_failed'])[0]}"}
             else:
                 execution_context["status"] = ExecutionStatus.COMPLETED
                 execution_context["completed_at"] = datetime.now().isoformat()
+                # Nothing left to resume, so the state file is not kept
+                await self._delete_execution_state(execution_id)
                 return {"success": True, "message": "Workflow completed successfully"}
                 
         except Exception as e:
@@ -87,33 +148,74 @@ class WorkflowEngine:
                 })
     
     async def resume_execution(self, execution_id: str) -> Dict[str, Any]:
-        """Resume a paused execution"""
-        if execution_id not in self.running_executions:
-            return {"success": False, "error": "Execution not found"}
-        
-        execution_context = self.running_executions[execution_id]
-        execution_context["status"] = ExecutionStatus.RUNNING
-        
-        # Resume from where we left off
-        workflow = execution_context["workflow"]
-        execution_order = await self._get_execution_order(workflow)
-        
-        # Find the next node to execute
-        completed_nodes = execution_context["nodes_completed"]
-        next_node_id = None
-        
-        for node_id in execution_order:
-            if node_id not in completed_nodes and node_id not in execution_context["nodes_failed"]:
-                next_node_id = node_id
-                break
+        """Resume a paused or failed execution, skipping nodes that already completed"""
+        execution_context = self.running_executions.get(execution_id)
+        if execution_context is not None:
+            execution_context["status"] = ExecutionStatus.RUNNING
+            state = self._serialize_execution_state(execution_context)
+        else:
+            # Fall back to the state persisted by an earlier run
+            state = await asyncio.to_thread(self._read_execution_state, execution_id)
+            if state is None:
+                return {"success": False, "error": "Execution not found"}
         
-        if not next_node_id:
+        if state["status"] == ExecutionStatus.COMPLETED:
             return {"success": True, "message": "No more nodes to execute"}
         
-        # Continue execution from the next node
-        # This is a simplified implementation - in practice, you'd need to handle
-        # the partial execution state more carefully
-        return await self.execute_workflow(execution_context["workflow_id"], execution_id)
+        # Continue execution with the completed nodes pre-populated
+        return await self.execute_workflow(state["workflow_id"], execution_id, resume_state=state)
+    
+    def _execution_state_file(self, execution_id: str) -> Path:
+        return self.executions_dir / f"{execution_id}.json"
+    
+    @staticmethod
+    def _serialize_execution_state(execution_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the JSON-safe part of an execution context needed to resume it"""
+        return {
+            "execution_id": execution_context["execution_id"],
+            "workflow_id": execution_context.get("workflow_id"),
+            "status": execution_context["status"],
+            "nodes_completed": sorted(execution_context["nodes_completed"]),
+            "node_outputs": execution_context.get("node_outputs", {}),
+            "updated_at": datetime.now().isoformat()
+        }
+    
+    def _write_execution_state(self, execution_id: str, data: bytes) -> None:
+        """Atomically replace an execution's state file"""
+        self.executions_dir.mkdir(parents=True, exist_ok=True)
+        state_file = self._execution_state_file(execution_id)
+        tmp_file = state_file.with_suffix(".json.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, state_file)
+    
+    def _read_execution_state(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """Load an execution's persisted state, or None if there is none"""
+        try:
+            with open(self._execution_state_file(execution_id), 'rb') as f:
+                return orjson.loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+    
+    async def _save_execution_state(self, execution_context: Dict[str, Any]) -> None:
+        """Persist completed nodes and their outputs so the execution can be resumed.
+        
+        Kept for failed, stopped and interrupted runs; removed once a run completes.
+        """
+        state = self._serialize_execution_state(execution_context)
+        # Node results may hold values JSON can't represent; store them as strings
+        data = orjson.dumps(state, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        try:
+            await asyncio.to_thread(self._write_execution_state, execution_context["execution_id"], data)
+        except OSError as e:
+            print(f"Warning: Could not save execution state for {execution_context['execution_id']}: {e}")
+    
+    async def _delete_execution_state(self, execution_id: str) -> None:
+        """Remove the persisted state of an execution that completed"""
+        try:
+            await asyncio.to_thread(self._execution_state_file(execution_id).unlink, missing_ok=True)
+        except OSError as e:
+            print(f"Warning: Could not remove execution state for {execution_id}: {e}")
     
     async def execute_single_node(self, node: WorkflowNode, execution_id: str) -> Dict[str, Any]:
         """Execute a single node without requiring a full workflow"""
@@ -180,17 +282,24 @@ class WorkflowEngine:
         # For now, return None to indicate workflow not found
         return None
     
-    async def _validate_workflow(self, workflow: Workflow) -> Dict[str, Any]:
+    def _validate_workflow(self, workflow: Workflow, schedule: Optional[Tuple[List[List[str]], bool]] = None) -> Dict[str, Any]:
         """Validate workflow structure and connections"""
         try:
+            if schedule is None:
+                schedule = self._build_schedule(workflow)
+            
             # Check for cycles
-            if await self._has_cycles(workflow):
+            if schedule[1]:
                 return {"valid": False, "error": "Workflow contains cycles"}
             
-            # Check for required inputs
+            # Check for required inputs, fed by an edge or set on the node
+            incoming_by_target: Dict[str, Set[str]] = defaultdict(set)
+            for edge in workflow.edges:
+                incoming_by_target[edge.target].add(edge.targetHandle)
+            
             for node in workflow.nodes:
-                for input_port in node.inputs:
-                    if input_port not in node.inputs:
+                for input_port in REQUIRED_INPUTS.get(node.type, ()):
+                    if input_port not in incoming_by_target[node.id] and input_port not in node.inputs:
                         return {"valid": False, "error": f"Node {node.id} missing required input {input_port}"}
             
             return {"valid": True}
@@ -198,109 +307,112 @@ class WorkflowEngine:
         except Exception as e:
             return {"valid": False, "error": str(e)}
     
-    async def _get_execution_order(self, workflow: Workflow) -> List[str]:
+    def _get_execution_order(self, workflow: Workflow) -> List[str]:
         """Get topological order of nodes for execution"""
-        # Build adjacency list
-        graph = {node.id: [] for node in workflow.nodes}
-        in_degree = {node.id: 0 for node in workflow.nodes}
-        
+        layers, _ = self._build_schedule(workflow)
+        return [node_id for layer in layers for node_id in layer]
+    
+    @staticmethod
+    def _build_adjacency(workflow: Workflow) -> Dict[str, List[str]]:
+        """Map each node id to the ids of the nodes its outgoing edges lead to"""
+        out_adj: Dict[str, List[str]] = {node.id: [] for node in workflow.nodes}
         for edge in workflow.edges:
-            graph[edge.source].append(edge.target)
-            in_degree[edge.target] += 1
+            # Edges to or from missing nodes can't affect scheduling
+            if edge.source in out_adj and edge.target in out_adj:
+                out_adj[edge.source].append(edge.target)
+        return out_adj
+    
+    def _build_schedule(self, workflow: Workflow, out_adj: Optional[Dict[str, List[str]]] = None) -> Tuple[List[List[str]], bool]:
+        """Group nodes into dependency layers with Kahn's algorithm.
         
-        # Topological sort using Kahn's algorithm
-        queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
-        result = []
+        Each layer holds the nodes whose sources are all in earlier layers, so
+        a layer's nodes can run in parallel. Also reports whether a cycle left
+        some nodes unscheduled.
+        """
+        if out_adj is None:
+            out_adj = self._build_adjacency(workflow)
         
-        while queue:
-            current = queue.pop(0)
-            result.append(current)
-            
-            for neighbor in graph[current]:
-                in_degree[neighbor] -= 1
-                if in_degree[neighbor] == 0:
-                    queue.append(neighbor)
+        in_degree = {node_id: 0 for node_id in out_adj}
+        for targets in out_adj.values():
+            for target in targets:
+                in_degree[target] += 1
+        
+        layers = []
+        scheduled = 0
+        layer = [node_id for node_id, degree in in_degree.items() if degree == 0]
+        while layer:
+            layers.append(layer)
+            scheduled += len(layer)
+            next_layer = []
+            for node_id in layer:
+                for target in out_adj[node_id]:
+                    in_degree[target] -= 1
+                    if in_degree[target] == 0:
+                        next_layer.append(target)
+            layer = next_layer
         
-        return result
+        return layers, scheduled < len(in_degree)
     
-    async def _has_cycles(self, workflow: Workflow) -> bool:
+    def _has_cycles(self, workflow: Workflow) -> bool:
         """Check if workflow has cycles"""
-        visited = set()
-        rec_stack = set()
-        
-        def dfs(node_id: str) -> bool:
-            visited.add(node_id)
-            rec_stack.add(node_id)
-            
-            # Find outgoing edges
-            for edge in workflow.edges:
-                if edge.source == node_id:
-                    if edge.target in rec_stack:
-                        return True
-                    if edge.target not in visited and dfs(edge.target):
-                        return True
-            
-            rec_stack.remove(node_id)
-            return False
+        return self._build_schedule(workflow)[1]
+    
+    async def _execute_workflow_parallel(
+        self,
+        workflow: Workflow,
+        execution_context: Dict[str, Any],
+        node_by_id: Optional[Dict[str, WorkflowNode]] = None,
+        out_adj: Optional[Dict[str, List[str]]] = None
+    ):
+        """Execute workflow nodes in parallel where possible.
         
-        for node in workflow.nodes:
-            if node.id not in visited:
-                if dfs(node.id):
-                    return True
+        Each node starts as soon as all of its sources have completed, rather
+        than waiting for every node of an earlier dependency layer.
+        """
+        if node_by_id is None:
+            node_by_id = {node.id: node for node in workflow.nodes}
+        if out_adj is None:
+            out_adj = self._build_adjacency(workflow)
+            if self._build_schedule(workflow, out_adj)[1]:
+                raise ValueError("Circular dependency detected or unable to resolve dependencies")
         
-        return False
-    
-    async def _execute_workflow_parallel(self, workflow: Workflow, execution_context: Dict[str, Any]):
-        """Execute workflow nodes in parallel where possible"""
-        # Build dependency graph
-        dependencies = {node.id: set() for node in workflow.nodes}
-        dependents = {node.id: set() for node in workflow.nodes}
+        # Number of sources each node is still waiting on
+        in_degree = {node_id: 0 for node_id in out_adj}
+        for targets in out_adj.values():
+            for target in targets:
+                in_degree[target] += 1
         
-        for edge in workflow.edges:
-            dependencies[edge.target].add(edge.source)
-            dependents[edge.source].add(edge.target)
+        total_nodes = len(workflow.nodes)
+        running: Dict[asyncio.Task, str] = {}
         
-        # Group nodes by dependency level (layers)
-        layers = []
-        remaining_nodes = set(node.id for node in workflow.nodes)
+        def start(node_id: str):
+            task = asyncio.ensure_future(self._execute_node_parallel(node_by_id[node_id], execution_context))
+            running[task] = node_id
         
-        while remaining_nodes:
-            # Find nodes with no remaining dependencies
-            current_layer = []
-            for node_id in remaining_nodes:
-                if not dependencies[node_id] or dependencies[node_id].issubset(execution_context["nodes_completed"]):
-                    current_layer.append(node_id)
-            
-            if not current_layer:
-                # Circular dependency or error
-                raise ValueError("Circular dependency detected or unable to resolve dependencies")
-            
-            layers.append(current_layer)
-            remaining_nodes -= set(current_layer)
+        # Nodes completed by an earlier run are not executed again
+        completed = execution_context["nodes_completed"]
+        for node_id in completed:
+            for target in out_adj[node_id]:
+                in_degree[target] -= 1
         
-        total_nodes = len(workflow.nodes)
+        for node_id, degree in in_degree.items():
+            if degree == 0 and node_id not in completed:
+                start(node_id)
         
-        # Execute each layer in parallel
-        for layer in layers:
-            if execution_context["nodes_failed"]:
-                break  # Stop if any node failed
-                
-            # Execute all nodes in current layer in parallel
-            tasks = []
-            for node_id in layer:
-                node = next((n for n in workflow.nodes if n.id == node_id), None)
-                if node:
-                    task = self._execute_node_parallel(node, execution_context)
-                    tasks.append(task)
-            
-            # Wait for all nodes in this layer to complete
-            if tasks:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
                 
-                # Process results
-                for i, result in enumerate(results):
-                    node_id = layer[i]
-                    node = next((n for n in workflow.nodes if n.id == node_id), None)
+                # Process results, collecting the node updates for one send
+                updates = []
+                ready = []
+                for task in done:
+                    node_id = running.pop(task)
+                    node = node_by_id[node_id]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = e
                     
                     if isinstance(result, Exception):
                         # Node failed
@@ -308,39 +420,57 @@ class WorkflowEngine:
                         node.message = str(result)
                         execution_context["nodes_failed"].add(node_id)
                         
-                        await self._send_node_update(node_id, {
+                        updates.append((node_id, {
                             "status": NodeStatus.ERROR,
                             "progress": 0.0,
                             "message": str(result)
-                        })
+                        }))
                     elif result and result.get("success", False):
                         # Node succeeded
                         node.status = NodeStatus.COMPLETED
                         node.progress = 100.0
                         node.message = "Completed successfully"
                         execution_context["nodes_completed"].add(node_id)
+                        execution_context.setdefault("node_outputs", {})[node_id] = result
                         
-                        await self._send_node_update(node_id, {
+                        updates.append((node_id, {
                             "status": NodeStatus.COMPLETED,
                             "progress": 100.0,
                             "message": "Completed successfully"
-                        })
+                        }))
+                        
+                        # Release the nodes that were only waiting on this one
+                        for target in out_adj[node_id]:
+                            in_degree[target] -= 1
+                            if in_degree[target] == 0:
+                                ready.append(target)
                     else:
                         # Node failed
                         node.status = NodeStatus.ERROR
                         node.message = result.get("error", "Unknown error") if result else "No result"
                         execution_context["nodes_failed"].add(node_id)
                         
-                        await self._send_node_update(node_id, {
+                        updates.append((node_id, {
                             "status": NodeStatus.ERROR,
                             "progress": 0.0,
                             "message": node.message
-                        })
-            
-            # Update overall progress
-            completed_count = len(execution_context["nodes_completed"])
-            execution_context["progress"] = (completed_count / total_nodes) * 100
-            await self._send_execution_update(execution_context)
+                        }))
+                
+                await websocket_manager.send_node_updates(updates)
+                
+                # Update overall progress
+                completed_count = len(execution_context["nodes_completed"])
+                execution_context["progress"] = (completed_count / total_nodes) * 100
+                await self._send_execution_update(execution_context)
+                await self._save_execution_state(execution_context)
+                
+                # Stop starting new nodes once any node failed; running ones finish
+                if not execution_context["nodes_failed"]:
+                    for node_id in ready:
+                        start(node_id)
+        finally:
+            for task in running:
+                task.cancel()
     
     async def _execute_node_parallel(self, node: WorkflowNode, execution_context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a single node (for parallel execution)"""
@@ -378,29 +508,8 @@ class WorkflowEngine:
     
     async def _create_node_instance(self, node: WorkflowNode) -> BaseNode:
         """Create node instance based on node type"""
-        node_type = node.type
-        
-        if node_type == "video_input":
-            return VideoInputNode(node)
-        elif node_type == "extract_faces":
-            return ExtractNode(node)
-        elif node_type == "train_model":
-            return TrainNode(node)
-        elif node_type == "merge_faces":
-            return MergeNode(node)
-        elif node_type == "video_output":
-            return VideoOutputNode(node)
-        elif node_type == "xseg_editor":
-            return AdvancedFaceEditorNode(node)
-        elif node_type == "image_resize":
-            return ImageResizeNode(node)
-        elif node_type == "face_filter":
-            return FaceFilterNode(node)
-        elif node_type == "batch_rename":
-            return BatchRenameNode(node)
-        else:
-            # Default base node for unsupported types
-            return BaseNode(node)
+        # Unsupported types fall back to the base node
+        return NODE_REGISTRY.get(node.type, BaseNode)(node)
     
     async def _send_node_update(self, node_id: str, update_data: Dict[str, Any]):
         """Send node update via WebSocket"""
@@ -416,3 +525,6 @@ class WorkflowEngine:
             "message": f"Progress: {execution_context['progress']:.1f}%"
         }
         await websocket_manager.send_execution_update(update_data)
+
+# Global workflow engine instance
+workflow_engine = WorkflowEngine()
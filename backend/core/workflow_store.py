@@ -0,0 +1,243 @@
+import asyncio
+import itertools
+import json
+import os
+import threading
+import uuid
+from typing import Dict, Iterator, List, Optional, Set
+from pathlib import Path
+
+import orjson
+
+from schemas.schemas import Workflow, WorkflowNode, WorkflowEdge
+
+class WorkflowStore:
+    """In-memory workflow storage with debounced persistence to the workspace.
+
+    Mutations only mark a workflow dirty; serialization happens once per flush
+    window, and only for workflows that changed since the last flush.
+    """
+
+    def __init__(self, workspace_path: str = None, flush_delay: float = 0.5):
+        if workspace_path is None:
+            # Default to current working directory + workspace
+            workspace_path = Path.cwd() / "workspace"
+
+        self.workspace_path = Path(workspace_path)
+        self.workflows_dir = self.workspace_path / "workflows"
+        self.workflows_file = self.workflows_dir / "workflows.json"
+        self.flush_delay = flush_delay
+
+        self._workflows: Dict[str, Workflow] = {}
+        self._serialized: Dict[str, dict] = {}
+        self._dirty: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Flushes run one at a time, so an older snapshot can never be written
+        # over a newer one and writers never share the temporary file
+        self._flush_lock = asyncio.Lock()
+        self._write_lock = threading.Lock()
+
+        # Per-workflow revision numbers, bumped by every mutation. The instance
+        # id keeps revisions from a previous process from matching.
+        self._revisions: Dict[str, int] = {}
+        self._revision_counter = itertools.count(1)
+        self._instance_id = uuid.uuid4().hex[:8]
+
+        # Per-workflow {id: list position} maps, built lazily on first lookup
+        self._node_indexes: Dict[str, Dict[str, int]] = {}
+        self._edge_indexes: Dict[str, Dict[str, int]] = {}
+
+        # Ensure workflows directory exists
+        self.workflows_dir.mkdir(parents=True, exist_ok=True)
+        self._load_workflows_from_file()
+
+    def _load_workflows_from_file(self) -> None:
+        """Load persisted workflows from JSON file"""
+        try:
+            with open(self.workflows_file, 'rb') as f:
+                workflows_data = orjson.loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        for workflow_data in workflows_data:
+            try:
+                workflow = Workflow(**workflow_data)
+            except Exception as e:
+                print(f"Warning: Skipping invalid workflow {workflow_data.get('id', 'unknown')}: {e}")
+                continue
+            self._workflows[workflow.id] = workflow
+            self._serialized[workflow.id] = workflow_data
+
+    def _write_workflows_to_file(self, data: bytes) -> None:
+        """Atomically replace the workflows file"""
+        tmp_file = self.workflows_file.with_suffix(".json.tmp")
+        with self._write_lock:
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.workflows_file)
+
+    def _serialize_dirty(self) -> bytes:
+        """Re-serialize only the workflows that changed since the last flush.
+
+        The dirty set is left as is; it is cleared once the data is written.
+        """
+        for workflow_id in self._dirty:
+            workflow = self._workflows.get(workflow_id)
+            if workflow is None:
+                self._serialized.pop(workflow_id, None)
+            else:
+                self._serialized[workflow_id] = workflow.model_dump(mode="json")
+
+        return orjson.dumps(list(self._serialized.values()), option=orjson.OPT_INDENT_2)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # Changes stay dirty and are retried by the next flush
+            print(f"Warning: Failed to save workflows: {e}")
+
+    async def flush(self) -> None:
+        """Persist pending changes now"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            flushed = {workflow_id: self._revisions.get(workflow_id) for workflow_id in self._dirty}
+            data = self._serialize_dirty()
+            await asyncio.to_thread(self._write_workflows_to_file, data)
+            self._mark_clean(flushed)
+
+    def _mark_clean(self, flushed: Dict[str, Optional[int]]) -> None:
+        """Clear written workflows from the dirty set, keeping any changed since"""
+        for workflow_id, revision in flushed.items():
+            if self._revisions.get(workflow_id) == revision:
+                self._dirty.discard(workflow_id)
+
+    def mark_dirty(self, workflow_id: str) -> None:
+        """Record that a workflow changed and schedule a coalesced flush"""
+        self._revisions[workflow_id] = next(self._revision_counter)
+        self._dirty.add(workflow_id)
+        if self._flush_task is not None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. scripts and tests): write through
+            flushed = {dirty_id: self._revisions.get(dirty_id) for dirty_id in self._dirty}
+            self._write_workflows_to_file(self._serialize_dirty())
+            self._mark_clean(flushed)
+            return
+        self._flush_task = loop.create_task(self._flush_later())
+
+    def revision(self, workflow_id: str) -> str:
+        """Get a token that changes whenever the workflow is mutated"""
+        return f"{self._instance_id}-{self._revisions.get(workflow_id, 0)}"
+
+    def __contains__(self, workflow_id: str) -> bool:
+        return workflow_id in self._workflows
+
+    def __getitem__(self, workflow_id: str) -> Workflow:
+        return self._workflows[workflow_id]
+
+    def __setitem__(self, workflow_id: str, workflow: Workflow) -> None:
+        self._workflows[workflow_id] = workflow
+        self._drop_indexes(workflow_id)
+        self.mark_dirty(workflow_id)
+
+    def __delitem__(self, workflow_id: str) -> None:
+        del self._workflows[workflow_id]
+        self._drop_indexes(workflow_id)
+        self.mark_dirty(workflow_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._workflows)
+
+    def __len__(self) -> int:
+        return len(self._workflows)
+
+    def get(self, workflow_id: str, default: Optional[Workflow] = None) -> Optional[Workflow]:
+        return self._workflows.get(workflow_id, default)
+
+    def values(self) -> List[Workflow]:
+        return list(self._workflows.values())
+
+    def _drop_indexes(self, workflow_id: str) -> None:
+        self._node_indexes.pop(workflow_id, None)
+        self._edge_indexes.pop(workflow_id, None)
+
+    def _node_index(self, workflow_id: str) -> Dict[str, int]:
+        index = self._node_indexes.get(workflow_id)
+        if index is None:
+            index = {node.id: i for i, node in enumerate(self._workflows[workflow_id].nodes)}
+            self._node_indexes[workflow_id] = index
+        return index
+
+    def _edge_index(self, workflow_id: str) -> Dict[str, int]:
+        index = self._edge_indexes.get(workflow_id)
+        if index is None:
+            index = {edge.id: i for i, edge in enumerate(self._workflows[workflow_id].edges)}
+            self._edge_indexes[workflow_id] = index
+        return index
+
+    @staticmethod
+    def _swap_remove(items: list, index: Dict[str, int], item_id: str) -> bool:
+        """Remove an item in O(1) by moving the last item into its slot"""
+        position = index.pop(item_id, None)
+        if position is None:
+            return False
+
+        last = items.pop()
+        if position < len(items):
+            items[position] = last
+            index[last.id] = position
+        return True
+
+    def find_node(self, workflow_id: str, node_id: str) -> Optional[int]:
+        """Get the list position of a node, or None if it is not in the workflow"""
+        return self._node_index(workflow_id).get(node_id)
+
+    def add_node(self, workflow_id: str, node: WorkflowNode) -> None:
+        nodes = self._workflows[workflow_id].nodes
+        index = self._node_index(workflow_id)
+        nodes.append(node)
+        index[node.id] = len(nodes) - 1
+
+    def add_nodes(self, workflow_id: str, nodes: List[WorkflowNode]) -> None:
+        workflow_nodes = self._workflows[workflow_id].nodes
+        index = self._node_index(workflow_id)
+        start = len(workflow_nodes)
+        workflow_nodes.extend(nodes)
+        index.update((node.id, start + i) for i, node in enumerate(nodes))
+
+    def remove_node(self, workflow_id: str, node_id: str) -> bool:
+        """Remove a node and every edge attached to it"""
+        workflow = self._workflows[workflow_id]
+        removed = self._swap_remove(workflow.nodes, self._node_index(workflow_id), node_id)
+
+        if any(e.source == node_id or e.target == node_id for e in workflow.edges):
+            workflow.edges = [e for e in workflow.edges if e.source != node_id and e.target != node_id]
+            self._edge_indexes.pop(workflow_id, None)
+        return removed
+
+    def add_edge(self, workflow_id: str, edge: WorkflowEdge) -> None:
+        edges = self._workflows[workflow_id].edges
+        index = self._edge_index(workflow_id)
+        edges.append(edge)
+        index[edge.id] = len(edges) - 1
+
+    def add_edges(self, workflow_id: str, edges: List[WorkflowEdge]) -> None:
+        workflow_edges = self._workflows[workflow_id].edges
+        index = self._edge_index(workflow_id)
+        start = len(workflow_edges)
+        workflow_edges.extend(edges)
+        index.update((edge.id, start + i) for i, edge in enumerate(edges))
+
+    def remove_edge(self, workflow_id: str, edge_id: str) -> bool:
+        workflow = self._workflows[workflow_id]
+        return self._swap_remove(workflow.edges, self._edge_index(workflow_id), edge_id)
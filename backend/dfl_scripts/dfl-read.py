@@ -3,40 +3,147 @@ from DFLJPG import DFLJPG
 from landmark_utils import *
 from pose import *
 import os
+import functools
+import io
 import pickle
+import queue
+import threading
 from PIL import Image
 import json
+import orjson
 import argparse
 import sys
 import cv2
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # fix for local importing
 file_dir = os.path.dirname(__file__)
 sys.path.append(file_dir)
 
+# optional libjpeg-turbo bindings (PyTurboJPEG) for faster JPEG encoding
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # package or libturbojpeg itself missing
+    _turbo_jpeg = None
 
-def get_file_list(input_dir):
-    """ Return list of images at specified location """
-    result = []
-    extensions = [".jpg", ".png", ".jpeg"]
-    for root, _, files in os.walk(input_dir + '/'):
-        for file in files:
-            if os.path.splitext(file)[1].lower() in extensions:
-                result.append(os.path.join(root, file))
-        break
+# optional nvImageCodec for batched PNG -> JPEG conversion on an NVIDIA GPU
+try:
+    from nvidia import nvimgcodec
+except ImportError:
+    nvimgcodec = None
 
-    return result
+# most files handed to a worker process at a time
+POOL_CHUNKSIZE = 16
 
+# files loaded ahead of the loop consuming them
+PREFETCH_SIZE = 4
 
-def to_JSON(filename, data):
+# bytes of output collected before each write to stdout, when run as a script
+STDOUT_BUFFER_SIZE = 1 << 16
+
+# images decoded/encoded per nvImageCodec call
+GPU_BATCH_SIZE = 32
+
+# face data holds NumPy arrays/scalars, and custom params may have non-str keys
+JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def iter_file_list(input_dir):
+    """ Yield images at specified location, without descending into subfolders """
+    root = input_dir + '/'
+    try:
+        it = os.scandir(root)
+    except OSError:
+        # missing folder, like os.walk
+        return
+    with it:
+        for entry in it:
+            name = entry.name
+            dot = name.rfind('.')
+            if dot < 0 or name[dot:].lower() not in (".jpg", ".png", ".jpeg"):
+                continue
+            if entry.is_file():
+                yield root + name
+
+
+def get_file_list(input_dir):
+    """ Return list of images at specified location """
+    return list(iter_file_list(input_dir))
+
+
+def list_file_names(folder):
+    """ Return the names of the files in a folder, for membership tests
+    without a stat call per lookup """
+    try:
+        with os.scandir(folder) as it:
+            return {entry.name for entry in it if entry.is_file()}
+    except OSError:
+        return set()
+
+
+def _init_worker(initializer, initargs):
+    # one process per core already, cv2's own threads would oversubscribe
+    cv2.setNumThreads(1)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def map_files(func, files, *iterables, initializer=None, initargs=()):
+    """ Run func over files in worker processes, yielding results in file order
+
+    files may be a generator, chunks are dispatched as it is consumed
+    """
+    workers = os.cpu_count() or 1
+    if sys.modules.get(__name__) is None:
+        # loaded from a path without registering the module, workers could not
+        # unpickle its functions; use threads, cv2 and file IO release the GIL
+        if initializer is not None:
+            initializer(*initargs)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(func, files, *iterables)
+        return
+
+    chunksize = POOL_CHUNKSIZE
+    if hasattr(files, '__len__'):
+        # small chunks keep all workers busy on small folders
+        chunksize = max(1, min(POOL_CHUNKSIZE, len(files) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(initializer, initargs)) as executor:
+        yield from executor.map(func, files, *iterables, chunksize=chunksize)
+
+
+def prefetch(files, n=PREFETCH_SIZE):
+    """ Yield (file, load_data(file)) with a reader thread loading up to n files ahead """
+    loaded = queue.Queue(maxsize=n)
+    done = object()
+
+    def reader():
+        try:
+            for file in files:
+                loaded.put((file, load_data(file)))
+        except Exception as e:
+            loaded.put(e)
+        loaded.put(done)
+
+    threading.Thread(target=reader, daemon=True).start()
+    while True:
+        item = loaded.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def face_data_to_dict(filename, data):
     out = dict()
     out['name'] = filename
     # print (data.get_xseg_mask().tostring())
     if os.path.splitext(filename)[-1].lower() in [".jpg", ".jpeg"] and len(data.get_dict()) == 0:
         data = None
 
-    pose = get_pose(filename, data.get_landmarks())
-
     if data is None:
         out['type'] = ''
         out['parentName'] = ''
@@ -51,29 +158,41 @@ def to_JSON(filename, data):
         out['eyebrowsExpand'] = ''
         out['pose'] = ''
     else:
+        landmarks = data.get_landmarks()
+        rect = data.get_source_rect()
+        eyebrows_expand_mod = data.get_eyebrows_expand_mod()
+        custom_params = data.get_custom_params()
+
         out['type'] = data.get_face_type()
         out['parentName'] = data.get_source_filename()
-        out['landmarks'] = [[round(float(sublist[0]), 2), round(
-            float(sublist[1]), 2)] for sublist in data.get_landmarks()]
-        out['sourceLandmarks'] = [[round(float(sublist[0]), 2), round(
-            float(sublist[1]), 2)] for sublist in data.get_source_landmarks()]
-        out['x'] = int(data.get_source_rect()[0])
-        out['y'] = int(data.get_source_rect()[1])
-        out['w'] = int(data.get_source_rect()[2] - data.get_source_rect()[0])
-        out['h'] = int(data.get_source_rect()[3] - data.get_source_rect()[1])
-        out['matrix'] = [item for sublist in data.get_image_to_face_mat()
-                         for item in sublist]
+        out['landmarks'] = round_points(landmarks)
+        out['sourceLandmarks'] = round_points(data.get_source_landmarks())
+        out['x'] = int(rect[0])
+        out['y'] = int(rect[1])
+        out['w'] = int(rect[2] - rect[0])
+        out['h'] = int(rect[3] - rect[1])
+        out['matrix'] = np.ravel(data.get_image_to_face_mat())
         out['iePolys'] = get_ie_polys(data)
-        out['eyebrowsExpand'] = float(data.get_eyebrows_expand_mod(
-        )) if data.get_eyebrows_expand_mod() != None else 1.0
-        out['customParams'] = data.get_custom_params(
-        ) if data.get_custom_params() != None else []
+        out['eyebrowsExpand'] = float(
+            eyebrows_expand_mod) if eyebrows_expand_mod != None else 1.0
+        out['customParams'] = custom_params if custom_params != None else []
         out['xsegMask'] = get_xseg_mask_data(data)
-        out['pose'] = pose
+        out['pose'] = get_pose(filename, landmarks, get_image_size(filename, data))
         # print (data.get_xseg_mask())
-    out_json = json.dumps(out)
+    return out
+
 
-    return out_json
+def to_JSON_bytes(filename, data):
+    return orjson.dumps(face_data_to_dict(filename, data), option=JSON_OPTIONS)
+
+
+def to_JSON(filename, data):
+    return to_JSON_bytes(filename, data).decode()
+
+
+def round_points(points):
+    """ Return an (N, 2) point array rounded to 2 decimals, ready for orjson """
+    return np.round(np.asarray(points, dtype=np.float64), 2)
 
 
 def get_xseg_mask_data(data):
@@ -95,9 +214,20 @@ def get_ie_polys(data):
     return polys_ser
 
 
-def get_pose(image_path, landmarks):
-    im = Image.open(image_path)
-    width, height = im.size
+def get_image_size(image_path, data=None):
+    """ Return (width, height), from the headers parsed by load_data when given """
+    if data is not None:
+        height, width = data.get_shape()[:2]
+        if width > 0 and height > 0:
+            return width, height
+
+    # PIL only reads the header until pixels are accessed
+    with Image.open(image_path) as im:
+        return im.size
+
+
+def get_pose(image_path, landmarks, size=None):
+    width, height = size if size is not None else get_image_size(image_path)
     pose = estimate_pitch_yaw_roll(landmarks, width)
 
     return pose
@@ -106,11 +236,7 @@ def get_pose(image_path, landmarks):
 def serialize_seg_poly_to_array(data):
     polys_list = []
     for poly in data['polys']:
-        poly_points = []
-        for point in poly['pts']:
-            poly_points.append(
-                [round(float(point[0]), 2), round(float(point[1]), 2)])
-        polys_list.append([int(poly['type']), poly_points])
+        polys_list.append([int(poly['type']), round_points(poly['pts'])])
 
     return polys_list
 
@@ -120,14 +246,17 @@ def from_JSON(data):
     return json_data
 
 
+def _load_one(file):
+    return to_JSON_bytes(file, load_data(file))
+
+
 def load_folder_data(image_folder):
-    files = get_file_list(image_folder)
+    files = iter_file_list(image_folder)
 
-    for file in files:
-        out = load_data(file)
-        json_out = to_JSON(file, out)
-        # print (json_out)
-        sys.stdout.write(json_out + '\n')
+    out = sys.stdout.buffer
+    for json_out in map_files(_load_one, files):
+        out.write(json_out)
+        out.write(b'\n')
 
 
 def load_data(file):
@@ -188,18 +317,69 @@ def save_data(image_folder):
                                   image_to_face_mat=dataDic['mat'], landmarks=dataDic['landmarks'], eyebrows_expand_mod=dataDic['eyebrowsExpand'])
 
 
+def _update_parent_to_self_one(file):
+    file_load = load_data(file)
+    if file_load is None:
+        return None
+
+    file_load.embed_and_set(file, source_filename=file, source_landmarks=file_load.get_landmarks(
+    ), source_rect=[0, 0, 256, 256])
+    return file
+
+
 def update_parent_to_self(image_folder):
     files = get_file_list(image_folder)
 
-    for file in files:
-        file_load = load_data(file)
-        if file_load is not None:
-            file_load.embed_and_set(file, source_filename=file, source_landmarks=file_load.get_landmarks(
-            ), source_rect=[0, 0, 256, 256])
+    for file in map_files(_update_parent_to_self_one, files):
+        if file is not None:
             # print (file)
             sys.stdout.write(file + '\n')
 
 
+def resize_matrix(from_size, to_size):
+    """ Return the 3x3 affine cv2.resize applies between (width, height) sizes """
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    # cv2.resize aligns pixel centers, not corners
+    return np.array([[sx, 0, 0.5 * sx - 0.5],
+                     [0, sy, 0.5 * sy - 0.5],
+                     [0, 0, 1]])
+
+
+def compose_affine(a, b, invert_b=False):
+    """ Return the 2x3 affine applying b (or its inverse) and then a,
+    without padding either matrix to 3x3 """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    if invert_b:
+        b = cv2.invertAffineTransform(b)
+    mat = a[:, :2] @ b
+    mat[:, 2] += a[:, 2]
+    return mat
+
+
+def mask_warp_matrix(mask, face_size, mat, to_size, mask_size):
+    """ Fold resize(mask -> face_size), warpAffine(mat -> to_size) and
+    resize(-> mask_size) into one 2x3 matrix for cv2.warpAffine """
+    mask_wh = (mask.shape[1], mask.shape[0])
+    return (resize_matrix(to_size, (mask_size, mask_size))
+            @ np.vstack([mat, [0, 0, 1]])
+            @ resize_matrix(mask_wh, face_size))[:2]
+
+
+def transform_polys(polys, mat):
+    """ Apply an affine to the points of every poly with a single cv2.transform """
+    poly_list = polys.get_polys()
+    pts_list = [poly.get_pts() for poly in poly_list]
+    if sum(len(pts) for pts in pts_list) == 0:
+        return
+
+    all_pts = cv2.transform(np.concatenate(pts_list)[:, None, :], mat)[:, 0, :]
+    offsets = np.cumsum([len(pts) for pts in pts_list])[:-1]
+    for poly, points in zip(poly_list, np.split(all_pts, offsets)):
+        poly.set_points(points)
+
+
 def recalculate_masks(from_img, from_img_size, to_img, to_img_size, mask_size=256):
     from_mat = from_img.get_image_to_face_mat()
     if from_mat is None:
@@ -209,47 +389,87 @@ def recalculate_masks(from_img, from_img_size, to_img, to_img_size, mask_size=25
     if to_mat is None:
         return
 
-    mat = np.matmul(np.vstack([to_mat, [0, 0, 1]]), np.vstack(
-        [cv2.invertAffineTransform(from_mat), [0, 0, 1]]))[:2]
+    mat = compose_affine(to_mat, from_mat, invert_b=True)
     xseg_mask = from_img.get_xseg_mask(dfl_type=True)
     if xseg_mask is not None:
-        xseg_mask = cv2.resize(xseg_mask, from_img_size,
-                               interpolation=cv2.INTER_CUBIC)
-
-        xseg_mask = np.clip(xseg_mask, 0, 1)
+        # resize to the source face, warp to the target face and resize to
+        # mask_size in a single pass
         xseg_mask = cv2.warpAffine(
-            xseg_mask, mat, to_img_size, flags=cv2.INTER_CUBIC)
-        # xseg_mask[xseg_mask < 0.5] = 0
-        # xseg_mask[xseg_mask >= 0.5] = 1
-
-        xseg_mask = cv2.resize(
-            xseg_mask, (mask_size, mask_size), interpolation=cv2.INTER_CUBIC)
-        xseg_mask[xseg_mask < 0.5] = 0
-        xseg_mask[xseg_mask >= 0.5] = 1
+            xseg_mask, mask_warp_matrix(xseg_mask, from_img_size, mat, to_img_size, mask_size),
+            (mask_size, mask_size), flags=cv2.INTER_LINEAR)
+        # stored masks are within [0, 1], so no clip is needed before this
+        xseg_mask = (xseg_mask >= 0.5).astype(np.float32)
         # to_img.set_xseg_mask(xseg_mask)
 
     polys = from_img.get_seg_ie_polys()
     if polys is not None:
         # raw copy from resizer
-        for poly in polys.get_polys():
-            points = poly.get_pts()
-            points = np.expand_dims(points, axis=1)
-            points = cv2.transform(points, mat, points.shape)
-            points = np.squeeze(points)
-
-            poly.set_points(points)
+        transform_polys(polys, mat)
 
         # to_img.set_seg_ie_polys(polys)
 
     # copy landmarks
-    landmarks = from_img.get_landmarks()
-    landmarks = np.expand_dims(landmarks, axis=1)
-    landmarks = cv2.transform(landmarks, mat, landmarks.shape)
-    landmarks = np.squeeze(landmarks)
+    landmarks = np.asarray(from_img.get_landmarks(), dtype=np.float32)
+    landmarks = cv2.transform(landmarks[:, None, :], mat)[:, 0, :]
     # to_img.set_landmarks(points)
 
     return xseg_mask, polys, landmarks
 
+
+# parent lookup of recalculate_copy, set in each worker process
+_from_folders_dict = None
+
+
+def _init_recalculate_copy(from_folders_dict):
+    global _from_folders_dict
+    _from_folders_dict = from_folders_dict
+
+
+def _recalculate_copy_one(file):
+    to_file_data = load_data(file)
+    if to_file_data is None:
+        return None
+
+    parent_filename = to_file_data.get_source_filename()
+    if parent_filename is None:
+        return None
+
+    from_file = _from_folders_dict.get(parent_filename)
+    if from_file is None:
+        return None
+
+    from_file_data = load_data(from_file)
+
+    xseg, polys, landmarks = recalculate_masks(
+        from_file_data, get_image_size(from_file, from_file_data),
+        to_file_data, get_image_size(file, to_file_data))
+
+    # do not change mat
+    type = to_file_data.get_face_type()
+    mat = to_file_data.get_image_to_face_mat()
+
+    # skip 3d landmarks
+    if type == 'head':
+        landmarks = to_file_data.get_landmarks()
+        source_landmarks = to_file_data.get_source_landmarks()
+    else:
+        source_landmarks = from_file_data.get_source_landmarks()
+
+    DFLJPG.embed_data(file,
+                      face_type=type,
+                      source_filename=parent_filename,
+                      source_landmarks=source_landmarks,
+                      landmarks=landmarks,
+                      source_rect=from_file_data.get_source_rect(),
+                      image_to_face_mat=mat,
+                      eyebrows_expand_mod=from_file_data.get_eyebrows_expand_mod(),
+                      seg_ie_polys=polys,
+                      xseg_mask=xseg
+                      )
+
+    return file
+
+
 # copy by parent frame, expecting from folder faces to be single per frame
 
 
@@ -258,8 +478,7 @@ def recalculate_copy(from_folder, to_folder):
     from_folder_files = get_file_list(from_folder)
     from_folders_dict = dict()
 
-    for file in from_folder_files:
-        file_loaded = load_data(file)
+    for file, file_loaded in prefetch(from_folder_files):
         if file_loaded is None:
             continue
 
@@ -275,58 +494,17 @@ def recalculate_copy(from_folder, to_folder):
 
     to_folder_files = get_file_list(to_folder)
 
-    for file in to_folder_files:
-        to_file_data = load_data(file)
-        if to_file_data is None:
-            continue
-
-        parent_filename = to_file_data.get_source_filename()
-        if parent_filename is None:
-            continue
-
-        from_file = from_folders_dict.get(parent_filename)
-        if from_file is None:
-            continue
-
-        from_file_data = load_data(from_file)
-
-        to_file_image = Image.open(file)
-        from_file_img = Image.open(from_file)
-
-        xseg, polys, landmarks = recalculate_masks(
-            from_file_data, from_file_img.size, to_file_data, to_file_image.size)
-
-        # do not change mat
-        type = to_file_data.get_face_type()
-        mat = to_file_data.get_image_to_face_mat()
-
-        # skip 3d landmarks
-        if type == 'head':
-            landmarks = to_file_data.get_landmarks()
-            source_landmarks = to_file_data.get_source_landmarks()
-        else:
-            source_landmarks = from_file_data.get_source_landmarks()
-
-
-        DFLJPG.embed_data(file,
-                          face_type=type,
-                          source_filename=parent_filename,
-                          source_landmarks=source_landmarks,
-                          landmarks=landmarks,
-                          source_rect=from_file_data.get_source_rect(),
-                          image_to_face_mat=mat,
-                          eyebrows_expand_mod=from_file_data.get_eyebrows_expand_mod(),
-                          seg_ie_polys=polys,
-                          xseg_mask=xseg
-                          )
-
-        sys.stdout.write(file + '\n')
+    # workers get the parent lookup once, not with every file
+    for file in map_files(_recalculate_copy_one, to_folder_files,
+                          initializer=_init_recalculate_copy, initargs=(from_folders_dict,)):
+        if file is not None:
+            sys.stdout.write(file + '\n')
 
 
 def recalculate_to_parent_frame(image_folder, child_folder):
     child_folder_files = get_file_list(child_folder)
-    for child_file in child_folder_files:
-        chile_file_data = load_data(child_file)
+    parent_names = list_file_names(image_folder)
+    for child_file, chile_file_data in prefetch(child_folder_files):
         if chile_file_data is None:
             continue
 
@@ -334,18 +512,18 @@ def recalculate_to_parent_frame(image_folder, child_folder):
         if parent_filename is None:
             continue
 
-        parent_file = os.path.join(image_folder, parent_filename)
-        if (os.path.isfile(parent_file) == False):
+        if parent_filename not in parent_names:
             continue
 
+        parent_file = os.path.join(image_folder, parent_filename)
+
         file_load = load_data(parent_file)
         if file_load is None:
             continue
 
         mat_child = chile_file_data.get_image_to_face_mat()
         mat_parent = file_load.get_image_to_face_mat()
-        mat = np.matmul(np.vstack([mat_child, [0, 0, 1]]), np.vstack(
-            [mat_parent, [0, 0, 1]]))[:2]
+        mat = compose_affine(mat_child, mat_parent)
 
         chile_file_data.embed_and_set(child_file,
                                       face_type=chile_file_data.get_face_type(),
@@ -363,177 +541,273 @@ def recalculate_to_parent_frame(image_folder, child_folder):
         sys.stdout.write(child_file + '\n')
 
 
-def copy_to_file(image_folder, copy_folder, only_parent_data=False, recalculate=False):
-    files = get_file_list(image_folder)
-    for file in files:
-        file_load = load_data(file)
-        if file_load is not None:
-            copy_file = os.path.join(copy_folder, os.path.basename(file))
-            pre, ext = os.path.splitext(copy_file)
-            copy_file = pre + '.png'
-            if (os.path.isfile(copy_file) == False):
-                copy_file = pre + '.jpg'
-                if (os.path.isfile(copy_file) == False):
-                    continue
-
-            # recalc landmarks, polys and mask
-            if os.path.splitext(copy_file)[1].lower() in [".jpg", ".jpeg"]:
-                if recalculate:
-                    input_file = Image.open(file)
-                    copy_file_img = Image.open(copy_file)
-
-                    copy_img = load_data(copy_file)
-                    type = copy_img.get_face_type()
-
-                    xseg, polys, landmarks = recalculate_masks(
-                        file_load, input_file.size, copy_img, copy_file_img.size)
-
-                    # skip 3d landmarks
-                    if type == 'head':
-                        landmarks = copy_img.get_landmarks()
-                        source_landmarks = copy_img.get_source_landmarks()
-                    else:
-                        source_landmarks = file_load.get_source_landmarks()
-
-                    # do not change mat
-                    mat = copy_img.get_image_to_face_mat()
+def _find_copy_file(copy_folder, file):
+    """ Return the png or jpg in copy_folder named like file, None if there is none """
+    copy_file = os.path.join(copy_folder, os.path.basename(file))
+    pre, ext = os.path.splitext(copy_file)
+    copy_file = pre + '.png'
+    if (os.path.isfile(copy_file) == False):
+        copy_file = pre + '.jpg'
+        if (os.path.isfile(copy_file) == False):
+            return None
+    return copy_file
+
+
+def _copy_to_file_one(file, copy_file, only_parent_data, recalculate):
+    file_load = load_data(file)
+    if file_load is not None:
+        if copy_file is None:
+            return None
+
+        # recalc landmarks, polys and mask
+        if os.path.splitext(copy_file)[1].lower() in [".jpg", ".jpeg"]:
+            # parsed once, for the recalculation and the parent data update
+            copy_img = load_data(copy_file) if recalculate or only_parent_data else None
+            if recalculate:
+                type = copy_img.get_face_type()
+
+                xseg, polys, landmarks = recalculate_masks(
+                    file_load, get_image_size(file, file_load),
+                    copy_img, get_image_size(copy_file, copy_img))
+
+                # skip 3d landmarks
+                if type == 'head':
+                    landmarks = copy_img.get_landmarks()
+                    source_landmarks = copy_img.get_source_landmarks()
                 else:
-                    landmarks = file_load.get_landmarks()
                     source_landmarks = file_load.get_source_landmarks()
-                    polys = file_load.get_seg_ie_polys()
-                    xseg = file_load.get_xseg_mask(dfl_type=True)
-                    mat = file_load.get_image_to_face_mat()
-                    type = file_load.get_face_type()
-
-                if only_parent_data:
-                    copy_img = load_data(copy_file)
-                    copy_img.embed_and_set(copy_file,
-                                           source_filename=file_load.get_source_filename(),
-                                           source_landmarks=source_landmarks,
-                                           source_rect=file_load.get_source_rect(),
-                                           )
-                else:
-                    DFLJPG.embed_data(copy_file,
-                                      face_type=type,
-                                      source_filename=file_load.get_source_filename(),
-                                      source_landmarks=source_landmarks,
-                                      landmarks=landmarks,
-                                      source_rect=file_load.get_source_rect(),
-                                      image_to_face_mat=mat,
-                                      eyebrows_expand_mod=file_load.get_eyebrows_expand_mod(),
-                                      seg_ie_polys=polys,
-                                      xseg_mask=xseg
-                                      )
+
+                # do not change mat
+                mat = copy_img.get_image_to_face_mat()
             else:
-                if recalculate:  # TODO
-                    print('PNG not supported')
-                    return
-                if only_parent_data:
-                    copy_img = load_data(copy_file)
-                    copy_img.embed_and_set(copy_file,
-                                           source_filename=file_load.get_source_filename(),
-                                           source_landmarks=file_load.get_source_landmarks(),
-                                           source_rect=file_load.get_source_rect(),
-                                           )
-                else:
-                    DFLPNG.embed_data(copy_file,
-                                      face_type=file_load.get_face_type(),
-                                      source_filename=file_load.get_source_filename(),
-                                      source_landmarks=file_load.get_source_landmarks(),
-                                      landmarks=file_load.get_landmarks(),
-                                      source_rect=file_load.get_source_rect(),
-                                      eyebrows_expand_mod=file_load.get_eyebrows_expand_mod(),
-                                      image_to_face_mat=file_load.get_image_to_face_mat()
-                                      )
-        sys.stdout.write(file + '\n')
+                landmarks = file_load.get_landmarks()
+                source_landmarks = file_load.get_source_landmarks()
+                polys = file_load.get_seg_ie_polys()
+                xseg = file_load.get_xseg_mask(dfl_type=True)
+                mat = file_load.get_image_to_face_mat()
+                type = file_load.get_face_type()
+
+            if only_parent_data:
+                copy_img.embed_and_set(copy_file,
+                                       source_filename=file_load.get_source_filename(),
+                                       source_landmarks=source_landmarks,
+                                       source_rect=file_load.get_source_rect(),
+                                       )
+            else:
+                DFLJPG.embed_data(copy_file,
+                                  face_type=type,
+                                  source_filename=file_load.get_source_filename(),
+                                  source_landmarks=source_landmarks,
+                                  landmarks=landmarks,
+                                  source_rect=file_load.get_source_rect(),
+                                  image_to_face_mat=mat,
+                                  eyebrows_expand_mod=file_load.get_eyebrows_expand_mod(),
+                                  seg_ie_polys=polys,
+                                  xseg_mask=xseg
+                                  )
+        else:
+            if only_parent_data:
+                copy_img = load_data(copy_file)
+                copy_img.embed_and_set(copy_file,
+                                       source_filename=file_load.get_source_filename(),
+                                       source_landmarks=file_load.get_source_landmarks(),
+                                       source_rect=file_load.get_source_rect(),
+                                       )
+            else:
+                DFLPNG.embed_data(copy_file,
+                                  face_type=file_load.get_face_type(),
+                                  source_filename=file_load.get_source_filename(),
+                                  source_landmarks=file_load.get_source_landmarks(),
+                                  landmarks=file_load.get_landmarks(),
+                                  source_rect=file_load.get_source_rect(),
+                                  eyebrows_expand_mod=file_load.get_eyebrows_expand_mod(),
+                                  image_to_face_mat=file_load.get_image_to_face_mat()
+                                  )
+    return file
 
 
-def face_reexport_masks(image_folder, copy_folder, mask_size=256, ignore_eye_mouth=False):
-    to_files = get_file_list(copy_folder)
-    for to_file in to_files:
-        to_file_load = load_data(to_file)
-        if to_file_load is None:
-            continue
+def copy_to_file(image_folder, copy_folder, only_parent_data=False, recalculate=False):
+    files = get_file_list(image_folder)
+    copy_files = [_find_copy_file(copy_folder, file) for file in files]
+
+    png_unsupported = False
+    if recalculate:  # TODO
+        # stop before the first png copy, no worker may touch the files after it
+        for i, copy_file in enumerate(copy_files):
+            if copy_file is not None and os.path.splitext(copy_file)[1].lower() not in [".jpg", ".jpeg"]:
+                files, copy_files = files[:i], copy_files[:i]
+                png_unsupported = True
+                break
+
+    copy_one = functools.partial(_copy_to_file_one, only_parent_data=only_parent_data, recalculate=recalculate)
+    for file in map_files(copy_one, files, copy_files):
+        if file is not None:
+            sys.stdout.write(file + '\n')
 
-        parent_name = to_file_load.get_source_filename()
-        if parent_name is None:
-            continue
+    if png_unsupported:
+        print('PNG not supported')
 
-        from_file = os.path.join(image_folder, parent_name)
-        if (os.path.isfile(from_file) == False):
-            continue
 
-        from_file_load = load_data(from_file)
-        if from_file_load is None:
-            continue
+# names of the files in the parent folder, set per worker process
+_parent_names = None
+
+
+def _init_face_reexport_masks(parent_names):
+    global _parent_names
+    _parent_names = parent_names
+
+
+def _face_reexport_masks_one(to_file, image_folder, mask_size, ignore_eye_mouth):
+    to_file_load = load_data(to_file)
+    if to_file_load is None:
+        return None
+
+    parent_name = to_file_load.get_source_filename()
+    if parent_name is None:
+        return None
+
+    if parent_name not in _parent_names:
+        return None
+
+    from_file = os.path.join(image_folder, parent_name)
+
+    from_file_load = load_data(from_file)
+    if from_file_load is None:
+        return None
+
+    to_size = get_image_size(to_file, to_file_load)
+    from_size = get_image_size(from_file, from_file_load)
 
-        to_file_file = Image.open(to_file)
-        from_file_file = Image.open(from_file)
-
-        mat = to_file_load.get_image_to_face_mat()
-        xseg_mask = from_file_load.get_xseg_mask(dfl_type=True)
-        xseg_mask = cv2.resize(
-            xseg_mask, from_file_file.size, interpolation=cv2.INTER_CUBIC)
-        if xseg_mask is not None:
-            if ignore_eye_mouth is True:
-                eye_mask = get_image_eye_mask(
-                    [from_file_file.size[0], from_file_file.size[1], 1], from_file_load.get_landmarks())
-                mouth_mask = get_image_mouth_mask(
-                    [from_file_file.size[0], from_file_file.size[1], 1], from_file_load.get_landmarks())
-
-                xseg_mask = xseg_mask - \
-                    np.squeeze(eye_mask) - np.squeeze(mouth_mask)
-                xseg_mask = np.clip(xseg_mask, 0, 1)
-
-            xseg_mask = np.clip(xseg_mask, 0, 1)
-            xseg_mask = cv2.warpAffine(
-                xseg_mask, mat, to_file_file.size, flags=cv2.INTER_CUBIC)
+    mat = to_file_load.get_image_to_face_mat()
+    xseg_mask = from_file_load.get_xseg_mask(dfl_type=True)
+    if xseg_mask is not None:
+        if ignore_eye_mouth is True:
+            # the eye and mouth masks are cut out at the source face size
             xseg_mask = cv2.resize(
-                xseg_mask, (mask_size, mask_size), interpolation=cv2.INTER_CUBIC)
-            xseg_mask[xseg_mask < 0.5] = 0
-            xseg_mask[xseg_mask >= 0.5] = 1
+                xseg_mask, from_size, interpolation=cv2.INTER_LINEAR)
+            eye_mouth_mask = get_combined_facial_mask(
+                [from_size[0], from_size[1], 1], from_file_load.get_landmarks())
+
+            # masks are float32 throughout, update in place
+            xseg_mask -= np.squeeze(eye_mouth_mask)
+            np.clip(xseg_mask, 0, 1, out=xseg_mask)
+
+        xseg_mask = cv2.warpAffine(
+            xseg_mask, mask_warp_matrix(xseg_mask, from_size, mat, to_size, mask_size),
+            (mask_size, mask_size), flags=cv2.INTER_LINEAR)
+        # stored masks are within [0, 1], so no clip is needed before this
+        xseg_mask = (xseg_mask >= 0.5).astype(np.float32)
+
+        to_file_load.set_xseg_mask(xseg_mask)
+
+    polys = from_file_load.get_seg_ie_polys()
+    if polys is not None:
+        # raw copy from resizer
+        transform_polys(polys, mat)
+
+        to_file_load.set_seg_ie_polys(polys)
+    to_file_load.save()
+
+    return to_file
 
-            to_file_load.set_xseg_mask(xseg_mask)
 
-        polys = from_file_load.get_seg_ie_polys()
-        if polys is not None:
-            # raw copy from resizer
-            for poly in polys.get_polys():
-                points = poly.get_pts()
-                points = np.expand_dims(points, axis=1)
-                points = cv2.transform(points, mat, points.shape)
-                points = np.squeeze(points)
+def face_reexport_masks(image_folder, copy_folder, mask_size=256, ignore_eye_mouth=False):
+    to_files = get_file_list(copy_folder)
+    reexport_one = functools.partial(_face_reexport_masks_one, image_folder=image_folder,
+                                     mask_size=mask_size, ignore_eye_mouth=ignore_eye_mouth)
+    for to_file in map_files(reexport_one, to_files, initializer=_init_face_reexport_masks,
+                             initargs=(list_file_names(image_folder),)):
+        if to_file is not None:
+            sys.stdout.write(to_file + '\n')
+
+
+def write_jpg(path, image, quality):
+    """ Encode a BGR image as JPEG, with libjpeg-turbo when available """
+    if _turbo_jpeg is None:
+        cv2.imwrite(path, image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        return
 
-                poly.set_points(points)
+    # 4:2:0 chroma subsampling, like cv2.imwrite
+    with open(path, 'wb') as f:
+        f.write(_turbo_jpeg.encode(image, quality=quality, jpeg_subsample=TJSAMP_420))
 
-            to_file_load.set_seg_ie_polys(polys)
-        to_file_load.save()
 
-        sys.stdout.write(to_file + '\n')
+@functools.lru_cache(maxsize=None)
+def get_gpu_codec():
+    """ Return an nvImageCodec (decoder, encoder) pair, or None without a usable GPU """
+    if nvimgcodec is None:
+        return None
+    try:
+        return nvimgcodec.Decoder(), nvimgcodec.Encoder()
+    except RuntimeError:
+        # no CUDA device/driver
+        return None
+
+
+def _convert_png_to_jpg_one(file, jpg_path, encoded=False):
+    pre, ext = os.path.splitext(os.path.basename(file))
+    copy_file = os.path.join(jpg_path, pre + '.jpg')
+
+    file_load = load_data(file)
+    if file_load is None:
+        if encoded and os.path.exists(copy_file):
+            os.remove(copy_file)
+        return 'No file data for file' + file
+
+    if not encoded:
+        file_mat = cv2.imread(file)
+        write_jpg(copy_file, file_mat, 90)
+    DFLJPG.embed_data(copy_file,
+                      face_type=file_load.get_face_type(),
+                      source_filename=file_load.get_source_filename(),
+                      source_landmarks=file_load.get_source_landmarks(),
+                      landmarks=file_load.get_landmarks(),
+                      source_rect=file_load.get_source_rect(),
+                      image_to_face_mat=file_load.get_image_to_face_mat()
+                      )
+    return 'Done: ' + copy_file
+
+
+def _embed_gpu_encoded_jpg_one(file, encoded, jpg_path):
+    """ _convert_png_to_jpg_one for map_files, with the GPU encode flag as a second iterable """
+    return _convert_png_to_jpg_one(file, jpg_path, encoded=encoded)
+
+
+def _encode_jpg_batch_gpu(codec, files, jpg_path):
+    """ Decode and re-encode a batch of images on the GPU, return which succeeded """
+    decoder, encoder = codec
+    copy_files = [os.path.join(jpg_path, os.path.splitext(os.path.basename(file))[0] + '.jpg')
+                  for file in files]
+    images = decoder.read(files)
+    ok = [image is not None for image in images]
+    encoder.write([f for f, good in zip(copy_files, ok) if good],
+                  [image for image in images if image is not None],
+                  ".jpg", params=nvimgcodec.EncodeParams(quality=90))
+    return ok
 
 
 def convert_png_to_jpg(png_path, jpg_path):
     png_images = get_file_list(png_path)
 
-    for file in png_images:
-        file_load = load_data(file)
-        if file_load is None:
-            print('No file data for file' + file)
-            continue
+    codec = get_gpu_codec()
+    if codec is None:
+        convert_one = functools.partial(_convert_png_to_jpg_one, jpg_path=jpg_path)
+        for message in map_files(convert_one, png_images):
+            print(message)
+        return
 
-        file_mat = cv2.imread(file)
-        pre, ext = os.path.splitext(os.path.basename(file))
-        copy_file = os.path.join(jpg_path, pre + '.jpg')
-        cv2.imwrite(copy_file, file_mat, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
-        DFLJPG.embed_data(copy_file,
-                          face_type=file_load.get_face_type(),
-                          source_filename=file_load.get_source_filename(),
-                          source_landmarks=file_load.get_source_landmarks(),
-                          landmarks=file_load.get_landmarks(),
-                          source_rect=file_load.get_source_rect(),
-                          image_to_face_mat=file_load.get_image_to_face_mat()
-                          )
-        print('Done: ' + copy_file)
+    # pixels go through the GPU in batches first, then metadata is embedded on
+    # the CPU by a single worker pool
+    encoded = []
+    for start in range(0, len(png_images), GPU_BATCH_SIZE):
+        encoded += _encode_jpg_batch_gpu(codec, png_images[start:start + GPU_BATCH_SIZE], jpg_path)
+    # drop the cached decoder/encoder before the worker pool starts
+    del codec
+    get_gpu_codec.cache_clear()
+
+    embed_one = functools.partial(_embed_gpu_encoded_jpg_one, jpg_path=jpg_path)
+    for message in map_files(embed_one, png_images, encoded):
+        print(message)
 
 
 if __name__ == "__main__":
@@ -551,33 +825,42 @@ if __name__ == "__main__":
     parser.add_argument("--jpg_folder")
     args = parser.parse_args()
 
-    if args.jpg_folder is not None:
-        convert_png_to_jpg(args.input_folder, args.jpg_folder)
-        exit(0)
-
-    if args.recalc_in_frame == True:
-        recalculate_to_parent_frame(args.input_folder, args.copy)
-        exit(0)
-
-    if args.utoself == True:
-        update_parent_to_self(args.input_folder)
-        exit(0)
-
-    if args.reexport_masks == True:
-        face_reexport_masks(args.input_folder, args.copy,
-                            ignore_eye_mouth=args.ignore_m_e)
-        exit(0)
-
-    if args.recalc == True:
-        recalculate_copy(args.input_folder, args.copy)
-        exit(0)
-
-    if args.copy is not None:
-        copy_to_file(args.input_folder, args.copy,
-                     args.copy_parent, args.recalc)
-        exit(0)
-
-    if args.save == True:
-        save_data(args.input_folder)
-    else:
-        load_folder_data(args.input_folder)
+    # results are read line by line from a pipe, a large buffer saves a
+    # write per face
+    sys.stdout.flush()
+    sys.stdout = io.TextIOWrapper(io.BufferedWriter(sys.stdout.buffer, buffer_size=STDOUT_BUFFER_SIZE),
+                                  encoding=sys.stdout.encoding, errors=sys.stdout.errors)
+
+    try:
+        if args.jpg_folder is not None:
+            convert_png_to_jpg(args.input_folder, args.jpg_folder)
+            exit(0)
+
+        if args.recalc_in_frame == True:
+            recalculate_to_parent_frame(args.input_folder, args.copy)
+            exit(0)
+
+        if args.utoself == True:
+            update_parent_to_self(args.input_folder)
+            exit(0)
+
+        if args.reexport_masks == True:
+            face_reexport_masks(args.input_folder, args.copy,
+                                ignore_eye_mouth=args.ignore_m_e)
+            exit(0)
+
+        if args.recalc == True:
+            recalculate_copy(args.input_folder, args.copy)
+            exit(0)
+
+        if args.copy is not None:
+            copy_to_file(args.input_folder, args.copy,
+                         args.copy_parent, args.recalc)
+            exit(0)
+
+        if args.save == True:
+            save_data(args.input_folder)
+        else:
+            load_folder_data(args.input_folder)
+    finally:
+        sys.stdout.flush()
@@ -5,6 +5,7 @@ Provides a clean API for reading and writing DeepFaceLab image metadata
 
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 import numpy as np
@@ -29,6 +30,10 @@ class FaceDataNotFoundError(Exception):
     pass
 
 
+# Images handed to a worker at a time by embed_mask_polygons
+EMBED_CHUNKSIZE = 32
+
+
 def load_face_data(image_path: str) -> Optional[Dict[str, Any]]:
     """
     Load DFL face data from an image file
@@ -240,13 +245,64 @@ def set_segmentation_polygons(image_path: str, polygons: List[List[List[float]]]
         return False
 
 
-def embed_mask_polygons(image_paths: List[str], eyebrow_expand_mod: int = 1) -> Tuple[int, int]:
+def _embed_one(image_path: str, eyebrow_expand_mod: int) -> Tuple[bool, Optional[str]]:
+    """
+    Embed mask polygons into a single DFL image
+
+    The image is parsed and written once, with its polygons kept as arrays
+    rather than going through load_face_data/save_face_data.
+
+    Returns:
+        Tuple of (success, error message or None)
+    """
+    try:
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+
+        ext = Path(image_path).suffix.lower()
+        if ext in ['.jpg', '.jpeg']:
+            dfl_data = DFLJPG.load(image_path)
+        elif ext == '.png':
+            dfl_data = DFLPNG.load(image_path)
+        else:
+            raise ValueError(f"Unsupported file format: {ext}")
+
+        if dfl_data is None:
+            raise FaceDataNotFoundError(f"No DFL data found in {image_path}")
+
+        seg_ie_polys = dfl_data.get_seg_ie_polys()
+        if seg_ie_polys is None or not seg_ie_polys.has_polys():
+            return (False, None)
+
+        polys = [[poly.type, poly.get_pts()] for poly in seg_ie_polys.get_polys()]
+
+        # Apply eyebrow expansion if needed
+        if eyebrow_expand_mod > 1:
+            image_height, image_width = dfl_data.get_shape()[:2]
+            polys = [[poly_type, expand_eyebrow_region(pts, eyebrow_expand_mod, image_width, image_height)]
+                     for poly_type, pts in polys]
+
+        # Save back to image
+        dfl_data.set_seg_ie_polys(polys)
+        dfl_data.save()
+        return (True, None)
+
+    except Exception as e:
+        return (False, str(e))
+
+
+def embed_mask_polygons(image_paths: List[str], eyebrow_expand_mod: int = 1,
+                        use_processes: bool = True) -> Tuple[int, int]:
     """
     Embed mask polygons into multiple DFL images
 
+    Images are processed in parallel, one worker per CPU core but never more
+    workers than images.
+
     Args:
         image_paths: List of image file paths
         eyebrow_expand_mod: Eyebrow expansion modifier (1-4)
+        use_processes: Use worker processes; set False to use threads instead
 
     Returns:
         Tuple of (success_count, failure_count)
@@ -256,30 +312,24 @@ def embed_mask_polygons(image_paths: List[str], eyebrow_expand_mod: int = 1) ->
 
     success_count = 0
     failure_count = 0
-
-    for image_path in image_paths:
-        try:
-            # Load face data
-            face_data = load_face_data(image_path)
-
-            if face_data.get('segmentation_polygons'):
-                # Apply eyebrow expansion if needed
-                if eyebrow_expand_mod > 1:
-                    # TODO: Implement eyebrow expansion logic
-                    pass
-
-                # Save back to image
-                if save_face_data(image_path, face_data):
-                    success_count += 1
-                else:
-                    failure_count += 1
+    if not image_paths:
+        return (success_count, failure_count)
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    max_workers = min(os.cpu_count() or 1, len(image_paths))
+    with executor_class(max_workers=max_workers) as executor:
+        results = executor.map(_embed_one, image_paths,
+                               [eyebrow_expand_mod] * len(image_paths),
+                               chunksize=EMBED_CHUNKSIZE)
+
+        for image_path, (success, error) in zip(image_paths, results):
+            if error is not None:
+                print(f"Error embedding mask for {image_path}: {error}")
+            if success:
+                success_count += 1
             else:
                 failure_count += 1
 
-        except Exception as e:
-            print(f"Error embedding mask for {image_path}: {str(e)}")
-            failure_count += 1
-
     return (success_count, failure_count)
 
 
@@ -299,16 +349,11 @@ def expand_eyebrow_region(polygon: List[List[float]], expand_mod: int, image_wid
     if expand_mod <= 1:
         return polygon
 
-    expanded_polygon = []
+    pts = np.array(polygon, dtype=np.float64).reshape(-1, 2)
     eyebrow_threshold = image_height * 0.3  # Top 30% is eyebrow region
 
-    for point in polygon:
-        x, y = point
-        if y < eyebrow_threshold:
-            # Expand upward for eyebrow region
-            new_y = y - (expand_mod * image_height * 0.02)
-            expanded_polygon.append([x, max(0, new_y)])
-        else:
-            expanded_polygon.append(point)
+    # Expand upward for eyebrow region
+    eyebrow = pts[:, 1] < eyebrow_threshold
+    pts[eyebrow, 1] = np.maximum(0, pts[eyebrow, 1] - (expand_mod * image_height * 0.02))
 
-    return expanded_polygon
+    return pts.tolist()
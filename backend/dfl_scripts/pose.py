@@ -1,34 +1,36 @@
+import functools
 import math
 
 import cv2
 import numpy as np
 
-def estimate_pitch_yaw_roll(aligned_landmarks, size=256):
-    """
-    returns pitch,yaw,roll [-pi/2...+pi/2]
-    """
+@functools.lru_cache(maxsize=None)
+def _camera_matrix(size):
     shape = (size,size)
     focal_length = shape[1]
     camera_center = (shape[1] / 2, shape[0] / 2)
-    camera_matrix = np.array(
+    return np.array(
         [[focal_length, 0, camera_center[0]],
          [0, focal_length, camera_center[1]],
          [0, 0, 1]], dtype=np.float32)
 
+def _clip_degrees(angle):
+    half_pi = math.pi / 2.0
+    return round(math.degrees(min(max(angle, -half_pi), half_pi)), 3)
+
+def estimate_pitch_yaw_roll(aligned_landmarks, size=256):
+    """
+    returns pitch,yaw,roll [-pi/2...+pi/2]
+    """
     (_, rotation_vector, _) = cv2.solvePnP(
-        np.concatenate( (landmarks_68_3D[:27],   landmarks_68_3D[30:36]) , axis=0) ,
-        np.concatenate( (aligned_landmarks[:27], aligned_landmarks[30:36]) , axis=0).astype(np.float32),
-        camera_matrix,
-        np.zeros((4, 1)) )
+        _pose_points_3D,
+        np.asarray(aligned_landmarks)[_pose_landmark_ids].astype(np.float32),
+        _camera_matrix(size),
+        _dist_coeffs )
 
     pitch, yaw, roll = rotationMatrixToEulerAngles( cv2.Rodrigues(rotation_vector)[0] )
-   
-    half_pi = math.pi / 2.0
-    pitch = round(np.rad2deg(np.clip ( pitch, -half_pi, half_pi )), 3)
-    yaw   = round(np.rad2deg(np.clip ( yaw ,  -half_pi, half_pi )), 3)
-    roll  = round(np.rad2deg(np.clip ( roll,  -half_pi, half_pi )), 3)
 
-    return -pitch, yaw, roll
+    return -_clip_degrees(pitch), _clip_degrees(yaw), _clip_degrees(roll)
 
 def rotationMatrixToEulerAngles(R) :
     sy = math.sqrt(R[0,0] * R[0,0] +  R[1,0] * R[1,0])
@@ -115,4 +117,9 @@ landmarks_68_3D = np.array( [
 [8.449166    , 30.596216    , -20.671489  ], #35
 [0.205322    , 31.408738    , -21.903670  ], #36 
 [-7.198266   , 30.844876    , -20.328022  ]  #37
-], dtype=np.float32)
\ No newline at end of file
+], dtype=np.float32)
+
+# landmarks used for pose estimation: jaw, brows and nose (without the bridge)
+_pose_landmark_ids = np.r_[0:27, 30:36]
+_pose_points_3D = landmarks_68_3D[_pose_landmark_ids]
+_dist_coeffs = np.zeros((4, 1))
@@ -15,6 +15,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Images processed at once by generate_batch_masks
+BATCH_MASK_CONCURRENCY = 8
+
 class BiSeNetModel:
     """Wrapper for BiSeNet segmentation model integration"""
     
@@ -90,8 +93,8 @@ class BiSeNetModel:
                     "error": "OpenCV not available"
                 }
             
-            # Load image
-            img = cv2.imread(image_path)
+            # Load image off the event loop so batch items overlap
+            img = await asyncio.to_thread(cv2.imread, image_path)
             if img is None:
                 return {
                     "success": False,
@@ -133,29 +136,35 @@ class BiSeNetModel:
                 "error": str(e)
             }
     
-    async def generate_batch_masks(self, image_paths: List[str], eyebrow_expand_mod: int = 1) -> Dict[str, Any]:
-        """Generate segmentation masks for multiple images"""
+    async def generate_batch_masks(self, image_paths: List[str], eyebrow_expand_mod: int = 1,
+                                   max_concurrency: int = BATCH_MASK_CONCURRENCY) -> Dict[str, Any]:
+        """Generate segmentation masks for multiple images, up to max_concurrency at a time"""
         try:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def generate_one(image_path: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.generate_segmentation_mask(image_path, eyebrow_expand_mod)
+
+            outcomes = await asyncio.gather(
+                *(generate_one(image_path) for image_path in image_paths),
+                return_exceptions=True
+            )
+
             results = {}
             processed_count = 0
-            
-            for image_path in image_paths:
-                try:
-                    result = await self.generate_segmentation_mask(image_path, eyebrow_expand_mod)
-                    results[image_path] = result
-                    
-                    if result["success"]:
-                        processed_count += 1
-                    
-                    # Small delay to prevent overwhelming the system
-                    await asyncio.sleep(0.01)
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to process {image_path}: {e}")
-                    results[image_path] = {
+
+            for image_path, result in zip(image_paths, outcomes):
+                if isinstance(result, Exception):
+                    logger.warning(f"Failed to process {image_path}: {result}")
+                    result = {
                         "success": False,
-                        "error": str(e)
+                        "error": str(result)
                     }
+                results[image_path] = result
+
+                if result["success"]:
+                    processed_count += 1
             
             return {
                 "success": True,
@@ -198,21 +207,9 @@ class BiSeNetModel:
     def _expand_eyebrow_region(self, polygon: List[List[float]], expand_mod: int, width: int, height: int) -> List[List[float]]:
         """Expand eyebrow region of polygon based on expand_mod parameter"""
         try:
-            expanded_polygon = []
-            
-            for point in polygon:
-                if point[1] < height * 0.3:  # Top 30% of face (eyebrow region)
-                    # Expand upward
-                    expanded_point = [
-                        point[0], 
-                        max(0, point[1] - (expand_mod * height * 0.02))
-                    ]
-                    expanded_polygon.append(expanded_point)
-                else:
-                    expanded_polygon.append(point)
-            
-            return expanded_polygon
-            
+            from dfl_scripts.dfl_io import expand_eyebrow_region
+            return expand_eyebrow_region(polygon, expand_mod, width, height)
+
         except Exception as e:
             logger.error(f"Eyebrow expansion failed: {e}")
             return polygon
@@ -3,8 +3,11 @@ import subprocess
 import sys
 import os
 import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 # Optional imports - provide fallbacks if not available
 try:
@@ -19,6 +22,48 @@ from schemas.schemas import WorkflowNode, NodeStatus
 from nodes.base_node import BaseNode
 from api.websocket import websocket_manager
 
+# Shared pool for blocking face image reads (directory scans, DFL metadata parsing)
+FACE_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+_face_io_pool = ThreadPoolExecutor(max_workers=FACE_IO_WORKERS, thread_name_prefix="face-io")
+
+async def run_face_io(func, *args):
+    """Run a blocking face I/O call on the shared pool without stalling the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(_face_io_pool, func, *args)
+
+# Parsed face data keyed by (face_id, file path, file mtime), so rewriting a
+# face image invalidates its entry
+FACE_DATA_CACHE_SIZE = 4096
+_face_data_cache: "OrderedDict[Tuple[str, str, Optional[int]], Dict[str, Any]]" = OrderedDict()
+
+# Directory scans are reused until the directory changes, for at most FACE_LIST_TTL seconds
+FACE_LIST_TTL = 2.0
+_face_list_cache: Dict[str, Tuple[Optional[int], float, List[str], Dict[str, str]]] = {}
+
+def _file_mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _cache_face_data(key: Tuple[str, str, Optional[int]], face_data: Dict[str, Any]) -> Dict[str, Any]:
+    _face_data_cache[key] = face_data
+    if len(_face_data_cache) > FACE_DATA_CACHE_SIZE:
+        _face_data_cache.popitem(last=False)
+    return face_data
+
+
+def find_face_images(input_path: Path) -> List[Path]:
+    """Find all face images in the input directory"""
+    extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+    face_files = []
+    
+    for ext in extensions:
+        face_files.extend(input_path.glob(f"*{ext}"))
+        face_files.extend(input_path.glob(f"*{ext.upper()}"))
+    
+    # Sort files by filename for consistent ordering
+    return sorted(face_files, key=lambda x: x.name)
+
 
 class AdvancedFaceEditorNode(BaseNode):
     """Advanced face editor with auto-detection, model loading, and segment selection"""
@@ -51,7 +96,7 @@ class AdvancedFaceEditorNode(BaseNode):
             await self.update_progress(10, "Scanning for face images...")
             
             # Find all face images
-            face_files = self._find_face_images(input_path)
+            face_files = find_face_images(input_path)
             if not face_files:
                 return {"success": False, "error": "No face images found in input directory"}
             
@@ -82,18 +127,6 @@ class AdvancedFaceEditorNode(BaseNode):
             await self.log_message("error", error_msg)
             return {"success": False, "error": error_msg}
     
-    def _find_face_images(self, input_path: Path) -> List[Path]:
-        """Find all face images in the input directory"""
-        extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-        face_files = []
-        
-        for ext in extensions:
-            face_files.extend(input_path.glob(f"*{ext}"))
-            face_files.extend(input_path.glob(f"*{ext.upper()}"))
-        
-        # Sort files by filename for consistent ordering
-        return sorted(face_files, key=lambda x: x.name)
-    
     async def detect_faces(self, input_path: Path, face_files: List[Path], detection_model: str, face_type: str, similarity_threshold: float) -> List[Dict]:
         """Detect faces in images and return face data for frontend"""
         try:
@@ -1677,11 +1710,11 @@ if __name__ == "__main__":
         if not face_files:
             # Common DFL directory patterns
             dfl_patterns = [
-                "**/aligned/**",
-                "**/data_src/aligned/**", 
-                "**/data_dst/aligned/**",
-                "**/workspace/data_src/aligned/**",
-                "**/workspace/data_dst/aligned/**"
+                "**/aligned/**/",
+                "**/data_src/aligned/**/", 
+                "**/data_dst/aligned/**/",
+                "**/workspace/data_src/aligned/**/",
+                "**/workspace/data_dst/aligned/**/"
             ]
             
             for pattern in dfl_patterns:
@@ -1703,6 +1736,26 @@ if __name__ == "__main__":
         
         return [str(f) for f in face_files]
     
+    def _get_face_index(self, input_dir: str) -> Tuple[List[str], Dict[str, str]]:
+        """Get the face file list and a {stem or filename: path} map, reusing a recent scan"""
+        dir_mtime = _file_mtime_ns(input_dir)
+        now = time.monotonic()
+        
+        cached = _face_list_cache.get(input_dir)
+        if cached is not None and cached[0] == dir_mtime and now - cached[1] < FACE_LIST_TTL:
+            return cached[2], cached[3]
+        
+        face_files = self._get_face_files(input_dir)
+        files_by_name = {}
+        for f_path in face_files:
+            p = Path(f_path)
+            # First match wins, as with a linear scan
+            files_by_name.setdefault(p.stem, f_path)
+            files_by_name.setdefault(p.name, f_path)
+        
+        _face_list_cache[input_dir] = (dir_mtime, now, face_files, files_by_name)
+        return face_files, files_by_name
+    
     def _check_face_data_in_image(self, image_path: str) -> tuple[bool, dict]:
         """Check if image contains embedded face data using DFL-specific methods"""
         try:
@@ -2069,7 +2122,7 @@ if __name__ == "__main__":
             
             # Find the image file - face_id can be either "face_X" format or filename
             # Use the same file discovery logic as _get_face_files to ensure all relevant images are found
-            all_face_files = self._get_face_files(input_dir)
+            all_face_files, files_by_name = await run_face_io(self._get_face_index, input_dir)
             
             target_file = None
             # Check if face_id is in "face_X" format
@@ -2079,16 +2132,19 @@ if __name__ == "__main__":
                     target_file = all_face_files[index]
             else:
                 # Assume face_id is the filename or stem
-                for f_path in all_face_files:
-                    p = Path(f_path)
-                    if p.stem == face_id or p.name == face_id:
-                        target_file = f_path
-                        break
+                target_file = files_by_name.get(face_id)
             
             if not target_file:
                 await self.log_message("warning", f"Face image not found for face_id: {face_id} in {input_dir}")
                 return {"success": False, "message": "Face image not found"}
             
+            # Embedded face data only changes when the file is rewritten
+            cache_key = (face_id, target_file, _file_mtime_ns(target_file))
+            cached = _face_data_cache.get(cache_key)
+            if cached is not None:
+                _face_data_cache.move_to_end(cache_key)
+                return dict(cached)
+            
             # Try to extract face data using DFL methods
             try:
                 await self.log_message("info", f"Attempting to extract DFL data from: {target_file}")
@@ -2099,11 +2155,11 @@ if __name__ == "__main__":
                 # Try to load DFL data
                 if target_file.lower().endswith('.jpg') or target_file.lower().endswith('.jpeg'):
                     from DFLJPG import DFLJPG
-                    dfl_data = DFLJPG.load(target_file)
+                    dfl_data = await run_face_io(DFLJPG.load, target_file)
                     await self.log_message("info", f"DFLJPG.load() returned: {dfl_data is not None}")
                 elif target_file.lower().endswith('.png'):
                     from DFLPNG import DFLPNG
-                    dfl_data = DFLPNG.load(target_file)
+                    dfl_data = await run_face_io(DFLPNG.load, target_file)
                     await self.log_message("info", f"DFLPNG.load() returned: {dfl_data is not None}")
                 else:
                     dfl_data = None
@@ -2111,30 +2167,25 @@ if __name__ == "__main__":
                 
                 if dfl_data is None:
                     await self.log_message("warning", f"No DFL data found in {target_file}")
-                    return {
+                    return dict(_cache_face_data(cache_key, {
                         "success": False,
                         "message": f"No DFL data found in {face_id}",
                         "landmarks": None,
                         "segmentation": None
-                    }
+                    }))
                 
                 await self.log_message("info", f"DFL data loaded successfully for {target_file}")
                 
+                import numpy as np
+                
                 # Extract landmarks
                 landmarks = dfl_data.get_landmarks()
                 landmarks_data = None
                 if landmarks is not None:
                     try:
-                        # Handle numpy arrays
-                        import numpy as np
-                        if isinstance(landmarks, np.ndarray):
-                            landmarks = landmarks.tolist()
-                        
                         if len(landmarks) > 0:
-                            # Convert to normalized coordinates (0-100)
-                            landmarks_data = []
-                            for landmark in landmarks:
-                                landmarks_data.append([float(landmark[0]), float(landmark[1])])
+                            # Keep the x, y columns as floats in one vectorized pass
+                            landmarks_data = np.asarray(landmarks, dtype=np.float64)[:, :2].tolist()
                     except Exception as e:
                         await self.log_message("warning", f"Error processing landmarks: {str(e)}")
                         landmarks_data = None
@@ -2148,27 +2199,19 @@ if __name__ == "__main__":
                         for poly in seg_polys.get_polys():
                             points = poly.get_pts()
                             if len(points) > 0:
-                                # Handle numpy arrays
-                                if isinstance(points, np.ndarray):
-                                    points = points.tolist()
-                                
-                                # Convert to normalized coordinates
-                                normalized_points = []
-                                for point in points:
-                                    normalized_points.append([float(point[0]), float(point[1])])
-                                segmentation_data.append(normalized_points)
+                                segmentation_data.append(np.asarray(points, dtype=np.float64)[:, :2].tolist())
                     except Exception as e:
                         await self.log_message("warning", f"Error processing segmentation: {str(e)}")
                         segmentation_data = None
                 
-                return {
+                return dict(_cache_face_data(cache_key, {
                     "success": True,
                     "message": f"Face data extracted for {face_id}",
                     "landmarks": landmarks_data,
                     "segmentation": segmentation_data,
                     "face_type": dfl_data.get_face_type(),
                     "source_filename": dfl_data.get_source_filename()
-                }
+                }))
                 
             except ImportError as e:
                 # Fallback: simulate data for testing
@@ -2213,7 +2256,7 @@ if __name__ == "__main__":
             await self.log_message("info", f"Starting machine editor style import of all face data from: {input_dir}")
             
             # Get all face images in the directory
-            face_files = self._get_face_files(input_dir)
+            face_files = await run_face_io(self._get_face_files, input_dir)
             total_images = len(face_files)
             
             if total_images == 0:
@@ -2237,89 +2280,105 @@ if __name__ == "__main__":
             }
             await websocket_manager.broadcast(json.dumps(initial_message))
             
-            # Use machine editor style sequential processing
             all_face_data = {}
             processed_count = 0
             
-            # Process each image sequentially with progress updates (like machine editor)
-            for i, face_file in enumerate(face_files):
-                from pathlib import Path
-                face_id = Path(face_file).stem
-                
-                try:
-                    # Use direct DFL script access (like machine editor)
-                    face_data = await self._get_face_data_direct(face_file)
+            # Files are read concurrently on the face I/O pool, but results are
+            # consumed in order so progress messages stay sequential (like machine editor)
+            semaphore = asyncio.Semaphore(FACE_IO_WORKERS)
+            
+            async def load_face_data(face_file: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._get_face_data_direct(face_file)
+            
+            load_tasks = [asyncio.ensure_future(load_face_data(face_file)) for face_file in face_files]
+            
+            try:
+                for i, face_file in enumerate(face_files):
+                    face_id = Path(face_file).stem
+                    # Awaiting a finished load doesn't yield, so give the
+                    # WebSocket writers a chance to drain between images
+                    await asyncio.sleep(0)
                     
-                    if face_data.get("success", False):
-                        all_face_data[face_id] = {
-                            "landmarks": face_data.get("landmarks"),
-                            "segmentation": face_data.get("segmentation"),
-                            "face_type": face_data.get("face_type"),
-                            "source_filename": face_data.get("source_filename")
-                        }
-                        processed_count += 1
+                    try:
+                        # Use direct DFL script access (like machine editor)
+                        face_data = await load_tasks[i]
                         
-                        # Send individual image success message
+                        if face_data.get("success", False):
+                            all_face_data[face_id] = {
+                                "landmarks": face_data.get("landmarks"),
+                                "segmentation": face_data.get("segmentation"),
+                                "face_type": face_data.get("face_type"),
+                                "source_filename": face_data.get("source_filename")
+                            }
+                            processed_count += 1
+                            
+                            # Send individual image success message
+                            image_message = {
+                                "type": "import_image_success",
+                                "node_id": self.node.id,
+                                "filename": face_id,
+                                "has_landmarks": bool(face_data.get('landmarks')),
+                                "has_segmentation": bool(face_data.get('segmentation')),
+                                "current_image": f"Processing {i + 1}/{total_images}",
+                                "processed": processed_count,
+                                "total": total_images
+                            }
+                            await websocket_manager.broadcast(json.dumps(image_message))
+                            
+                            # Debug: log first few successful imports
+                            if processed_count <= 3:
+                                await self.log_message("info", f"Sample face data for {face_id}: landmarks={bool(face_data.get('landmarks'))}, segmentation={bool(face_data.get('segmentation'))}")
+                        else:
+                            # Send individual image failed message
+                            image_message = {
+                                "type": "import_image_failed",
+                                "node_id": self.node.id,
+                                "filename": face_id,
+                                "reason": face_data.get('message', 'Unknown error'),
+                                "current_image": f"Processing {i + 1}/{total_images}",
+                                "processed": processed_count,
+                                "total": total_images
+                            }
+                            await websocket_manager.broadcast(json.dumps(image_message))
+                            
+                            # Debug: log why face data failed
+                            await self.log_message("warning", f"No face data for {face_id}: {face_data.get('message', 'Unknown error')}")
+                    except Exception as e:
+                        # Send individual image error message
                         image_message = {
-                            "type": "import_image_success",
+                            "type": "import_image_error",
                             "node_id": self.node.id,
                             "filename": face_id,
-                            "has_landmarks": bool(face_data.get('landmarks')),
-                            "has_segmentation": bool(face_data.get('segmentation')),
+                            "error": str(e),
                             "current_image": f"Processing {i + 1}/{total_images}",
                             "processed": processed_count,
                             "total": total_images
                         }
                         await websocket_manager.broadcast(json.dumps(image_message))
                         
-                        # Debug: log first few successful imports
-                        if processed_count <= 3:
-                            await self.log_message("info", f"Sample face data for {face_id}: landmarks={bool(face_data.get('landmarks'))}, segmentation={bool(face_data.get('segmentation'))}")
-                    else:
-                        # Send individual image failed message
-                        image_message = {
-                            "type": "import_image_failed",
+                        await self.log_message("warning", f"Error processing {face_id}: {str(e)}")
+                        continue
+                    
+                    # Send progress update every 5 images for better responsiveness
+                    if (i + 1) % 5 == 0 or (i + 1) == total_images:
+                        progress = (i + 1) / total_images * 100
+                        progress_message = {
+                            "type": "import_progress",
                             "node_id": self.node.id,
-                            "filename": face_id,
-                            "reason": face_data.get('message', 'Unknown error'),
+                            "progress": progress,
                             "current_image": f"Processing {i + 1}/{total_images}",
                             "processed": processed_count,
-                            "total": total_images
+                            "total": total_images,
+                            "message": f"{processed_count} with data"
                         }
-                        await websocket_manager.broadcast(json.dumps(image_message))
-                        
-                        # Debug: log why face data failed
-                        await self.log_message("warning", f"No face data for {face_id}: {face_data.get('message', 'Unknown error')}")
-                except Exception as e:
-                    # Send individual image error message
-                    image_message = {
-                        "type": "import_image_error",
-                        "node_id": self.node.id,
-                        "filename": face_id,
-                        "error": str(e),
-                        "current_image": f"Processing {i + 1}/{total_images}",
-                        "processed": processed_count,
-                        "total": total_images
-                    }
-                    await websocket_manager.broadcast(json.dumps(image_message))
-                    
-                    await self.log_message("warning", f"Error processing {face_id}: {str(e)}")
-                    continue
-                
-                # Send progress update every 5 images for better responsiveness
-                if (i + 1) % 5 == 0 or (i + 1) == total_images:
-                    progress = (i + 1) / total_images * 100
-                    progress_message = {
-                        "type": "import_progress",
-                        "node_id": self.node.id,
-                        "progress": progress,
-                        "current_image": f"Processing {i + 1}/{total_images}",
-                        "processed": processed_count,
-                        "total": total_images,
-                        "message": f"{processed_count} with data"
-                    }
-                    print(f"DEBUG: Sending WebSocket progress update: {progress_message}")
-                    await websocket_manager.broadcast(json.dumps(progress_message))
+                        print(f"DEBUG: Sending WebSocket progress update: {progress_message}")
+                        await websocket_manager.broadcast(json.dumps(progress_message),
+                                                          key=("import_progress", self.node.id))
+            finally:
+                # Stop loading files nobody will consume (e.g. the import was cancelled)
+                for task in load_tasks:
+                    task.cancel()
             
             await self.log_message("info", f"Completed machine editor style import: {processed_count}/{total_images} images processed")
             
@@ -2369,9 +2428,9 @@ if __name__ == "__main__":
                 # Load face data directly from file using DFL modules
                 ext = Path(face_file).suffix.lower()
                 if ext in ['.jpg', '.jpeg']:
-                    dfl_data = DFLJPG.load(face_file)
+                    dfl_data = await run_face_io(DFLJPG.load, face_file)
                 elif ext == '.png':
-                    dfl_data = DFLPNG.load(face_file)
+                    dfl_data = await run_face_io(DFLPNG.load, face_file)
                 else:
                     return {
                         "success": False,
@@ -1,17 +1,28 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 import asyncio
+import time
 from pathlib import Path
 
 from schemas.schemas import WorkflowNode, NodeStatus
 from api.websocket import websocket_manager
 
+# Progress updates are sent at most this often (seconds) unless progress moved
+# by at least PROGRESS_MIN_DELTA percent or reached 100
+PROGRESS_UPDATE_INTERVAL = 0.1
+PROGRESS_MIN_DELTA = 1.0
+
 class BaseNode(ABC):
     def __init__(self, node: WorkflowNode):
         self.node = node
         self.status = NodeStatus.IDLE
         self.progress = 0.0
         self.message = ""
+        # Last progress value sent to clients and when
+        self._sent_progress: Optional[float] = None
+        self._sent_progress_at = 0.0
+        # Pending send of the latest throttled progress update
+        self._progress_flush: Optional[asyncio.Task] = None
         
     @abstractmethod
     async def execute(self, execution_context: Dict[str, Any]) -> Dict[str, Any]:
@@ -19,20 +30,53 @@ class BaseNode(ABC):
         pass
     
     async def update_progress(self, progress: float, message: str = ""):
-        """Update node progress and send WebSocket update"""
+        """Update node progress and send WebSocket update (throttled)"""
         self.progress = progress
         self.message = message
         
+        now = time.monotonic()
+        if (
+            self._sent_progress is not None
+            and progress < 100
+            and abs(progress - self._sent_progress) < PROGRESS_MIN_DELTA
+            and now - self._sent_progress_at < PROGRESS_UPDATE_INTERVAL
+        ):
+            # Send the latest state once the interval is over, unless a later
+            # update goes out first
+            if self._progress_flush is None:
+                delay = PROGRESS_UPDATE_INTERVAL - (now - self._sent_progress_at)
+                self._progress_flush = asyncio.create_task(self._flush_progress(delay))
+            return
+        
+        self._cancel_progress_flush()
+        await self._send_progress()
+    
+    async def _flush_progress(self, delay: float):
+        await asyncio.sleep(delay)
+        self._progress_flush = None
+        await self._send_progress()
+    
+    def _cancel_progress_flush(self):
+        if self._progress_flush is not None:
+            self._progress_flush.cancel()
+            self._progress_flush = None
+    
+    async def _send_progress(self):
+        self._sent_progress = self.progress
+        self._sent_progress_at = time.monotonic()
+        
         await websocket_manager.send_node_update(self.node.id, {
             "status": self.status,
-            "progress": progress,
-            "message": message
+            "progress": self.progress,
+            "message": self.message
         })
     
     async def update_status(self, status: NodeStatus, message: str = ""):
         """Update node status and send WebSocket update"""
         self.status = status
         self.message = message
+        # This update carries the latest progress as well
+        self._cancel_progress_flush()
         
         await websocket_manager.send_node_update(self.node.id, {
             "status": status,
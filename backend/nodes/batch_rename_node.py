@@ -1,13 +1,19 @@
 import asyncio
+import os
+from operator import attrgetter
 from typing import Dict, Any, List
 from pathlib import Path
 import shutil
 import re
+import uuid
 
 from nodes.base_node import BaseNode
 from schemas.schemas import WorkflowNode, NodeStatus
 from api.websocket import websocket_manager
 
+# Renamed files between progress updates and log messages
+RENAME_LOG_INTERVAL = 100
+
 
 class BatchRenameNode(BaseNode):
     """Batch rename node for renaming files with consistent naming patterns"""
@@ -36,14 +42,18 @@ class BatchRenameNode(BaseNode):
             
             await self.update_progress(10, "Scanning for files...")
             
-            # Parse file extensions
-            extensions = [ext.strip().lower() for ext in file_extensions.split(',')]
-            extensions += [ext.upper() for ext in extensions]  # Add uppercase versions
+            # Parse file extensions, matched case-insensitively
+            extensions = {f".{ext.strip().lower()}" for ext in file_extensions.split(',')}
             
-            # Find all files with specified extensions
-            files_to_rename = []
-            for ext in extensions:
-                files_to_rename.extend(input_path.glob(f"*.{ext}"))
+            # Find all files with specified extensions in a single directory pass,
+            # remembering every name for collision checks
+            with os.scandir(input_path) as entries:
+                entries = list(entries)
+            existing_names = {entry.name for entry in entries}
+            files_to_rename = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+            ]
             
             if not files_to_rename:
                 return {"success": False, "error": f"No files found with extensions: {file_extensions}"}
@@ -52,45 +62,76 @@ class BatchRenameNode(BaseNode):
             await self.update_progress(20, f"Renaming {len(files_to_rename)} files...")
             
             # Sort files for consistent ordering
-            files_to_rename.sort()
+            files_to_rename.sort(key=attrgetter("name"))
             
             # Rename files
             renamed_count = 0
             failed_count = 0
             
+            # Plan all renames up front. Sources are moved out of the way first,
+            # so only names not being renamed (or claimed twice) collide.
+            source_names = {file_path.name for file_path in files_to_rename}
+            claimed_names = set()
+            planned = []
+            
             for i, file_path in enumerate(files_to_rename):
                 try:
                     # Generate new filename
                     new_name = pattern.format(index=start_index + i)
                     
                     # Ensure the pattern includes file extension
-                    if not any(new_name.endswith(f".{ext}") for ext in extensions):
+                    if os.path.splitext(new_name)[1].lower() not in extensions:
                         # Add original extension
                         new_name += file_path.suffix
                     
-                    new_path = input_path / new_name
-                    
                     # Check if target file already exists
-                    if new_path.exists() and new_path != file_path:
+                    if (new_name in existing_names and new_name not in source_names) or new_name in claimed_names:
                         await self.log_message("warning", f"Target file already exists: {new_name}")
                         failed_count += 1
                         continue
                     
-                    # Rename file
-                    file_path.rename(new_path)
-                    renamed_count += 1
-                    
-                    await self.log_message("info", f"Renamed {file_path.name} -> {new_name}")
-                    
-                    # Update progress
-                    progress = 20 + (i + 1) / len(files_to_rename) * 70
-                    await self.update_progress(progress, f"Renamed {i + 1}/{len(files_to_rename)} files")
+                    claimed_names.add(new_name)
+                    planned.append((file_path, input_path / new_name))
                     
                 except Exception as e:
                     await self.log_message("error", f"Failed to rename {file_path.name}: {str(e)}")
                     failed_count += 1
                     continue
             
+            # Phase 1: move sources to unique temporary names
+            staged = []
+            for file_path, new_path in planned:
+                tmp_path = file_path.with_name(f".rename_{uuid.uuid4().hex}{file_path.suffix}")
+                try:
+                    file_path.rename(tmp_path)
+                    staged.append((file_path, tmp_path, new_path))
+                except Exception as e:
+                    await self.log_message("error", f"Failed to rename {file_path.name}: {str(e)}")
+                    failed_count += 1
+            
+            # Phase 2: move temporary names to their targets. Sources that were
+            # skipped keep their names and must not be overwritten.
+            kept_names = source_names - {file_path.name for file_path, _, _ in staged}
+            for i, (file_path, tmp_path, new_path) in enumerate(staged):
+                try:
+                    if new_path.name in kept_names:
+                        raise FileExistsError(f"Target file already exists: {new_path.name}")
+                    tmp_path.rename(new_path)
+                    renamed_count += 1
+                except Exception as e:
+                    await self.log_message("error", f"Failed to rename {file_path.name}: {str(e)}")
+                    failed_count += 1
+                    if file_path.exists():
+                        await self.log_message("error", f"Could not restore {file_path.name}, left as {tmp_path.name}")
+                    else:
+                        tmp_path.rename(file_path)
+                
+                # Update progress
+                if (i + 1) % RENAME_LOG_INTERVAL == 0 or i + 1 == len(staged):
+                    progress = 20 + (i + 1) / len(staged) * 70
+                    await self.update_progress(progress, f"Renamed {i + 1}/{len(staged)} files")
+                    await self.log_message("info", f"Renamed {i + 1}/{len(staged)} files")
+            
             await self.update_progress(100, "Batch rename completed")
             await self.log_message("info", f"Renaming complete: {renamed_count} renamed, {failed_count} failed")
             
@@ -1,5 +1,5 @@
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import datetime
 
@@ -117,6 +117,10 @@ class WorkflowEdge(BaseModel):
     sourceHandle: str  # source_port_id
     targetHandle: str  # target_port_id
 
+class WorkflowBulkAdd(BaseModel):
+    nodes: List[WorkflowNode] = []
+    edges: List[WorkflowEdge] = []  # may reference node ids from the same batch
+
 class Workflow(BaseModel):
     id: str
     name: str
@@ -127,6 +131,14 @@ class Workflow(BaseModel):
     updated_at: str
     version: str = "1.0"
 
+class WorkflowUpdate(BaseModel):
+    """Partial workflow update; only the fields that are sent are applied"""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    nodes: Optional[List[WorkflowNode]] = None
+    edges: Optional[List[WorkflowEdge]] = None
+    version: Optional[str] = None
+
 class ExecutionStatus(str, Enum):
     IDLE = "idle"
     RUNNING = "running"
@@ -152,11 +164,18 @@ class ProgressUpdate(BaseModel):
     current_iter: Optional[int] = None
     eta: Optional[str] = None
 
+# Upper bound for user-supplied names (presets, detection profiles)
+MAX_NAME_LENGTH = 128
+
 class NodePreset(BaseModel):
     id: str
-    name: str
+    name: str = Field(max_length=MAX_NAME_LENGTH)
     description: Optional[str] = None
     nodeType: NodeType
     parameters: Dict[str, Any]
     created_at: str
     updated_at: str
+
+class DetectionProfileCreate(BaseModel):
+    name: str = Field("default", max_length=MAX_NAME_LENGTH)
+    settings: Dict[str, Any] = {}
@@ -230,13 +230,13 @@ class TestCompleteFaceSwapWorkflow:
     @pytest.mark.asyncio
     async def test_workflow_validation(self):
         """Test that the complete workflow is valid"""
-        result = await self.engine._validate_workflow(self.face_swap_workflow)
+        result = self.engine._validate_workflow(self.face_swap_workflow)
         assert result["valid"] == True
     
     @pytest.mark.asyncio
     async def test_execution_order(self):
         """Test that execution order is correct"""
-        execution_order = await self.engine._get_execution_order(self.face_swap_workflow)
+        execution_order = self.engine._get_execution_order(self.face_swap_workflow)
         
         # First layer: video extraction (can run in parallel)
         first_layer = execution_order[:2]
@@ -362,11 +362,11 @@ class TestCompleteFaceSwapWorkflow:
                 break
         
         # Test workflow validation
-        result = await self.engine._validate_workflow(xseg_workflow)
+        result = self.engine._validate_workflow(xseg_workflow)
         assert result["valid"] == True
         
         # Test execution order includes XSeg editing
-        execution_order = await self.engine._get_execution_order(xseg_workflow)
+        execution_order = self.engine._get_execution_order(xseg_workflow)
         assert "xseg_edit" in execution_order
         
         # XSeg editing should come after face extraction but before training
@@ -512,7 +512,7 @@ class TestWorkflowTemplates:
         engine = WorkflowEngine()
         
         # Test execution order - should have parallel extraction
-        execution_order = await engine._get_execution_order(batch_workflow)
+        execution_order = engine._get_execution_order(batch_workflow)
         
         # First layer: all video inputs (parallel)
         first_layer = execution_order[:3]
@@ -99,7 +99,7 @@ class TestWorkflowEngine:
     async def test_workflow_validation(self):
         """Test workflow validation"""
         # Test valid workflow
-        result = await self.engine._validate_workflow(self.test_workflow)
+        result = self.engine._validate_workflow(self.test_workflow)
         assert result["valid"] == True
         
         # Test workflow with cycles
@@ -114,14 +114,14 @@ class TestWorkflowEngine:
             )
         )
         
-        result = await self.engine._validate_workflow(cyclic_workflow)
+        result = self.engine._validate_workflow(cyclic_workflow)
         assert result["valid"] == False
         assert "cycle" in result["error"].lower()
     
     @pytest.mark.asyncio
     async def test_execution_order(self):
         """Test execution order calculation"""
-        execution_order = await self.engine._get_execution_order(self.test_workflow)
+        execution_order = self.engine._get_execution_order(self.test_workflow)
         
         # Should start with video_input_1 (no dependencies)
         assert execution_order[0] == "video_input_1"
@@ -327,12 +327,11 @@ class TestWorkflowAPI:
 class TestNodeDefinitions:
     """Test node definition API"""
     
-    @pytest.mark.asyncio
-    async def test_get_node_definitions(self):
+    def test_list_node_definitions(self):
         """Test getting all node definitions"""
-        from backend.api.routes.nodes import get_node_definitions
+        from backend.core.node_definitions import list_node_definitions
         
-        definitions = await get_node_definitions()
+        definitions = list_node_definitions()
         
         # Should have all node types
         node_types = [defn.type for defn in definitions]
@@ -343,24 +342,24 @@ class TestNodeDefinitions:
         assert NodeType.VIDEO_OUTPUT in node_types
         assert NodeType.XSEG_EDITOR in node_types
     
-    @pytest.mark.asyncio
-    async def test_get_node_definition(self):
+    def test_find_node_definition(self):
         """Test getting specific node definition"""
-        from backend.api.routes.nodes import get_node_definition
+        from backend.core.node_definitions import find_node_definition
         
         # Test video input node
-        definition = await get_node_definition("video_input")
+        definition = find_node_definition("video_input")
         assert definition.type == NodeType.VIDEO_INPUT
         assert definition.name == "Video Input"
         assert len(definition.outputs) > 0
         
         # Test extract faces node
-        definition = await get_node_definition("extract_faces")
+        definition = find_node_definition("extract_faces")
         assert definition.type == NodeType.EXTRACT_FACES
         assert definition.name == "Extract Faces"
         assert len(definition.inputs) > 0
         assert len(definition.outputs) > 0
-
+        
+        assert find_node_definition("unknown") is None
 
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,66 @@
+"""
+Unit tests for the dfl-read.py script
+"""
+import pytest
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import cv2
+import numpy as np
+
+DFL_SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "backend" / "dfl_scripts"
+sys.path.insert(0, str(DFL_SCRIPTS_DIR))
+
+from DFLJPG import DFLJPG
+
+
+def load_dfl_read():
+    """Load dfl-read.py, whose file name is not importable as a module"""
+    spec = importlib.util.spec_from_file_location("dfl_read", DFL_SCRIPTS_DIR / "dfl-read.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubDecoder:
+    def read(self, files):
+        return [cv2.imread(file) for file in files]
+
+
+class StubEncoder:
+    def write(self, paths, images, ext, params=None):
+        for path, image in zip(paths, images):
+            cv2.imwrite(path, image)
+
+
+class TestConvertPngToJpg:
+    """Test PNG to JPEG conversion"""
+
+    def test_gpu_path_embeds_face_data(self):
+        """Test that GPU encoded images get their DFL metadata embedded"""
+        dfl_read = load_dfl_read()
+        landmarks = np.array([[float(i), float(i)] for i in range(68)], np.float32)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            src = os.path.join(temp_dir, "src")
+            dst = os.path.join(temp_dir, "dst")
+            os.makedirs(src)
+            os.makedirs(dst)
+            for i in range(3):
+                image_file = os.path.join(src, f"{i:05d}.jpg")
+                cv2.imwrite(image_file, np.full((64, 64, 3), i * 40, np.uint8))
+                DFLJPG.embed_data(image_file, face_type="whole_face", landmarks=landmarks,
+                                  source_filename=f"frame{i}.png")
+
+            with patch.object(dfl_read, "nvimgcodec", Mock()), \
+                 patch.object(dfl_read, "get_gpu_codec", Mock(return_value=(StubDecoder(), StubEncoder()))):
+                dfl_read.convert_png_to_jpg(src, dst)
+
+            for i in range(3):
+                face = DFLJPG.load(os.path.join(dst, f"{i:05d}.jpg"))
+                assert face.get_source_filename() == f"frame{i}.png"
+                assert np.allclose(face.get_landmarks(), landmarks)
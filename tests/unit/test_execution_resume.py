@@ -0,0 +1,112 @@
+"""
+Unit tests for workflow engine execution state
+"""
+import pytest
+import tempfile
+from unittest.mock import AsyncMock, Mock, patch
+
+from backend.core.workflow_engine import WorkflowEngine
+from backend.schemas.schemas import Workflow, WorkflowNode, WorkflowEdge
+
+
+def make_workflow() -> Workflow:
+    return Workflow(
+        id="wf1",
+        name="Workflow",
+        description="",
+        nodes=[
+            WorkflowNode(id=node_id, type="video_input", position={"x": 0, "y": 0}, parameters={})
+            for node_id in ["a", "b", "c"]
+        ],
+        edges=[
+            WorkflowEdge(id="e1", source="a", target="b", sourceHandle="out", targetHandle="in"),
+            WorkflowEdge(id="e2", source="b", target="c", sourceHandle="out", targetHandle="in"),
+        ],
+        created_at="2024-01-01T00:00:00",
+        updated_at="2024-01-01T00:00:00"
+    )
+
+
+class TestWorkflowEngineResume:
+    """Test that resumed executions skip nodes completed by an earlier run"""
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_completed_nodes(self):
+        """Test that a failed run persists its progress and a resume only runs the rest"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = WorkflowEngine(temp_dir)
+            engine._load_workflow = AsyncMock(return_value=make_workflow())
+
+            executed = []
+            fail_on = {"b"}
+
+            async def run_node(node, execution_context):
+                executed.append(node.id)
+                if node.id in fail_on:
+                    return {"success": False, "error": "boom"}
+                return {"success": True, "output_dir": f"/out/{node.id}"}
+
+            engine._execute_node_parallel = run_node
+            with patch("backend.core.workflow_engine.websocket_manager", AsyncMock()):
+                result = await engine.execute_workflow("wf1", "exec1")
+                assert not result["success"]
+                assert executed == ["a", "b"]
+
+                state = engine._read_execution_state("exec1")
+                assert state["nodes_completed"] == ["a"]
+                assert state["node_outputs"]["a"]["output_dir"] == "/out/a"
+
+                # A fresh engine resumes from the persisted state
+                fail_on.clear()
+                executed.clear()
+                resumed = WorkflowEngine(temp_dir)
+                resumed._load_workflow = engine._load_workflow
+                resumed._execute_node_parallel = run_node
+                result = await resumed.resume_execution("exec1")
+
+            assert result["success"]
+            assert executed == ["b", "c"]
+            # Completed executions leave no state file behind
+            assert resumed._read_execution_state("exec1") is None
+            assert not any(resumed.executions_dir.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_resume_unknown_execution(self):
+        """Test that resuming an execution with no state reports it as missing"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            engine = WorkflowEngine(temp_dir)
+            result = await engine.resume_execution("missing")
+            assert result == {"success": False, "error": "Execution not found"}
+
+
+class TestResumeRoute:
+    """Test that the resume endpoint continues executions instead of restarting them"""
+
+    @pytest.mark.asyncio
+    async def test_resume_route_uses_engine_resume(self):
+        """Test that a resumed execution goes through resume_execution and completes"""
+        from backend.api.routes import execution as execution_routes
+        from backend.schemas.schemas import WorkflowExecution, ExecutionStatus
+
+        execution_routes.executions_db["exec1"] = WorkflowExecution(
+            workflow_id="wf1",
+            status=ExecutionStatus.PAUSED,
+            started_at="2024-01-01T00:00:00",
+            message="Execution paused"
+        )
+        engine = AsyncMock()
+        engine.resume_execution.return_value = {"success": True}
+        background_tasks = Mock()
+
+        try:
+            with patch.object(execution_routes, "workflow_engine", engine), \
+                    patch.object(execution_routes, "websocket_manager", AsyncMock()):
+                await execution_routes.resume_execution("exec1", background_tasks)
+                task, *args = background_tasks.add_task.call_args.args
+                await task(*args)
+
+            engine.resume_execution.assert_awaited_once_with("exec1")
+            engine.execute_workflow.assert_not_called()
+            assert execution_routes.executions_db["exec1"].status == ExecutionStatus.COMPLETED
+        finally:
+            del execution_routes.executions_db["exec1"]
@@ -15,6 +15,7 @@ from backend.nodes.merge_node import MergeNode
 from backend.nodes.video_input_node import VideoInputNode
 from backend.nodes.video_output_node import VideoOutputNode
 from backend.nodes.xseg_node import XSegNode
+from backend.nodes.batch_rename_node import BatchRenameNode
 from backend.schemas.schemas import WorkflowNode, NodeStatus
 
 
@@ -64,6 +65,36 @@ class TestBaseNode:
         node = BaseNode(node_data)
         # Base node should pass validation by default
         assert node.validate_parameters() == True
+    
+    @pytest.mark.asyncio
+    async def test_throttled_progress_is_flushed(self):
+        """Test that the last throttled progress update is sent after the interval"""
+        from backend.nodes import base_node
+        
+        class ProgressNode(BaseNode):
+            async def execute(self, execution_context):
+                return {}
+        
+        node_data = WorkflowNode(
+            id="progress_node",
+            type="utility",
+            position={"x": 0, "y": 0},
+            parameters={}
+        )
+        node = ProgressNode(node_data)
+        
+        with patch.object(base_node, "websocket_manager") as mock_ws:
+            mock_ws.send_node_update = AsyncMock()
+            await node.update_progress(10.0, "start")
+            await node.update_progress(10.2, "a")
+            await node.update_progress(10.4, "b")
+            assert mock_ws.send_node_update.await_count == 1
+            
+            await asyncio.sleep(base_node.PROGRESS_UPDATE_INTERVAL * 2)
+            assert mock_ws.send_node_update.await_count == 2
+            sent = mock_ws.send_node_update.await_args.args[1]
+            assert sent["progress"] == 10.4
+            assert sent["message"] == "b"
 
 
 class TestVideoInputNode:
@@ -458,5 +489,134 @@ class TestXSegNode:
             assert "output_dir" in result
 
 
+
+class TestBatchRenameNode:
+    """Test batch rename node"""
+    
+    @pytest.mark.asyncio
+    async def test_matches_extensions_case_insensitively(self):
+        """Test that files are matched by extension in any case and renamed in name order"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in ["b.PNG", "a.jpg", "c.Jpeg", "notes.txt"]:
+                (Path(temp_dir) / name).touch()
+            (Path(temp_dir) / "folder.jpg").mkdir()
+            
+            node_data = WorkflowNode(
+                id="batch_rename_1",
+                type="utility",
+                position={"x": 0, "y": 0},
+                parameters={
+                    "input_dir": temp_dir,
+                    "pattern": "face_{index:02d}",
+                    "file_extensions": "jpg,jpeg,png"
+                },
+                status=NodeStatus.IDLE,
+                progress=0.0,
+                message="",
+                inputs={},
+                outputs={}
+            )
+            
+            node = BatchRenameNode(node_data)
+            result = await node.execute({})
+            
+            assert result["success"] == True
+            assert result["files_renamed"] == 3
+            assert sorted(p.name for p in Path(temp_dir).iterdir()) == [
+                "face_01.jpg", "face_02.PNG", "face_03.Jpeg", "folder.jpg", "notes.txt"
+            ]
+    
+    @pytest.mark.asyncio
+    async def test_targets_may_reuse_source_names(self):
+        """Test that renaming onto names held by other sources does not lose files"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for i, name in enumerate(["1.jpg", "2.jpg", "3.jpg"]):
+                (Path(temp_dir) / name).write_text(str(i))
+            (Path(temp_dir) / "4.png").touch()
+            
+            node_data = WorkflowNode(
+                id="batch_rename_1",
+                type="utility",
+                position={"x": 0, "y": 0},
+                parameters={
+                    "input_dir": temp_dir,
+                    "pattern": "{index}",
+                    "start_index": 2,
+                    "file_extensions": "jpg,png"
+                },
+                status=NodeStatus.IDLE,
+                progress=0.0,
+                message="",
+                inputs={},
+                outputs={}
+            )
+            
+            node = BatchRenameNode(node_data)
+            result = await node.execute({})
+            
+            assert result["files_renamed"] == 4
+            assert sorted(p.name for p in Path(temp_dir).iterdir()) == ["2.jpg", "3.jpg", "4.jpg", "5.png"]
+            assert [(Path(temp_dir) / f"{i}.jpg").read_text() for i in [2, 3, 4]] == ["0", "1", "2"]
+
+
+
+class TestFaceEditorCache:
+    """Test per-node face editor state shared across endpoints"""
+    
+    def test_editor_reused_without_request_state(self):
+        """Test that the cached editor is shared and requests leave its parameters alone"""
+        from backend.api.routes import nodes as node_routes
+        
+        first = node_routes._get_face_editor("face_editor_cache_1")
+        first.node.parameters["input_dir"] = "/tmp/a"
+        second = node_routes._get_face_editor("face_editor_cache_1")
+        
+        assert second is first
+        assert second.node.parameters == {"input_dir": "/tmp/a"}
+    
+    @pytest.mark.asyncio
+    async def test_import_jobs_are_bounded_and_scoped_to_node(self):
+        """Test that running imports are capped and jobs are only visible to their node"""
+        from fastapi import HTTPException
+        from backend.api.routes import nodes as node_routes
+        
+        face_editor = Mock()
+        face_editor.import_all_face_data = AsyncMock(return_value={"success": True})
+        
+        with patch.object(node_routes, "IMPORT_JOB_LIMIT", 1), \
+             patch.object(node_routes, "_import_jobs", node_routes.OrderedDict()):
+            job_id = node_routes._start_import_job("import_node_1", face_editor, "/tmp/a")
+            with pytest.raises(HTTPException) as exc_info:
+                node_routes._start_import_job("import_node_1", face_editor, "/tmp/b")
+            assert exc_info.value.status_code == 429
+            
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as exc_info:
+                await node_routes.get_node_progress("import_node_2", job_id)
+            assert exc_info.value.status_code == 404
+            
+            response = await node_routes.get_node_progress("import_node_1", job_id)
+            assert response["job_status"] == "completed"
+    
+    def test_detection_profiles_etag(self):
+        """Test that listing detection profiles answers conditional GETs"""
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from backend.api.routes import nodes as node_routes
+        
+        app = FastAPI()
+        app.include_router(node_routes.router, prefix="/api/nodes")
+        client = TestClient(app)
+        url = "/api/nodes/profile_node_1/detection-profiles"
+        
+        etag = client.get(url).headers["etag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        
+        client.post(url, json={"name": "close_up", "settings": {}})
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["profiles"] == ["default", "close_up"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
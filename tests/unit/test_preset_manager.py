@@ -0,0 +1,152 @@
+"""
+Unit tests for preset storage
+"""
+import pytest
+import asyncio
+import json
+import tempfile
+from unittest.mock import patch
+
+from backend.core.preset_manager import PresetManager
+from backend.schemas.schemas import NodePreset
+
+
+def make_preset(preset_id: str, name: str = "Preset") -> NodePreset:
+    return NodePreset(
+        id=preset_id,
+        name=name,
+        nodeType="video_input",
+        parameters={},
+        created_at="2024-01-01T00:00:00",
+        updated_at="2024-01-01T00:00:00"
+    )
+
+
+class TestPresetManager:
+    """Test preset manager caching and persistence"""
+
+    @pytest.mark.asyncio
+    async def test_writes_go_through_to_file(self):
+        """Test that saves, updates and deletes are visible to a fresh manager"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir)
+            manager.save_preset(make_preset("p1"))
+            manager.save_preset(make_preset("p2"))
+            manager.update_preset("p1", {"name": "Renamed"})
+            assert manager.delete_preset("p2")
+            await manager.flush()
+
+            reloaded = PresetManager(temp_dir)
+            assert [p.id for p in reloaded.list_presets()] == ["p1"]
+            assert (reloaded.get_preset("p1")).name == "Renamed"
+            assert reloaded.get_preset("p2") is None
+
+    @pytest.mark.asyncio
+    async def test_external_file_changes_invalidate_cache(self):
+        """Test that edits made to the presets file on disk are picked up"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir)
+            manager.save_preset(make_preset("p1"))
+            await manager.flush()
+            assert len(manager.list_presets()) == 1
+
+            data = json.loads(manager.presets_file.read_text())
+            data.append({**data[0], "id": "p2", "name": "Added elsewhere"})
+            manager.presets_file.write_text(json.dumps(data, indent=2))
+
+            assert (manager.get_preset("p2")).name == "Added elsewhere"
+
+    @pytest.mark.asyncio
+    async def test_invalid_entries_are_skipped_but_kept(self):
+        """Test that invalid presets are hidden from listings but survive writes"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir)
+            manager.presets_file.write_text(json.dumps([{"id": "broken"}]))
+
+            manager.save_preset(make_preset("p1"))
+            await manager.flush()
+
+            assert [p.id for p in manager.list_presets()] == ["p1"]
+            ids = [p["id"] for p in json.loads(manager.presets_file.read_text())]
+            assert ids == ["broken", "p1"]
+
+    @pytest.mark.asyncio
+    async def test_mutations_are_coalesced(self):
+        """Test that a burst of mutations is written once, after the debounce window"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir, flush_delay=0.05)
+            manager.save_preset(make_preset("p1"))
+            manager.save_preset(make_preset("p2"))
+            manager.update_preset("p2", {"name": "Renamed"})
+
+            # Reads see the pending changes before they reach the file
+            assert json.loads(manager.presets_file.read_text()) == []
+            assert (manager.get_preset("p2")).name == "Renamed"
+
+            await asyncio.sleep(0.1)
+
+            data = json.loads(manager.presets_file.read_text())
+            assert {p["id"]: p["name"] for p in data} == {"p1": "Preset", "p2": "Renamed"}
+
+    @pytest.mark.asyncio
+    async def test_prefix_search_follows_mutations(self):
+        """Test that prefix search matches word starts and reflects saves and deletes"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir)
+            manager.save_preset(make_preset("p1", "Fast Extract"))
+            manager.save_preset(make_preset("p2", "Extract HQ"))
+            manager.save_preset(make_preset("p3", "Merge"))
+
+            assert [p.id for p in manager.search_presets_by_prefix("ext")] == ["p1", "p2"]
+            assert manager.search_presets_by_prefix("tract") == []
+
+            manager.delete_preset("p1")
+            assert [p.id for p in manager.search_presets_by_prefix("EXT")] == ["p2"]
+
+    @pytest.mark.asyncio
+    async def test_import_streams_new_presets(self):
+        """Test that imported presets get fresh ids, duplicates are skipped and exports round-trip"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir)
+            manager.save_preset(make_preset("p1"))
+
+            import_file = f"{temp_dir}/import.json"
+            with open(import_file, "w") as f:
+                json.dump([make_preset("p1").dict(), make_preset("p2", "Imported").dict()], f)
+
+            assert manager.import_presets(import_file) == 1
+            presets = manager.list_presets()
+            assert [p.name for p in presets] == ["Preset", "Imported"]
+            assert presets[1].id.startswith("imported-")
+
+            export_file = f"{temp_dir}/export.json"
+            manager.export_presets(export_file)
+            with open(export_file) as f:
+                assert [p["name"] for p in json.load(f)] == ["Preset", "Imported"]
+
+            with open(import_file, "w") as f:
+                json.dump({"id": "p3"}, f)
+            with pytest.raises(Exception, match="must contain a list"):
+                manager.import_presets(import_file)
+
+    def test_import_with_parse_error_changes_nothing(self):
+        """Test that an import failing part way through adds no presets"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = PresetManager(temp_dir)
+            manager.save_preset(make_preset("p1"))
+            before = manager.presets_file.read_bytes()
+
+            import_file = f"{temp_dir}/import.json"
+            with open(import_file, "w") as f:
+                json.dump([make_preset("p2").dict()], f)
+
+            def truncated_items(file_path):
+                yield make_preset("p2").dict()
+                raise ValueError("unexpected end of file")
+
+            with patch.object(PresetManager, "_iter_import_file", staticmethod(truncated_items)):
+                with pytest.raises(Exception, match="Failed to read import file"):
+                    manager.import_presets(import_file)
+
+            assert [p.id for p in manager.list_presets()] == ["p1"]
+            assert manager.presets_file.read_bytes() == before
@@ -0,0 +1,59 @@
+"""
+Unit tests for the WebSocket manager
+"""
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+from backend.api import websocket as websocket_module
+from backend.api.websocket import WebSocketManager
+
+
+def make_client() -> Mock:
+    websocket = Mock()
+    websocket.accept = AsyncMock()
+    websocket.send_text = AsyncMock()
+    websocket.send_bytes = AsyncMock()
+    websocket.close = AsyncMock()
+    return websocket
+
+
+class TestWebSocketManager:
+    """Test outbound queueing for slow clients"""
+
+    @pytest.mark.asyncio
+    async def test_superseded_updates_are_merged(self):
+        """Test that a full queue drops stale node updates instead of the client"""
+        manager = WebSocketManager()
+        websocket = make_client()
+        with patch.object(websocket_module, "OUTBOUND_QUEUE_SIZE", 4):
+            await manager.connect(websocket)
+        manager.subscribe_to_node(websocket, "n1")
+
+        # Queued without yielding, so the writer has not sent anything yet
+        for progress in range(10):
+            await manager.send_node_update("n1", {"progress": progress})
+
+        assert websocket in manager.active_connections
+        queued = []
+        queue = manager.outbound_queues[websocket]
+        while not queue.empty():
+            queued.append(queue.get_nowait()[1])
+        assert len(queued) < 4
+        assert '"progress":9' in queued[-1]
+        manager.disconnect(websocket)
+
+    @pytest.mark.asyncio
+    async def test_lagging_client_is_closed(self):
+        """Test that a client dropped for falling behind has its socket closed"""
+        manager = WebSocketManager()
+        websocket = make_client()
+        with patch.object(websocket_module, "OUTBOUND_QUEUE_SIZE", 4):
+            await manager.connect(websocket)
+
+        for i in range(5):
+            await manager.broadcast(f'{{"type":"log","i":{i}}}')
+        await asyncio.gather(*manager.close_tasks)
+
+        assert websocket not in manager.active_connections
+        websocket.close.assert_awaited_once_with(code=websocket_module.DROPPED_CLIENT_CLOSE_CODE)
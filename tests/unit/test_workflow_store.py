@@ -0,0 +1,154 @@
+"""
+Unit tests for workflow storage
+"""
+import pytest
+import asyncio
+import json
+import tempfile
+from unittest.mock import patch
+from pathlib import Path
+
+from backend.core.workflow_store import WorkflowStore
+from backend.schemas.schemas import Workflow, WorkflowNode, WorkflowEdge
+
+
+def make_workflow(workflow_id: str) -> Workflow:
+    return Workflow(
+        id=workflow_id,
+        name=f"Workflow {workflow_id}",
+        description="",
+        nodes=[],
+        edges=[],
+        created_at="2024-01-01T00:00:00",
+        updated_at="2024-01-01T00:00:00"
+    )
+
+
+class TestWorkflowStore:
+    """Test workflow store persistence"""
+
+    def test_write_through_without_event_loop(self):
+        """Test that mutations outside an event loop are persisted immediately"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir)
+            store["wf1"] = make_workflow("wf1")
+
+            reloaded = WorkflowStore(temp_dir)
+            assert "wf1" in reloaded
+            assert reloaded["wf1"].name == "Workflow wf1"
+
+            del store["wf1"]
+            assert len(WorkflowStore(temp_dir)) == 0
+
+    @pytest.mark.asyncio
+    async def test_mutations_are_coalesced(self):
+        """Test that several mutations inside the debounce window produce one flush"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir, flush_delay=0.05)
+            store["wf1"] = make_workflow("wf1")
+            store["wf2"] = make_workflow("wf2")
+            store["wf1"].name = "Renamed"
+            store.mark_dirty("wf1")
+
+            # Nothing is written until the debounce window elapses
+            assert not store.workflows_file.exists()
+
+            await asyncio.sleep(0.1)
+
+            data = json.loads(store.workflows_file.read_text())
+            assert {w["id"]: w["name"] for w in data} == {"wf1": "Renamed", "wf2": "Workflow wf2"}
+
+    @pytest.mark.asyncio
+    async def test_flush_persists_pending_changes(self):
+        """Test that an explicit flush writes pending changes immediately"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir, flush_delay=60)
+            store["wf1"] = make_workflow("wf1")
+
+            await store.flush()
+
+            assert "wf1" in WorkflowStore(temp_dir)
+
+    def test_node_and_edge_index(self):
+        """Test id lookups and removals stay consistent with the node and edge lists"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir)
+            store["wf1"] = make_workflow("wf1")
+            for node_id in ["a", "b", "c"]:
+                store.add_node("wf1", WorkflowNode(id=node_id, type="video_input", position={"x": 0, "y": 0}, parameters={}))
+            store.add_edge("wf1", WorkflowEdge(id="e1", source="a", target="b", sourceHandle="out", targetHandle="in"))
+            store.add_edge("wf1", WorkflowEdge(id="e2", source="b", target="c", sourceHandle="out", targetHandle="in"))
+
+            assert store.remove_node("wf1", "a")
+            assert not store.remove_node("wf1", "a")
+
+            workflow = store["wf1"]
+            assert sorted(n.id for n in workflow.nodes) == ["b", "c"]
+            assert [e.id for e in workflow.edges] == ["e2"]
+            for node_id in ["b", "c"]:
+                assert workflow.nodes[store.find_node("wf1", node_id)].id == node_id
+
+            assert store.remove_edge("wf1", "e2")
+            assert workflow.edges == []
+
+    def test_bulk_add_extends_index(self):
+        """Test that bulk-added nodes and edges are reachable through the id index"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir)
+            store["wf1"] = make_workflow("wf1")
+            store.add_node("wf1", WorkflowNode(id="a", type="video_input", position={"x": 0, "y": 0}, parameters={}))
+            store.add_nodes("wf1", [
+                WorkflowNode(id=node_id, type="video_input", position={"x": 0, "y": 0}, parameters={})
+                for node_id in ["b", "c"]
+            ])
+            store.add_edges("wf1", [WorkflowEdge(id="e1", source="b", target="c", sourceHandle="out", targetHandle="in")])
+
+            workflow = store["wf1"]
+            assert [n.id for n in workflow.nodes] == ["a", "b", "c"]
+            assert workflow.nodes[store.find_node("wf1", "c")].id == "c"
+            assert store.remove_edge("wf1", "e1")
+
+    def test_revision_changes_on_every_mutation(self):
+        """Test that back-to-back mutations each produce a new revision"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir)
+            store["wf1"] = make_workflow("wf1")
+            revisions = {store.revision("wf1")}
+            for _ in range(3):
+                store.mark_dirty("wf1")
+                revisions.add(store.revision("wf1"))
+
+            assert len(revisions) == 4
+            assert WorkflowStore(temp_dir).revision("wf1") not in revisions
+
+    @pytest.mark.asyncio
+    async def test_overlapping_flushes_keep_latest_state(self):
+        """Test that concurrent flushes leave the newest snapshot on disk"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir, flush_delay=60)
+            store["wf1"] = make_workflow("wf1")
+            first = asyncio.create_task(store.flush())
+            await asyncio.sleep(0)
+
+            workflow = store["wf1"]
+            workflow.name = "Renamed"
+            store["wf1"] = workflow
+            await asyncio.gather(first, store.flush())
+
+            data = json.loads(store.workflows_file.read_text())
+            assert [w["name"] for w in data] == ["Renamed"]
+            assert not store.workflows_file.with_suffix(".json.tmp").exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_changes_dirty(self):
+        """Test that changes are written by the next flush after a failed write"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = WorkflowStore(temp_dir, flush_delay=60)
+            store["wf1"] = make_workflow("wf1")
+
+            with patch.object(store, "_write_workflows_to_file", side_effect=OSError("disk full")):
+                with pytest.raises(OSError):
+                    await store.flush()
+
+            await store.flush()
+            assert "wf1" in WorkflowStore(temp_dir)
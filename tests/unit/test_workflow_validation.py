@@ -0,0 +1,49 @@
+"""
+Unit tests for workflow validation
+"""
+from backend.core.workflow_engine import WorkflowEngine
+from backend.schemas.schemas import Workflow, WorkflowNode, WorkflowEdge
+
+
+def make_workflow(edges, extract_inputs=None) -> Workflow:
+    return Workflow(
+        id="wf1",
+        name="Workflow",
+        description="",
+        nodes=[
+            WorkflowNode(id="input", type="video_input", position={"x": 0, "y": 0}, parameters={}),
+            WorkflowNode(
+                id="extract",
+                type="extract_faces",
+                position={"x": 0, "y": 0},
+                parameters={},
+                inputs=extract_inputs or {}
+            ),
+        ],
+        edges=edges,
+        created_at="2024-01-01T00:00:00",
+        updated_at="2024-01-01T00:00:00"
+    )
+
+
+class TestWorkflowValidation:
+    """Test required input checks in workflow validation"""
+
+    def setup_method(self):
+        self.engine = WorkflowEngine()
+
+    def test_connected_required_input_is_valid(self):
+        """Test that an edge into a required port satisfies it"""
+        edge = WorkflowEdge(id="e1", source="input", target="extract", sourceHandle="video_frames", targetHandle="video")
+        assert self.engine._validate_workflow(make_workflow([edge])) == {"valid": True}
+
+    def test_missing_required_input_is_reported(self):
+        """Test that a required port with no edge or configured input fails validation"""
+        edge = WorkflowEdge(id="e1", source="input", target="extract", sourceHandle="video_frames", targetHandle="images")
+        result = self.engine._validate_workflow(make_workflow([edge]))
+        assert result == {"valid": False, "error": "Node extract missing required input video"}
+
+    def test_configured_input_satisfies_required_port(self):
+        """Test that an input set directly on the node counts as connected"""
+        workflow = make_workflow([], extract_inputs={"video": "/path/to/video.mp4"})
+        assert self.engine._validate_workflow(workflow)["valid"]